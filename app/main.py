@@ -1,5 +1,6 @@
 from config.settings import SettingsManager
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse
 
 from services.MarketDataService import MarketDataService
 from core.logger import get_logger
@@ -12,6 +13,9 @@ parser_service = MarketDataService()
 
 logger = get_logger("fastapi main.py")
 
+# blobs are content-addressed, so their url never changes meaning
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
 
 @app.get("/")
 async def root():
@@ -35,6 +39,33 @@ async def status_parser():
     return parser_service.get_status()
 
 
+@app.get("/icons/{ticker}")
+async def get_icon(ticker: str):
+    cached = parser_service.icon_cache.lookup(ticker)
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"No cached icon for {ticker}")
+    path, content_type, digest = cached
+    max_age = int(parser_service.config.ICONS_CACHE_MAX_AGE)
+    return FileResponse(
+        path,
+        media_type=content_type,
+        headers={"Cache-Control": f"public, max-age={max_age}", "ETag": f'"{digest}"'},
+    )
+
+
+@app.get("/icons/blob/{digest}")
+async def get_icon_blob(digest: str):
+    cached = parser_service.icon_cache.lookup_hash(digest)
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"No icon blob {digest}")
+    path, content_type = cached
+    return FileResponse(
+        path,
+        media_type=content_type,
+        headers={"Cache-Control": IMMUTABLE_CACHE, "ETag": f'"{digest}"'},
+    )
+
+
 @app.post("/change_settings_value")
 async def change_setting_value(key, new_value):
     settings = SettingsManager()
@@ -0,0 +1,42 @@
+"""JSON only __NEXT_DATA__ parsing against table parsing.
+
+Run from repo root: python -m benchmarks.bench_next_data [captured_page.html]
+Without argument a synthesized 100 row page is used. A real page can be
+captured with PERSIST_HTML=True (see config.HTML_PATH).
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.page_factory import build_listing_page
+from parser.parser_html import get_values_from_html_to_dict, get_values_from_next_data
+
+
+def _best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    if len(sys.argv) > 1:
+        html = Path(sys.argv[1]).read_bytes()
+        source = sys.argv[1]
+    else:
+        html = build_listing_page(100).encode()
+        source = "synthesized 100 rows"
+
+    table = _best_of(lambda: get_values_from_html_to_dict(html=html))
+    json_only = _best_of(lambda: get_values_from_next_data(html))
+
+    print(f"page: {source} ({len(html) / 1024:.0f} KiB)")
+    print(f"table parser:     {table * 1000:8.2f} ms")
+    print(f"json only parser: {json_only * 1000:8.2f} ms ({table / json_only:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
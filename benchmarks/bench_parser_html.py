@@ -0,0 +1,65 @@
+"""Parse time scaling of get_values_from_html_to_dict.
+
+Run from repo root: python -m benchmarks.bench_parser_html
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.page_factory import build_listing, build_listing_page
+from parser.parser_html import (
+    find_elem_by_ticker,
+    find_elem_in_index,
+    get_values_from_html_to_dict,
+    index_listing,
+)
+
+SIZES = (100, 1_000, 5_000)
+
+
+def _best_of(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_lookup(rows):
+    """Lookup of every ticker: linear scans vs index"""
+    listing = build_listing(rows)
+    tickers = [elem["symbol"] for elem in listing]
+
+    def linear():
+        for ticker in tickers:
+            find_elem_by_ticker(listing, ticker)
+
+    def indexed():
+        by_symbol, _ = index_listing(listing)
+        for ticker in tickers:
+            find_elem_in_index(by_symbol, ticker)
+
+    return _best_of(linear, repeat=1), _best_of(indexed)
+
+
+def bench_parse(rows, tmp_dir):
+    path = Path(tmp_dir) / f"listing_{rows}.html"
+    path.write_text(build_listing_page(rows))
+    return _best_of(lambda: get_values_from_html_to_dict(filepath=path))
+
+
+def main():
+    print(
+        f"{'rows':>6} | {'parse, s':>9} | {'linear lookup, s':>16} | {'index lookup, s':>15}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in SIZES:
+            parse = bench_parse(rows, tmp_dir)
+            linear, indexed = bench_lookup(rows)
+            print(f"{rows:>6} | {parse:>9.4f} | {linear:>16.4f} | {indexed:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
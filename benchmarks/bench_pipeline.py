@@ -0,0 +1,208 @@
+"""End-to-end force_parse cycles against a local stand-in upstream.
+
+Run from repo root: python -m benchmarks.bench_pipeline [options]
+e.g. python -m benchmarks.bench_pipeline --rows 1000 --cycles 50 \\
+         --latency-ms 80 --jitter-ms 40 --error-rate 0.05
+
+MarketDataService runs its real fetch -> parse -> persist path (transport,
+fetch strategy, retries, executor) against benchmarks.standin. Icon refresh
+checks are switched off, they need Redis and a browser (without Redis the
+snapshot meta save fails fast and logs a warning). Reports throughput,
+cycle outcomes and p50/p95/p99 of every stage:
+
+  fetch:   pipeline._fetch_page (request, retries, decompression)
+  parse:   pipeline._parse (executor queue + html/__NEXT_DATA__ parsing)
+  persist: save_values_to_json
+  cycle:   whole force_parse
+"""
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import os
+import tempfile
+import time
+from functools import wraps
+
+import parser.pipeline
+import services.MarketDataService
+from benchmarks.standin import StandInUpstream
+from config.settings import Config
+from parser.fetch_strategy import LatencyTracker
+from services.MarketDataService import MarketDataService
+
+STAGES = ("fetch", "parse", "persist", "cycle")
+
+
+def _timed_async(func, tracker):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            tracker.add(time.perf_counter() - start)
+
+    return wrapper
+
+
+def _timed_sync(func, tracker):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            tracker.add(time.perf_counter() - start)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def instrumented():
+    """Patches stage functions with timers, yields {stage: LatencyTracker}"""
+    # unbounded windows: several pages and retries add samples per cycle
+    trackers = {stage: LatencyTracker(window=None) for stage in STAGES}
+    patches = [
+        (parser.pipeline, "_fetch_page", _timed_async, "fetch"),
+        (parser.pipeline, "_parse", _timed_async, "parse"),
+        (services.MarketDataService, "save_values_to_json", _timed_sync, "persist"),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, *_ in patches]
+    for module, name, timed, stage in patches:
+        setattr(module, name, timed(getattr(module, name), trackers[stage]))
+    try:
+        yield trackers
+    finally:
+        for module, name, func in originals:
+            setattr(module, name, func)
+
+
+def build_service(url, workdir, args) -> MarketDataService:
+    config = dataclasses.replace(
+        Config.load(),
+        LISTING_URL=url,
+        LISTING_PAGES=args.pages,
+        JSON_PATH=os.path.join(workdir, "json.json"),
+        HTML_PATH=os.path.join(workdir, "site.html"),
+        PERSIST_HTML=False,
+        PARSE_EXECUTOR=args.executor,
+        RATE_LIMIT_BACKEND="off",
+        FETCH_STRATEGY="aiohttp",
+        FETCH_BACKOFF_BASE=args.backoff_ms / 1000,
+    )
+    service = MarketDataService(config=config)
+
+    async def no_icons_by_time():
+        return False
+
+    service._should_update_icons_by_time = no_icons_by_time
+    service._should_update_by_lost_icons = lambda json_path=None: False
+    return service
+
+
+async def run(args) -> dict:
+    upstream = StandInUpstream(
+        rows=args.rows,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        compression=not args.no_compression,
+        error_rate=args.error_rate,
+        page=args.page,
+        variants=1 if args.static else 3,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        async with upstream:
+            service = build_service(upstream.url, workdir, args)
+            try:
+                # warm up connection pool, executor and parser imports
+                await service.force_parse()
+                service.cycles = dict.fromkeys(service.cycles, 0)
+                upstream.requests, upstream.statuses = 0, {}
+
+                with instrumented() as trackers:
+                    start = time.perf_counter()
+                    for _ in range(args.cycles):
+                        cycle_start = time.perf_counter()
+                        await service.force_parse()
+                        trackers["cycle"].add(time.perf_counter() - cycle_start)
+                    elapsed = time.perf_counter() - start
+                rows = len(service._get_data())
+            finally:
+                await service.close()
+
+    return {
+        "elapsed": elapsed,
+        "rows": rows,
+        "stages": {stage: trackers[stage].as_dict() for stage in STAGES},
+        "cycles": service.cycles,
+        "resilience": service.resilience.stats,
+        "upstream": upstream.stats,
+    }
+
+
+def report(args, result) -> None:
+    elapsed = result["elapsed"]
+    updated = result["cycles"]["updated"]
+    print(
+        f"upstream: {args.page or f'{args.rows} synthesized rows'}, "
+        f"latency {args.latency_ms}±{args.jitter_ms} ms, "
+        f"error rate {args.error_rate:.0%}, "
+        f"compression {'off' if args.no_compression else 'on'}, "
+        f"{'static' if args.static else 'changing'} page, {args.pages} page(s)"
+    )
+    print(
+        f"throughput: {args.cycles / elapsed:.2f} cycles/s, "
+        f"{updated * result['rows'] / elapsed:.0f} rows/s "
+        f"({args.cycles} cycles in {elapsed:.2f} s)"
+    )
+    print(
+        f"{'stage':>8} | {'samples':>7} | {'p50, ms':>8} | {'p95, ms':>8} | {'p99, ms':>8}"
+    )
+    for stage, stats in result["stages"].items():
+        cells = [
+            "-" if stats[key] is None else f"{stats[key]:.1f}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(
+            f"{stage:>8} | {stats['samples']:>7} | "
+            + " | ".join(f"{cell:>8}" for cell in cells)
+        )
+    print(f"cycles: {result['cycles']}")
+    print(
+        f"retries: {result['resilience']['retries']}, "
+        f"errors: {result['resilience']['errors']}, "
+        f"breaker: {result['resilience']['state']}"
+    )
+    print(f"upstream: {result['upstream']}")
+
+
+def parse_args(argv=None):
+    parser_ = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser_.add_argument("--rows", type=int, default=100)
+    parser_.add_argument("--cycles", type=int, default=20)
+    parser_.add_argument("--pages", type=int, default=1)
+    parser_.add_argument("--latency-ms", type=float, default=0)
+    parser_.add_argument("--jitter-ms", type=float, default=0)
+    parser_.add_argument("--error-rate", type=float, default=0)
+    parser_.add_argument("--no-compression", action="store_true")
+    parser_.add_argument(
+        "--static", action="store_true", help="serve one page version (304s)"
+    )
+    parser_.add_argument("--page", help="captured listing html instead of synthesized")
+    parser_.add_argument(
+        "--executor",
+        choices=("thread", "inline"),
+        default="thread",
+        help="process pool can't run the timed persist stage",
+    )
+    parser_.add_argument("--backoff-ms", type=float, default=10)
+    parser_.add_argument("--seed", type=int, default=0)
+    return parser_.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report(args, asyncio.run(run(args)))
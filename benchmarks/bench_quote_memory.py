@@ -0,0 +1,45 @@
+"""Per-snapshot memory footprint: dict rows against CoinQuote records.
+
+Run from repo root: python -m benchmarks.bench_quote_memory
+"""
+
+import tracemalloc
+
+from benchmarks.page_factory import build_listing_page
+from parser.parser_html import get_values_from_html_to_dict
+from parser.snapshot import quotes_to_dicts
+
+SIZES = (100, 1_000, 5_000)
+
+
+def _allocated(build):
+    """Returns (object, bytes allocated while building it)"""
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    print(
+        f"{'rows':>6} | {'dict rows, KiB':>14} | {'CoinQuote, KiB':>14} | {'saved':>6}"
+    )
+    for rows in SIZES:
+        quotes = get_values_from_html_to_dict(html=build_listing_page(rows))
+        # values are shared with `quotes`, so only per-row container overhead counts
+        dicts, dicts_size = _allocated(lambda: quotes_to_dicts(quotes))
+        records, records_size = _allocated(
+            lambda: {
+                ticker: type(quote)(**dicts[ticker]) for ticker, quote in quotes.items()
+            }
+        )
+        saved = 1 - records_size / dicts_size
+        print(
+            f"{rows:>6} | {dicts_size / 1024:>14.1f} | "
+            f"{records_size / 1024:>14.1f} | {saved:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Per cycle latency and peak memory of download + parse.
+
+Run from repo root: python -m benchmarks.bench_transfer [rows] [cycles]
+A local aiohttp server plays the listing and answers gzip compressed
+(brotli too when it's installed). Compared paths:
+
+  buffered: resp.text() -> write file -> read file -> parse  (old top_100 path)
+  streamed: chunked read into one buffer -> parse in memory  (fetch_listing_page)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from benchmarks.page_factory import build_listing_page
+from parser.parser_html import get_values_from_html_to_dict
+from parser.parser_site import HEADERS, fetch_listing_page, save_html
+
+
+async def _buffered(session, url, filepath):
+    async with session.get(url, headers=HEADERS) as resp:
+        html = await resp.text()
+    await save_html(html, filepath)
+    del html
+    return get_values_from_html_to_dict(filepath=filepath, json_only=True)
+
+
+async def _streamed(session, url, filepath):
+    html = await fetch_listing_page(session, url=url)
+    return get_values_from_html_to_dict(html=html, json_only=True)
+
+
+async def _measure(fetch, session, url, filepath, cycles):
+    """Returns [(latency seconds, peak bytes)] for every cycle"""
+    out = []
+    for _ in range(cycles):
+        tracemalloc.start()
+        start = time.perf_counter()
+        await fetch(session, url, filepath)
+        latency = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out.append((latency, peak))
+    return out
+
+
+async def main(rows, cycles):
+    page = build_listing_page(rows).encode()
+    sent = {}
+
+    async def listing(request):
+        resp = web.Response(body=page, content_type="text/html")
+        resp.enable_compression()
+        sent["encoding"] = request.headers.get("Accept-Encoding")
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/coins/", listing)
+    server = TestServer(app)
+    await server.start_server()
+    url = str(server.make_url("/coins/"))
+
+    fd, filepath = tempfile.mkstemp(suffix=".html")
+    os.close(fd)
+    try:
+        async with aiohttp.ClientSession() as session:
+            # warm up connection and parser imports
+            await _streamed(session, url, filepath)
+            results = {
+                "buffered": await _measure(_buffered, session, url, filepath, cycles),
+                "streamed": await _measure(_streamed, session, url, filepath, cycles),
+            }
+    finally:
+        os.remove(filepath)
+        await server.close()
+
+    print(f"page: {rows} rows, {len(page) / 1024:.0f} KiB decoded")
+    print(f"accept-encoding: {sent['encoding']}")
+    print(f"{'path':>9} | {'cycle':>5} | {'latency, ms':>11} | {'peak, KiB':>9}")
+    for name, cycles_out in results.items():
+        for i, (latency, peak) in enumerate(cycles_out, 1):
+            print(f"{name:>9} | {i:>5} | {latency * 1000:>11.2f} | {peak / 1024:>9.0f}")
+    for name, cycles_out in results.items():
+        latencies = sorted(latency for latency, _ in cycles_out)
+        peak = max(peak for _, peak in cycles_out)
+        print(
+            f"{name}: median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+            f"max peak {peak / 1024:.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*(args + [1000, 5][len(args) :])))
@@ -0,0 +1,94 @@
+"""Synthesized CoinMarketCap-like listing pages for benchmarks"""
+
+import json
+import random
+
+
+def _quote(name, price, rnd):
+    return {
+        "name": name,
+        "price": price,
+        "volume24h": rnd.uniform(1e3, 1e10),
+        "marketCap": rnd.uniform(1e6, 1e12),
+        "percentChange1h": rnd.uniform(-5, 5),
+        "percentChange24h": rnd.uniform(-20, 20),
+        "percentChange7d": rnd.uniform(-40, 40),
+        "lastUpdated": "2026-03-06T12:04:00.000Z",
+    }
+
+
+def build_listing(rows, seed=0, offset=0):
+    """Returns cryptoCurrencyList with `rows` coins ranked from offset + 1"""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(offset, offset + rows):
+        price = rnd.uniform(0.0001, 70000)
+        out.append(
+            {
+                "id": i + 1,
+                "name": f"Coin {i}",
+                "symbol": f"C{i}",
+                "slug": f"coin-{i}",
+                "cmcRank": i + 1,
+                "quotes": [
+                    _quote("BTC", price / 70000, rnd),
+                    _quote("ETH", price / 2000, rnd),
+                    _quote("USD", price, rnd),
+                ],
+            }
+        )
+    return out
+
+
+def build_next_data(listing):
+    return {
+        "props": {
+            "dehydratedState": {
+                "queries": [
+                    {},
+                    {},
+                    {
+                        "state": {
+                            "data": {
+                                "data": {"listing": {"cryptoCurrencyList": listing}}
+                            }
+                        }
+                    },
+                ]
+            }
+        }
+    }
+
+
+def _row(coin, with_icon):
+    usd = coin["quotes"][-1]
+    icon = (
+        f'<img class="coin-logo" src="https://example.com/{coin["id"]}.png" />'
+        if with_icon
+        else ""
+    )
+    return (
+        "<tr>"
+        f"<td></td><td>{coin['cmcRank']}</td>"
+        f"<td><span>{coin['cmcRank']}</span><span>{coin['name']}</span>"
+        f"<span>{coin['symbol']}</span>{icon}</td>"
+        f"<td>${usd['price']:,.2f}</td>"
+        f'<td><span class="icon-Caret-up"></span>{abs(usd["percentChange1h"]):.2f}%</td>'
+        "</tr>"
+    )
+
+
+def build_listing_page(rows, seed=0, icons_every=10, offset=0):
+    """Returns html (str) with `rows` table rows and matching __NEXT_DATA__.
+    Every `icons_every`-th row has a coin-logo like the lazy loaded page.
+    offset shifts ranks, ids and symbols, e.g. (page - 1) * rows"""
+    listing = build_listing(rows, seed=seed, offset=offset)
+    body = "".join(_row(coin, i % icons_every == 0) for i, coin in enumerate(listing))
+    next_data = json.dumps(build_next_data(listing))
+    return (
+        "<!DOCTYPE html><html><head><title>Listing</title></head><body>"
+        "<table><tr><th>#</th></tr><tr><td>header</td></tr>"
+        f"{body}</table>"
+        f'<script id="__NEXT_DATA__" type="application/json">{next_data}</script>'
+        "</body></html>"
+    )
@@ -0,0 +1,149 @@
+"""Local stand-in for the CoinMarketCap listing.
+
+Serves synthesized (benchmarks.page_factory) or captured listing pages with
+configurable latency, jitter, compression and error rate, so the whole
+pipeline can be exercised without network:
+
+    async with StandInUpstream(rows=500, latency=0.05, error_rate=0.1) as upstream:
+        config = replace(Config.load(), LISTING_URL=upstream.url)
+
+Listing page N (?page=N) serves its own `rows` coins ranked after page N-1.
+Every request of a page answers the next of its `variants` versions (prices
+change between them), variants=1 keeps pages static so ETag / 304 kicks in.
+A captured `page` is served for every page number.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import random
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from benchmarks.page_factory import build_listing_page
+
+
+class StandInUpstream:
+    def __init__(
+        self,
+        rows: int = 100,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        compression: bool = True,
+        error_rate: float = 0.0,
+        page: str = None,
+        variants: int = 3,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.compression = compression
+        self.error_rate = error_rate
+        self.rows = rows
+        self.variants = max(variants, 1)
+        self.seed = seed
+        self._rnd = random.Random(seed)
+        self._captured = None
+        if page is not None:
+            with open(page, "rb") as f:
+                self._captured = [_variant(f.read())]
+        # {page number: versions}, built on first request of the page
+        self._pages = {}
+        self._next = {}
+        self._server = None
+        self.requests = 0
+        self.statuses = {}
+        self.bytes_sent = 0
+
+    @property
+    def url(self) -> str:
+        return str(self._server.make_url("/coins/"))
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/coins/", self._listing)
+        self._server = TestServer(app)
+        await self._server.start_server()
+        return self.url
+
+    async def close(self) -> None:
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    async def __aenter__(self) -> "StandInUpstream":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._rnd.uniform(-self.jitter, self.jitter))
+
+    async def _listing(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self._rnd.random() < self.error_rate:
+            return self._answer(web.Response(status=503, text="stand-in error"))
+
+        try:
+            number = max(int(request.query.get("page", 1)), 1)
+        except ValueError:
+            number = 1
+        versions = self._versions(number)
+        turn = self._next.get(number, 0)
+        self._next[number] = turn + 1
+        variant = versions[turn % len(versions)]
+        headers = {"ETag": variant["etag"]}
+        if request.headers.get("If-None-Match") == variant["etag"]:
+            return self._answer(web.Response(status=304, headers=headers))
+
+        body = variant["body"]
+        if self.compression and "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = variant["gzip"]
+            headers["Content-Encoding"] = "gzip"
+        return self._answer(
+            web.Response(body=body, content_type="text/html", headers=headers)
+        )
+
+    def _versions(self, number: int) -> list:
+        if self._captured is not None:
+            return self._captured
+        if number not in self._pages:
+            offset = (number - 1) * self.rows
+            self._pages[number] = [
+                _variant(
+                    build_listing_page(
+                        self.rows, seed=self.seed + i, offset=offset
+                    ).encode()
+                )
+                for i in range(self.variants)
+            ]
+        return self._pages[number]
+
+    def _answer(self, resp: web.Response) -> web.Response:
+        self.statuses[resp.status] = self.statuses.get(resp.status, 0) + 1
+        self.bytes_sent += len(resp.body or b"")
+        return resp
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "statuses": dict(sorted(self.statuses.items())),
+            "sent_kib": round(self.bytes_sent / 1024, 1),
+        }
+
+
+def _variant(body: bytes) -> dict:
+    # compressed once here, so server cpu doesn't blur client timings
+    return {
+        "body": body,
+        "gzip": gzip.compress(body, compresslevel=6),
+        "etag": '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest(),
+    }
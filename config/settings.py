@@ -7,6 +7,11 @@ import redis
 load_dotenv()
 
 
+def _split(value: str) -> tuple:
+    """Parses comma separated env value"""
+    return tuple(item.strip().lower() for item in value.split(",") if item.strip())
+
+
 @dataclass(frozen=True)
 class Config:
     "Configure the app from env values"
@@ -16,6 +21,46 @@ class Config:
     LOG_FILE: bool
     LOG_TERMINAL: bool
     HTML_PATH: str
+    PERSIST_HTML: bool
+    PARSE_JSON_ONLY: bool
+    PARSE_EXECUTOR: str
+    PARSE_WORKERS: int
+    PARSE_QUEUE_SIZE: int
+    LISTING_URL: str
+    LISTING_PAGES: int
+    FETCH_CONCURRENCY: int
+    FETCH_STRATEGY: str
+    FETCH_HEDGE_DELAY: float
+    FETCH_RETRIES: int
+    FETCH_BACKOFF_BASE: float
+    FETCH_BACKOFF_MAX: float
+    BREAKER_FAILURES: int
+    BREAKER_RESET_SECONDS: float
+    SCHEDULER_JITTER: float
+    SCHEDULER_OVERRUN: str
+    SINK_QUEUE_SIZE: int
+    STAGE_QUEUE_SIZE: int
+    RATE_LIMIT_BACKEND: str
+    RATE_LIMIT_RATE: float
+    RATE_LIMIT_BURST: int
+    RATE_LIMIT_REDIS_COOLDOWN: float
+    HTTP_POOL_LIMIT: int
+    HTTP_POOL_LIMIT_PER_HOST: int
+    HTTP_KEEPALIVE_TIMEOUT: float
+    HTTP_DNS_CACHE_TTL: int
+    HTTP_TIMEOUT: float
+    HTTP_CONNECT_TIMEOUT: float
+    BROWSER_PAGES: int
+    BROWSER_PAGE_MAX_USES: int
+    BROWSER_ALLOWED_RESOURCES: tuple
+    BROWSER_ALLOWED_DOMAINS: tuple
+    ICONS_RENDER_DEADLINE: float
+    ICONS_SOURCE: str
+    ICONS_VALIDATE: bool
+    ICONS_VALIDATE_CONCURRENCY: int
+    ICONS_CACHE_DIR: str
+    ICONS_CACHE_MAX_AGE: float
+    ICONS_CACHE_CONCURRENCY: int
     JSON_PATH: str
     ICONS: str
     REDIS_HOST: str
@@ -40,6 +85,58 @@ class Config:
             HTML_PATH=os.path.join(
                 base_dir, "html_cache", os.getenv("HTML_PATH", "html_cache.html")
             ),
+            PERSIST_HTML=os.getenv("PERSIST_HTML", "False").lower() == "true",
+            PARSE_JSON_ONLY=os.getenv("PARSE_JSON_ONLY", "True").lower() == "true",
+            PARSE_EXECUTOR=os.getenv("PARSE_EXECUTOR", "thread").lower(),
+            PARSE_WORKERS=int(os.getenv("PARSE_WORKERS", "1")),
+            PARSE_QUEUE_SIZE=int(os.getenv("PARSE_QUEUE_SIZE", "4")),
+            LISTING_URL=os.getenv("LISTING_URL", "https://coinmarketcap.com/coins/"),
+            LISTING_PAGES=int(os.getenv("LISTING_PAGES", "1")),
+            FETCH_CONCURRENCY=int(os.getenv("FETCH_CONCURRENCY", "4")),
+            FETCH_STRATEGY=os.getenv("FETCH_STRATEGY", "aiohttp").lower(),
+            FETCH_HEDGE_DELAY=float(os.getenv("FETCH_HEDGE_DELAY", "2")),
+            FETCH_RETRIES=int(os.getenv("FETCH_RETRIES", "3")),
+            FETCH_BACKOFF_BASE=float(os.getenv("FETCH_BACKOFF_BASE", "0.5")),
+            FETCH_BACKOFF_MAX=float(os.getenv("FETCH_BACKOFF_MAX", "10")),
+            BREAKER_FAILURES=int(os.getenv("BREAKER_FAILURES", "3")),
+            BREAKER_RESET_SECONDS=float(os.getenv("BREAKER_RESET_SECONDS", "60")),
+            SCHEDULER_JITTER=float(os.getenv("SCHEDULER_JITTER", "0")),
+            SCHEDULER_OVERRUN=os.getenv("SCHEDULER_OVERRUN", "skip").lower(),
+            SINK_QUEUE_SIZE=int(os.getenv("SINK_QUEUE_SIZE", "1")),
+            STAGE_QUEUE_SIZE=int(os.getenv("STAGE_QUEUE_SIZE", "1")),
+            RATE_LIMIT_BACKEND=os.getenv("RATE_LIMIT_BACKEND", "local").lower(),
+            RATE_LIMIT_RATE=float(os.getenv("RATE_LIMIT_RATE", "2")),
+            RATE_LIMIT_BURST=int(os.getenv("RATE_LIMIT_BURST", "10")),
+            RATE_LIMIT_REDIS_COOLDOWN=float(
+                os.getenv("RATE_LIMIT_REDIS_COOLDOWN", "30")
+            ),
+            HTTP_POOL_LIMIT=int(os.getenv("HTTP_POOL_LIMIT", "100")),
+            HTTP_POOL_LIMIT_PER_HOST=int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10")),
+            HTTP_KEEPALIVE_TIMEOUT=float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30")),
+            HTTP_DNS_CACHE_TTL=int(os.getenv("HTTP_DNS_CACHE_TTL", "300")),
+            HTTP_TIMEOUT=float(os.getenv("HTTP_TIMEOUT", "30")),
+            HTTP_CONNECT_TIMEOUT=float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")),
+            BROWSER_PAGES=int(os.getenv("BROWSER_PAGES", "2")),
+            BROWSER_PAGE_MAX_USES=int(os.getenv("BROWSER_PAGE_MAX_USES", "20")),
+            BROWSER_ALLOWED_RESOURCES=_split(
+                os.getenv(
+                    "BROWSER_ALLOWED_RESOURCES", "document,script,xhr,fetch,stylesheet"
+                )
+            ),
+            BROWSER_ALLOWED_DOMAINS=_split(
+                os.getenv("BROWSER_ALLOWED_DOMAINS", "coinmarketcap.com")
+            ),
+            ICONS_RENDER_DEADLINE=float(os.getenv("ICONS_RENDER_DEADLINE", "10")),
+            ICONS_SOURCE=os.getenv("ICONS_SOURCE", "next_data").lower(),
+            ICONS_VALIDATE=os.getenv("ICONS_VALIDATE", "False").lower() == "true",
+            ICONS_VALIDATE_CONCURRENCY=int(
+                os.getenv("ICONS_VALIDATE_CONCURRENCY", "8")
+            ),
+            ICONS_CACHE_DIR=os.path.join(
+                base_dir, os.getenv("ICONS_CACHE_DIR", "icon_cache")
+            ),
+            ICONS_CACHE_MAX_AGE=float(os.getenv("ICONS_CACHE_MAX_AGE", "86400")),
+            ICONS_CACHE_CONCURRENCY=int(os.getenv("ICONS_CACHE_CONCURRENCY", "8")),
             JSON_PATH=os.path.join(
                 base_dir, "json_cache", os.getenv("JSON_PATH", "json_coins.json")
             ),
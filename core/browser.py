@@ -0,0 +1,255 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright
+
+from core.logger import get_logger
+
+logger = get_logger("browser")
+
+
+class RouteFilter:
+    """Playwright route handler which lets through only allowed resource
+    types from allowed domains (subdomains included), the rest is aborted.
+    Empty allow-list doesn't restrict anything"""
+
+    def __init__(self, resource_types=(), domains=()):
+        self.resource_types = frozenset(resource_types)
+        self.domains = tuple(domains)
+        self.allowed = 0
+        self.blocked = 0
+
+    def allows(self, resource_type: str, url: str) -> bool:
+        if self.resource_types and resource_type not in self.resource_types:
+            return False
+        if not self.domains:
+            return True
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+    async def handle(self, route) -> None:
+        request = route.request
+        if self.allows(request.resource_type, request.url):
+            self.allowed += 1
+            await route.continue_()
+        else:
+            self.blocked += 1
+            await route.abort()
+
+    @property
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "blocked": self.blocked}
+
+
+class TrafficMeter:
+    """Counts requests of a page and bytes transferred by them
+    until collect() is awaited"""
+
+    def __init__(self, page):
+        self.page = page
+        self._finished = []
+        self.failed = 0
+        page.on("requestfinished", self._on_finished)
+        page.on("requestfailed", self._on_failed)
+
+    def _on_finished(self, request) -> None:
+        self._finished.append(request)
+
+    def _on_failed(self, request) -> None:
+        self.failed += 1
+
+    async def collect(self) -> dict:
+        self.page.remove_listener("requestfinished", self._on_finished)
+        self.page.remove_listener("requestfailed", self._on_failed)
+        transferred = 0
+        for request in self._finished:
+            try:
+                sizes = await request.sizes()
+            except Exception as _ex:
+                logger.debug(f"Request sizes unavailable: {_ex}")
+                continue
+            transferred += sizes["responseHeadersSize"] + sizes["responseBodySize"]
+        return {
+            "requests": len(self._finished),
+            "failed_requests": self.failed,
+            "transferred_bytes": transferred,
+        }
+
+
+class _PooledPage:
+    __slots__ = ("browser", "context", "page", "uses")
+
+    def __init__(self, browser, context, page):
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+
+class BrowserPool:
+    """Long-lived Chromium shared by every Playwright user of the service.
+
+    Browser is launched on first use and stays warm, pages are handed out
+    with `async with pool.page() as page`. Each pooled page has its own
+    context and is recycled after `max_page_uses` navigations or after an
+    error. A crashed or disconnected browser is relaunched on next use.
+    With route_filter (RouteFilter) pooled pages load only allowed resources.
+    With rate_limiter (core.rate_limit) every navigation waits for a token.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_page_uses: int = 20,
+        headless: bool = True,
+        route_filter: Optional[RouteFilter] = None,
+        rate_limiter=None,
+    ):
+        self.size = size
+        self.max_page_uses = max_page_uses
+        self.headless = headless
+        self.route_filter = route_filter
+        self.rate_limiter = rate_limiter
+        self._playwright = None
+        self._browser = None
+        self._idle: list[_PooledPage] = []
+        self._slots = asyncio.Semaphore(size)
+        self._lock = asyncio.Lock()
+        self.launches = 0
+        self.restarts = 0
+        self.page_uses = 0
+        self.pages_recycled = 0
+
+    @classmethod
+    def from_config(cls, config, rate_limiter=None) -> "BrowserPool":
+        return cls(
+            size=config.BROWSER_PAGES,
+            max_page_uses=config.BROWSER_PAGE_MAX_USES,
+            route_filter=RouteFilter(
+                config.BROWSER_ALLOWED_RESOURCES, config.BROWSER_ALLOWED_DOMAINS
+            ),
+            rate_limiter=rate_limiter,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=self.headless)
+
+    async def _get_browser(self):
+        """Returns warm browser, launches it on first use or after crash"""
+        async with self._lock:
+            if self.running:
+                return self._browser
+            if self._browser is not None:
+                logger.warning("Browser disconnected, restarting...")
+                self.restarts += 1
+                self._idle.clear()
+            self._browser = await self._launch()
+            self.launches += 1
+            logger.info(f"Browser launched (pages {self.size})")
+            return self._browser
+
+    async def _new_page(self, browser, filtered: bool = True) -> _PooledPage:
+        context = await browser.new_context()
+        route_filter = self.route_filter if filtered else None
+        if route_filter is not None or self.rate_limiter is not None:
+
+            async def handle(route):
+                await self._route(route, route_filter)
+
+            await context.route("**/*", handle)
+        page = await context.new_page()
+        return _PooledPage(browser, context, page)
+
+    async def _route(self, route, route_filter: Optional[RouteFilter]) -> None:
+        request = route.request
+        if self.rate_limiter is not None and request.resource_type == "document":
+            await self.rate_limiter.acquire(request.url)
+        if route_filter is not None:
+            await route_filter.handle(route)
+        else:
+            await route.continue_()
+
+    def _take_idle(self, browser) -> Optional[_PooledPage]:
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.browser is browser and not pooled.page.is_closed():
+                return pooled
+        return None
+
+    @asynccontextmanager
+    async def page(self, filtered: bool = True):
+        """Lends a page of the warm browser, at most `size` at once.
+        filtered=False gives a one-off page without route filter
+        (closed after use), e.g. to measure what the filter saves"""
+        async with self._slots:
+            browser = await self._get_browser()
+            if filtered:
+                pooled = self._take_idle(browser) or await self._new_page(browser)
+            else:
+                pooled = await self._new_page(browser, filtered=False)
+            pooled.uses += 1
+            self.page_uses += 1
+            ok = False
+            try:
+                yield pooled.page
+                ok = filtered
+            finally:
+                await self._release(pooled, ok)
+
+    async def _release(self, pooled: _PooledPage, ok: bool) -> None:
+        worn_out = pooled.uses >= self.max_page_uses
+        if (
+            ok
+            and not worn_out
+            and pooled.browser is self._browser
+            and not pooled.page.is_closed()
+        ):
+            self._idle.append(pooled)
+            return
+
+        if worn_out:
+            self.pages_recycled += 1
+        await self._close_context(pooled)
+
+    async def _close_context(self, pooled: _PooledPage) -> None:
+        try:
+            await pooled.context.close()
+        except Exception as _ex:
+            logger.debug(f"Closing browser context failed by {_ex}")
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "launches": self.launches,
+            "restarts": self.restarts,
+            "page_uses": self.page_uses,
+            "pages_recycled": self.pages_recycled,
+            "idle_pages": len(self._idle),
+            "routes": self.route_filter.stats if self.route_filter else None,
+        }
+
+    async def close(self) -> None:
+        """Closes pooled pages, browser and playwright driver"""
+        async with self._lock:
+            for pooled in self._idle:
+                await self._close_context(pooled)
+            self._idle.clear()
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception as _ex:
+                    logger.debug(f"Closing browser failed by {_ex}")
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info("Browser pool closed")
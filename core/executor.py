@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from core.logger import get_logger
+
+logger = get_logger("executor")
+
+
+class ParseExecutor:
+    """Runs CPU bound stages (html parsing, json serializing) off the event loop.
+
+    kind: "thread", "process" or "inline" (runs on the loop, for debugging).
+    At most max_pending jobs are submitted at once, other callers wait for a slot,
+    so a slow pool applies backpressure instead of growing an unbounded queue.
+    With "process" kind functions and arguments must be picklable.
+    """
+
+    KINDS = ("thread", "process", "inline")
+
+    def __init__(
+        self, kind: str = "thread", max_workers: int = 1, max_pending: int = 4
+    ):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = asyncio.Semaphore(max_pending)
+        self._pool: Executor | None = None
+        self._pending = 0
+        self._closed = False
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="parse"
+                )
+            logger.info(f"Started {self.kind} pool with {self.max_workers} workers")
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        """Count of jobs submitted to pool and not finished yet"""
+        return self._pending
+
+    async def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) in pool and returns its result"""
+        if self._closed:
+            raise RuntimeError("Executor is closed")
+        if self.kind == "inline":
+            return func(*args, **kwargs)
+
+        async with self._slots:
+            self._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._get_pool(), partial(func, *args, **kwargs)
+                )
+            finally:
+                self._pending -= 1
+
+    async def close(self) -> None:
+        """Cancels queued jobs, waits for running ones and stops workers"""
+        self._closed = True
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+        logger.info(f"{self.kind} pool was shut down")
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+import aiohttp
+
+from core.logger import get_logger
+from core.transport import limited_request
+
+logger = get_logger("icon_cache")
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+}
+
+
+class IconCache:
+    """Content-addressed on-disk cache of icon images.
+
+    Blobs are stored as `<root>/blobs/<blake2b>.<ext>`, so a logo shared by
+    several tickers (or unchanged between refreshes) is stored once.
+    `<root>/index.json` maps ticker to {hash, url, content_type, fetched_at}.
+    prefetch() downloads only tickers that are new, whose url changed or whose
+    entry is older than max_age seconds.
+    """
+
+    def __init__(self, root: str, max_age: float = 86400, concurrency: int = 8):
+        self.root = root
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.index_path = os.path.join(root, "index.json")
+        self.max_age = max_age
+        self.concurrency = concurrency
+        self._index: Optional[dict] = None
+        self._lock = asyncio.Lock()
+        self.downloaded = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, config) -> "IconCache":
+        return cls(
+            root=config.ICONS_CACHE_DIR,
+            max_age=config.ICONS_CACHE_MAX_AGE,
+            concurrency=config.ICONS_CACHE_CONCURRENCY,
+        )
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    self._index = json.load(f)
+            else:
+                self._index = {}
+        return self._index
+
+    def _blob_path(self, digest: str, content_type: str) -> str:
+        return os.path.join(
+            self.blobs_dir, digest + EXTENSIONS.get(content_type, ".bin")
+        )
+
+    def lookup(self, ticker: str) -> Optional[tuple[str, str, str]]:
+        """Returns (path, content_type, hash) of cached icon or None"""
+        entry = self.index.get(ticker)
+        if entry is None:
+            return None
+        path = self._blob_path(entry["hash"], entry["content_type"])
+        if not os.path.exists(path):
+            return None
+        return path, entry["content_type"], entry["hash"]
+
+    def lookup_hash(self, digest: str) -> Optional[tuple[str, str]]:
+        """Returns (path, content_type) of blob with given hash or None"""
+        for entry in self.index.values():
+            if entry["hash"] == digest:
+                path = self._blob_path(digest, entry["content_type"])
+                if os.path.exists(path):
+                    return path, entry["content_type"]
+        return None
+
+    def stale(self, icons: dict, now: Optional[float] = None) -> dict:
+        """Returns {ticker: url} which must be (re)downloaded"""
+        if now is None:
+            now = time.time()
+        out = {}
+        for ticker, url in icons.items():
+            if not url:
+                continue
+            entry = self.index.get(ticker)
+            if (
+                entry is None
+                or entry["url"] != url
+                or now - entry["fetched_at"] >= self.max_age
+                or self.lookup(ticker) is None
+            ):
+                out[ticker] = url
+        return out
+
+    async def prefetch(
+        self, session: aiohttp.ClientSession, icons: dict, limiter=None
+    ) -> dict:
+        """Downloads stale icons of {ticker: url}, at most `concurrency` at once,
+        within limiter (core.rate_limit) budget if it's given.
+        Returns {"checked", "downloaded", "unchanged", "failed"} of this run"""
+        async with self._lock:
+            stale = self.stale(icons)
+            run = {"checked": len(icons), "downloaded": 0, "unchanged": 0, "failed": 0}
+            if not stale:
+                return run
+
+            os.makedirs(self.blobs_dir, exist_ok=True)
+            slots = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(ticker, url):
+                async with slots:
+                    try:
+                        async with limited_request(
+                            session, "GET", url, limiter=limiter
+                        ) as resp:
+                            resp.raise_for_status()
+                            body = await resp.read()
+                            content_type = resp.content_type
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as _ex:
+                        logger.debug(f"Icon {ticker} ({url}) failed by {_ex!r}")
+                        return ticker, url, None, None
+                return ticker, url, body, content_type
+
+            results = await asyncio.gather(*(fetch(t, u) for t, u in stale.items()))
+
+            now = time.time()
+            for ticker, url, body, content_type in results:
+                if body is None:
+                    run["failed"] += 1
+                    continue
+                digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+                previous = self.index.get(ticker)
+                if previous is not None and previous["hash"] == digest:
+                    run["unchanged"] += 1
+                else:
+                    run["downloaded"] += 1
+                path = self._blob_path(digest, content_type)
+                if not os.path.exists(path):
+                    await asyncio.to_thread(_write_atomic, path, body)
+                self.index[ticker] = {
+                    "hash": digest,
+                    "url": url,
+                    "content_type": content_type,
+                    "fetched_at": now,
+                }
+
+            await asyncio.to_thread(
+                _write_atomic, self.index_path, json.dumps(self.index).encode()
+            )
+            self.downloaded += run["downloaded"]
+            self.unchanged += run["unchanged"]
+            self.failed += run["failed"]
+            logger.info(f"Icon cache refreshed: {run}")
+            return run
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.index),
+            "downloaded": self.downloaded,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+        }
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
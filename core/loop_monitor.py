@@ -0,0 +1,63 @@
+import asyncio
+
+
+class LoopLagMonitor:
+    """Measures event loop lag: how late a probe task wakes up after sleeping.
+
+    Used as async context manager around a code block, e.g. a parsing cycle:
+
+        async with LoopLagMonitor() as lag:
+            await parse()
+        lag.max_lag  # seconds
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.samples = 0
+        self._expected_wakeup = None
+        self._task = None
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.samples if self.samples else 0.0
+
+    def _record(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        self.max_lag = max(self.max_lag, lag)
+        self.total_lag += lag
+        self.samples += 1
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._expected_wakeup = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._record(loop.time() - self._expected_wakeup)
+            self._expected_wakeup = None
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._probe())
+        # let probe schedule its first wakeup before measured code starts
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # blocking code right before exit delays probe which didn't wake up yet
+        if self._expected_wakeup is not None:
+            overdue = asyncio.get_running_loop().time() - self._expected_wakeup
+            if overdue > 0:
+                self._record(overdue)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def as_dict(self) -> dict:
+        return {
+            "max_ms": round(self.max_lag * 1000, 3),
+            "mean_ms": round(self.mean_lag * 1000, 3),
+            "samples": self.samples,
+        }
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from core.logger import get_logger
+
+logger = get_logger("rate_limit")
+
+
+def host_of(url_or_host) -> str:
+    """Returns lower-cased host of url (str or yarl.URL) or the host itself"""
+    value = str(url_or_host)
+    if "://" in value:
+        value = urlsplit(value).hostname or ""
+    return value.lower()
+
+
+class TokenBucketLimiter:
+    """In-process token bucket per host: `rate` requests per second with
+    bursts up to `burst`. acquire() waits for a token instead of failing,
+    waiters of one host are served in arrival order."""
+
+    def __init__(self, rate: float = 2.0, burst: int = 10, clock=None, sleep=None):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock or time.monotonic
+        self._sleep = sleep or asyncio.sleep
+        self._buckets: dict[str, list] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _take(self, host: str) -> float:
+        """Takes a token if there is one, returns seconds to wait otherwise"""
+        now = self._clock()
+        tokens, updated = self._buckets.get(host, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._buckets[host] = [tokens - 1, now]
+            return 0.0
+        self._buckets[host] = [tokens, now]
+        return (1 - tokens) / self.rate
+
+    async def _next_delay(self, host: str) -> float:
+        return self._take(host)
+
+    async def acquire(self, url_or_host) -> float:
+        """Waits until request to host is allowed, returns seconds waited"""
+        host = host_of(url_or_host)
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        waited = 0.0
+        async with lock:
+            while (delay := await self._next_delay(host)) > 0:
+                waited += delay
+                await self._sleep(delay)
+        self.acquired += 1
+        self.waited += waited
+        return waited
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "backend": "local",
+            "rate": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "waited_s": round(self.waited, 3),
+        }
+
+
+# refill and take in one step, redis TIME keeps replicas on one clock.
+# Returns seconds to wait as string (lua numbers are truncated to integers)
+TAKE_TOKEN = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucketLimiter(TokenBucketLimiter):
+    """Token bucket per host kept in redis, so every replica shares one
+    budget. If redis is unavailable the in-process bucket is used for
+    `cooldown` seconds before redis is tried again, so an outage costs one
+    failed round trip (and one warning) per cooldown, not one per token."""
+
+    KEY_PREFIX = "ratelimit:"
+
+    def __init__(
+        self, redis, rate: float = 2.0, burst: int = 10, cooldown: float = 30, **kwargs
+    ):
+        super().__init__(rate=rate, burst=burst, **kwargs)
+        self.redis = redis
+        self.cooldown = cooldown
+        self._script = None
+        self._down_until: Optional[float] = None
+        self.fallbacks = 0
+        self.outages = 0
+
+    async def _take_shared(self, host: str) -> Optional[float]:
+        if self._down_until is not None and self._clock() < self._down_until:
+            return None
+        if self._script is None:
+            self._script = self.redis.register_script(TAKE_TOKEN)
+        try:
+            wait = await self._script(
+                keys=[self.KEY_PREFIX + host], args=[self.rate, self.burst]
+            )
+        except Exception as _ex:
+            if self._down_until is None:
+                self.outages += 1
+                logger.warning(
+                    f"Redis rate limit failed by {_ex}, "
+                    f"using local bucket (retry every {self.cooldown}s)"
+                )
+            self._down_until = self._clock() + self.cooldown
+            self.fallbacks += 1
+            return None
+        if self._down_until is not None:
+            logger.info("Redis rate limit is available again")
+            self._down_until = None
+        return float(wait)
+
+    async def _next_delay(self, host: str) -> float:
+        delay = await self._take_shared(host)
+        return self._take(host) if delay is None else delay
+
+    @property
+    def stats(self) -> dict:
+        return {
+            **super().stats,
+            "backend": "redis",
+            "redis_down": self._down_until is not None,
+            "fallbacks": self.fallbacks,
+            "outages": self.outages,
+        }
+
+
+def limiter_from_config(config, redis=None) -> Optional[TokenBucketLimiter]:
+    """Returns limiter chosen by RATE_LIMIT_BACKEND (local, redis or off)"""
+    backend = config.RATE_LIMIT_BACKEND
+    if backend == "off":
+        return None
+    if backend == "redis":
+        return RedisTokenBucketLimiter(
+            redis,
+            rate=config.RATE_LIMIT_RATE,
+            burst=config.RATE_LIMIT_BURST,
+            cooldown=config.RATE_LIMIT_REDIS_COOLDOWN,
+        )
+    if backend != "local":
+        raise ValueError(f"Unknown rate limit backend {backend!r}")
+    return TokenBucketLimiter(
+        rate=config.RATE_LIMIT_RATE, burst=config.RATE_LIMIT_BURST
+    )
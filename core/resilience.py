@@ -0,0 +1,221 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Optional
+
+import aiohttp
+
+from core.logger import get_logger
+
+logger = get_logger("resilience")
+
+RETRYABLE = frozenset({"timeout", "rate_limited", "server", "connection"})
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling upstream while circuit breaker is open."""
+
+    pass
+
+
+def classify(exc: BaseException) -> str:
+    """Returns error class of upstream failure:
+    timeout, rate_limited (429), server (5xx), client (other 4xx),
+    connection or other"""
+    if isinstance(exc, (asyncio.TimeoutError, aiohttp.ServerTimeoutError)):
+        return "timeout"
+    if isinstance(exc, aiohttp.ClientResponseError):
+        if exc.status == 429:
+            return "rate_limited"
+        if exc.status >= 500:
+            return "server"
+        return "client"
+    if isinstance(exc, (aiohttp.ClientConnectionError, ConnectionError)):
+        return "connection"
+    return "other"
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(exc, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` failed calls in a row.
+    While open calls are refused, every `reset_timeout` seconds one probe
+    is let through (half_open): success closes the breaker, failure opens
+    it again."""
+
+    def __init__(
+        self, failure_threshold: int = 3, reset_timeout: float = 60, clock=None
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock or time.monotonic
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self._opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.retry_in == 0:
+            self.state = "half_open"
+            logger.info("Circuit breaker half open, probing upstream...")
+            return True
+        return False
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until next probe is allowed"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - self._clock())
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("Circuit breaker closed")
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state == "closed":
+                self.trips += 1
+                logger.warning(
+                    f"Circuit breaker opened after {self.failures} failures, "
+                    f"probing every {self.reset_timeout}s"
+                )
+            self.state = "open"
+            self._opened_at = self._clock()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in": round(self.retry_in, 3),
+        }
+
+
+class ResiliencePolicy:
+    """Bounded retries with full-jitter exponential backoff behind a
+    CircuitBreaker. Only RETRYABLE error classes are retried, Retry-After of
+    429 answers is respected. Exceptions listed in `passthrough` (e.g.
+    SnapshotUnchanged) are answers, not failures."""
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10,
+        breaker: Optional[CircuitBreaker] = None,
+        passthrough: tuple = (),
+        sleep=asyncio.sleep,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.passthrough = passthrough
+        self._sleep = sleep
+        self.retries = 0
+        self.errors = {}
+
+    @classmethod
+    def from_config(cls, config, passthrough: tuple = ()) -> "ResiliencePolicy":
+        return cls(
+            attempts=config.FETCH_RETRIES,
+            base_delay=config.FETCH_BACKOFF_BASE,
+            max_delay=config.FETCH_BACKOFF_MAX,
+            breaker=CircuitBreaker(
+                failure_threshold=config.BREAKER_FAILURES,
+                reset_timeout=config.BREAKER_RESET_SECONDS,
+            ),
+            passthrough=passthrough,
+        )
+
+    def backoff(self, attempt: int, exc: BaseException) -> float:
+        """Delay before retry number `attempt` (starting from 1)"""
+        delay = random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    @asynccontextmanager
+    async def guard(self):
+        """Breaker around a block: refused with CircuitOpen while open,
+        block's outcome is recorded once. One cycle of several fetches
+        is guarded as a whole, so a half_open probe is the whole cycle"""
+        if not self.breaker.allow():
+            raise CircuitOpen(
+                f"Upstream circuit is open, retry in {self.breaker.retry_in:.0f}s"
+            )
+        try:
+            yield
+        except self.passthrough:
+            self.breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            # unfinished probe mustn't leave breaker half_open forever
+            if self.breaker.state == "half_open":
+                self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+
+    async def retry(self, func, *args, **kwargs):
+        """Calls func with retries only, breaker isn't consulted"""
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return await func(*args, **kwargs)
+            except self.passthrough:
+                raise
+            except Exception as _ex:
+                kind = classify(_ex)
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+                if kind not in RETRYABLE or attempt == self.attempts:
+                    raise
+                delay = self.backoff(attempt, _ex)
+                logger.warning(
+                    f"Fetch failed ({kind}: {_ex!r}), retry {attempt} in {delay:.2f}s"
+                )
+                self.retries += 1
+                await self._sleep(delay)
+
+    async def call(self, func, *args, **kwargs):
+        async with self.guard():
+            return await self.retry(func, *args, **kwargs)
+
+    def wrap(self, func, guarded: bool = True):
+        """Returns func called through this policy. With guarded=False only
+        retries apply, the caller guards the whole cycle"""
+        call = self.call if guarded else self.retry
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await call(func, *args, **kwargs)
+
+        return wrapper
+
+    @property
+    def stats(self) -> dict:
+        return {
+            **self.breaker.stats,
+            "retries": self.retries,
+            "errors": dict(self.errors),
+        }
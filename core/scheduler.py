@@ -0,0 +1,128 @@
+import math
+import random
+import time
+from collections import deque
+from typing import Optional
+
+from core.logger import get_logger
+
+logger = get_logger("scheduler")
+
+OVERRUN_POLICIES = ("skip", "catch_up", "coalesce")
+
+
+class FixedRateScheduler:
+    """Fixed-rate ticks on the monotonic clock.
+
+    Tick n is due at start + n * period (plus random jitter of that tick
+    only), so run time, work done after a run and wall clock jumps don't
+    shift later ticks. When a run is still busy at one or more due times
+    `overrun` decides what happens with them:
+      skip      - dropped, next run waits for the next tick on the grid
+      catch_up  - run back to back (late) until the schedule is met
+      coalesce  - merged into one immediate run, the grid restarts from it
+    """
+
+    def __init__(
+        self,
+        period: float = 60,
+        jitter: float = 0.0,
+        overrun: str = "skip",
+        clock=None,
+        window: int = 20,
+    ):
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(
+                f"Unknown overrun policy {overrun!r}, expected one of {OVERRUN_POLICIES}"
+            )
+        self.period = period
+        self.jitter = jitter
+        self.overrun = overrun
+        self._clock = clock or time.monotonic
+        self._intervals = deque(maxlen=window)
+        self._start: Optional[float] = None
+        self._tick = 0
+        self._due: Optional[float] = None
+        self._last_run: Optional[float] = None
+        self.runs = 0
+        self.missed = 0
+        self.late = 0
+
+    @classmethod
+    def from_config(cls, config) -> "FixedRateScheduler":
+        return cls(jitter=config.SCHEDULER_JITTER, overrun=config.SCHEDULER_OVERRUN)
+
+    def start(self, period: Optional[float] = None) -> None:
+        """Anchors the grid at now, first tick is due immediately"""
+        if period is not None:
+            self.period = period
+        self._start = self._clock()
+        self._tick = 0
+        self._due = self._start
+        self._last_run = None
+        self._intervals.clear()
+
+    def _grid(self, tick: int) -> float:
+        return self._start + tick * self.period
+
+    def _schedule(self, tick: int) -> None:
+        self._tick = tick
+        self._due = self._grid(tick)
+        if self.jitter:
+            self._due += random.uniform(0, self.jitter)
+
+    def run_started(self) -> None:
+        """Marks start of the run of the current tick"""
+        now = self._clock()
+        if self._last_run is not None:
+            self._intervals.append(now - self._last_run)
+        self._last_run = now
+        self.runs += 1
+
+    def next_delay(self) -> float:
+        """Plans the tick after the finished run, returns seconds to wait"""
+        now = self._clock()
+        tick = self._tick + 1
+        if self._grid(tick) < now:
+            # every tick up to `last` was due while the run was busy
+            last = math.floor((now - self._start) / self.period)
+            overrun = last - tick + 1
+            if self.overrun == "skip":
+                self.missed += overrun
+                tick = last + 1
+            elif self.overrun == "coalesce":
+                self.missed += overrun - 1
+                self.late += 1
+                self._start, tick = now, 0
+            else:
+                self.late += 1
+            logger.warning(
+                f"Run overran {overrun} tick(s) of {self.period}s, {self.overrun}"
+            )
+        self._schedule(tick)
+        return self.time_until_next()
+
+    def time_until_next(self) -> float:
+        if self._due is None:
+            return 0.0
+        return max(0.0, self._due - self._clock())
+
+    @property
+    def actual_period(self) -> Optional[float]:
+        """Mean interval between recent run starts"""
+        if not self._intervals:
+            return None
+        return sum(self._intervals) / len(self._intervals)
+
+    @property
+    def stats(self) -> dict:
+        actual = self.actual_period
+        return {
+            "target_period": self.period,
+            "actual_period": None if actual is None else round(actual, 3),
+            "jitter": self.jitter,
+            "overrun": self.overrun,
+            "runs": self.runs,
+            "missed": self.missed,
+            "late": self.late,
+        }
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from core.logger import get_logger
+
+logger = get_logger("sinks")
+
+
+class LatestMailbox:
+    """Bounded queue whose put never waits: when it's full the oldest
+    item is dropped, so a slow consumer only ever sees fresh items"""
+
+    def __init__(self, maxsize: int = 1):
+        self._queue = asyncio.Queue(maxsize=max(maxsize, 1))
+        self.dropped = 0
+
+    def put(self, item) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    async def put_wait(self, item) -> None:
+        """Waits for a free slot instead of dropping"""
+        await self._queue.put(item)
+
+    async def get(self):
+        return await self._queue.get()
+
+    def task_done(self) -> None:
+        self._queue.task_done()
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+
+class SnapshotSink:
+    """Consumer stage of published snapshots (json file, excel...).
+
+    Once started, submit() only drops the snapshot into the sink's mailbox
+    and returns, handler runs in the sink's own task, so a slow sink never
+    holds back fetching and parsing of the next snapshot; if it falls behind,
+    stale snapshots are dropped. Before start (one-shot force_parse) submit
+    awaits handler directly. Handler errors are logged and counted, they
+    don't stop the sink.
+    With blocking=True handler is a plain function run in the sink's own
+    worker thread (e.g. openpyxl load / save), never on the event loop.
+    With backpressure=True nothing is dropped: submit waits while the
+    mailbox is full, so the producer runs at most maxsize items ahead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler,
+        maxsize: int = 1,
+        blocking=False,
+        backpressure=False,
+    ):
+        self.name = name
+        self.handler = handler
+        self.blocking = blocking
+        self.backpressure = backpressure
+        self._mailbox = LatestMailbox(maxsize)
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[ThreadPoolExecutor] = None
+        self._handling_since: Optional[float] = None
+        self.processed = 0
+        self.errors = 0
+        self.last_duration: Optional[float] = None
+        self.last_lag: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._worker(), name=f"sink_{self.name}")
+
+    async def submit(self, *args) -> None:
+        item = (time.monotonic(), args)
+        if self.running and self.backpressure:
+            await self._mailbox.put_wait(item)
+        elif self.running:
+            self._mailbox.put(item)
+        else:
+            await self._handle(item)
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._mailbox.get()
+            try:
+                await self._handle(item)
+            finally:
+                self._mailbox.task_done()
+
+    async def _call(self, args) -> None:
+        if not self.blocking:
+            await self.handler(*args)
+            return
+        if self._thread is None:
+            self._thread = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"sink_{self.name}"
+            )
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._thread, partial(self.handler, *args))
+
+    async def _handle(self, item) -> None:
+        submitted, args = item
+        self._handling_since = submitted
+        start = time.monotonic()
+        try:
+            await self._call(args)
+        except Exception as _ex:
+            self.errors += 1
+            logger.error(f"{self.name} sink failed by {_ex!r}")
+        else:
+            self.processed += 1
+        finally:
+            self._handling_since = None
+        now = time.monotonic()
+        self.last_duration = now - start
+        self.last_lag = now - submitted
+
+    @property
+    def lag(self) -> float:
+        """Seconds the sink is behind: age of snapshot being handled now.
+        Queued snapshots are newer, idle sink has no lag"""
+        if self._handling_since is None:
+            return 0.0
+        return time.monotonic() - self._handling_since
+
+    async def drain(self) -> None:
+        """Waits until every submitted snapshot is handled or dropped"""
+        if self.running:
+            await self._mailbox.join()
+
+    async def close(self, drain: bool = False) -> None:
+        """Stops the worker. A blocking handler already running in the
+        thread is waited for, so files aren't left half written"""
+        if self._task is not None:
+            if drain:
+                await self.drain()
+            task, self._task = self._task, None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._thread is not None:
+            thread, self._thread = self._thread, None
+            await asyncio.to_thread(thread.shutdown, wait=True, cancel_futures=True)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": len(self._mailbox),
+            "processed": self.processed,
+            "dropped": self._mailbox.dropped,
+            "errors": self.errors,
+            "last_ms": _ms(self.last_duration),
+            "lag_s": round(self.lag, 3),
+            "last_lag_ms": _ms(self.last_lag),
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
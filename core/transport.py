@@ -0,0 +1,146 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import aiohttp
+from yarl import URL
+
+from core.logger import get_logger
+
+logger = get_logger("transport")
+
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+
+@asynccontextmanager
+async def limited_request(
+    session, method, url, limiter=None, max_redirects=10, **kwargs
+):
+    """Sends request over session like session.get() / head(), with limiter
+    (core.rate_limit) a token of the host is taken before every hop.
+    Tokens are awaited before aiohttp starts the request timeout, so waiting
+    for capacity doesn't count against HTTP_TIMEOUT. Redirects are followed
+    here, one hop per request, by the same rules as aiohttp (HEAD isn't
+    redirected unless allow_redirects is set)"""
+    allow_redirects = kwargs.pop("allow_redirects", method.upper() != "HEAD")
+    if limiter is None:
+        send = getattr(session, method.lower())
+        async with send(url, allow_redirects=allow_redirects, **kwargs) as resp:
+            yield resp
+        return
+
+    url = URL(url)
+    for _ in range(max_redirects + 1):
+        await limiter.acquire(url.host)
+        send = getattr(session, method.lower())
+        async with send(url, allow_redirects=False, **kwargs) as resp:
+            location = None
+            if allow_redirects and resp.status in REDIRECT_STATUSES:
+                location = resp.headers.get("Location")
+            if not location:
+                yield resp
+                return
+            url = resp.url.join(URL(location))
+            # query of the first request is already part of the redirect
+            kwargs.pop("params", None)
+            if resp.status == 303 and method.upper() != "HEAD":
+                method = "GET"
+    raise aiohttp.TooManyRedirects(
+        resp.request_info, (), status=resp.status, message=f"{max_redirects} redirects"
+    )
+
+
+class HttpTransport:
+    """Pooled aiohttp session shared by every fetcher of the service.
+
+    Connections are kept alive between scheduler ticks, so DNS, TCP and TLS
+    setup is paid only when the pool has no idle connection. Reuse is tracked
+    with aiohttp tracing and reported by `stats`.
+    The session itself isn't rate limited, fetchers send through
+    limited_request with the service's limiter (core.rate_limit).
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        total_timeout: float = 30,
+        connect_timeout: float = 10,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, connect=connect_timeout
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+
+    @classmethod
+    def from_config(cls, config) -> "HttpTransport":
+        return cls(
+            limit=config.HTTP_POOL_LIMIT,
+            limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+            dns_cache_ttl=config.HTTP_DNS_CACHE_TTL,
+            total_timeout=config.HTTP_TIMEOUT,
+            connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+        )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.new_connections += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.reused_connections += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Returns shared session, creates it on first use or after close"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                trace_configs=[self._trace_config()],
+            )
+            logger.info(
+                f"HTTP pool opened (limit {self.limit}, per host {self.limit_per_host})"
+            )
+        return self._session
+
+    @property
+    def stats(self) -> dict:
+        connections = self.new_connections + self.reused_connections
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_ratio": (
+                round(self.reused_connections / connections, 3) if connections else 0.0
+            ),
+        }
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
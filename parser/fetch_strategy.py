@@ -0,0 +1,183 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Optional
+
+from core.logger import get_logger
+from parser.parser_site import (
+    SnapshotUnchanged,
+    fetch_listing_page,
+    fetch_rendered_page,
+)
+
+logger = get_logger("fetch_strategy")
+
+MODES = ("aiohttp", "playwright", "hedged", "race")
+
+
+class LatencyTracker:
+    """Sliding window of successful fetch latencies (seconds)"""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile, q in (0, 1]"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+    def as_dict(self) -> dict:
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            "samples": len(self._samples),
+            "p50_ms": ms(self.percentile(0.5)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+        }
+
+
+class FetchStrategy:
+    """Chooses how the listing page is fetched.
+
+    aiohttp / playwright use one fetcher only. hedged starts aiohttp and fires
+    playwright too if aiohttp hasn't answered within its observed p95 (or
+    hedge_delay until min_samples latencies are known) or has failed.
+    race starts both at once. First good answer wins and the other fetch is
+    cancelled; 304 Not Modified (SnapshotUnchanged) counts as an answer.
+    `fetch` has fetch_listing_page signature, so it can be passed to the
+    pipeline as fetcher.
+    """
+
+    def __init__(
+        self,
+        mode: str = "aiohttp",
+        pool=None,
+        hedge_delay: float = 2.0,
+        window: int = 100,
+        min_samples: int = 5,
+        rate_limiter=None,
+    ):
+        if mode not in MODES:
+            raise ValueError(
+                f"Unknown fetch strategy {mode!r}, expected one of {MODES}"
+            )
+        if mode != "aiohttp" and pool is None:
+            raise ValueError(f"Fetch strategy {mode!r} needs a browser pool")
+        self.mode = mode
+        self.pool = pool
+        self.rate_limiter = rate_limiter
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.latency = {
+            "aiohttp": LatencyTracker(window),
+            "playwright": LatencyTracker(window),
+        }
+        self.wins = {"aiohttp": 0, "playwright": 0}
+        self.hedges = 0
+        self.cancelled = 0
+
+    @classmethod
+    def from_config(cls, config, pool=None, rate_limiter=None) -> "FetchStrategy":
+        return cls(
+            mode=config.FETCH_STRATEGY,
+            pool=pool,
+            hedge_delay=config.FETCH_HEDGE_DELAY,
+            rate_limiter=rate_limiter,
+        )
+
+    def current_hedge_delay(self) -> float:
+        """Observed aiohttp p95 or configured delay while samples are few"""
+        tracker = self.latency["aiohttp"]
+        if len(tracker) < self.min_samples:
+            return self.hedge_delay
+        return tracker.percentile(0.95)
+
+    async def _timed(self, name, session, url, validators):
+        start = time.perf_counter()
+        if name == "aiohttp":
+            html = await fetch_listing_page(
+                session, url=url, validators=validators, limiter=self.rate_limiter
+            )
+        else:
+            html = await fetch_rendered_page(self.pool, url=url)
+        self.latency[name].add(time.perf_counter() - start)
+        return html
+
+    async def fetch(self, session=None, url=None, validators=None):
+        """Returns listing body fetched according to mode"""
+        kwargs = {"session": session, "url": url, "validators": validators}
+        if self.mode in ("aiohttp", "playwright"):
+            html = await self._timed(self.mode, **kwargs)
+            self.wins[self.mode] += 1
+            return html
+        hedge_delay = self.current_hedge_delay() if self.mode == "hedged" else 0
+        return await self._first_good(hedge_delay, **kwargs)
+
+    async def _first_good(self, hedge_delay, **kwargs):
+        tasks = {
+            asyncio.create_task(self._timed("aiohttp", **kwargs)): "aiohttp",
+        }
+
+        def start_playwright():
+            tasks[asyncio.create_task(self._timed("playwright", **kwargs))] = (
+                "playwright"
+            )
+
+        try:
+            if hedge_delay <= 0:
+                start_playwright()
+            else:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done or _failed(next(iter(done))):
+                    logger.info(f"Hedging with playwright after {hedge_delay:.3f}s")
+                    self.hedges += 1
+                    start_playwright()
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if _failed(task):
+                        error = task.exception()
+                        logger.warning(f"{tasks[task]} fetch failed by {error!r}")
+                        continue
+                    self.wins[tasks[task]] += 1
+                    return task.result()
+            raise error
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            self.cancelled += len(losers)
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "hedge_delay_ms": round(self.current_hedge_delay() * 1000, 1),
+            "wins": self.wins,
+            "hedges": self.hedges,
+            "cancelled": self.cancelled,
+            "latency": {name: t.as_dict() for name, t in self.latency.items()},
+        }
+
+
+def _failed(task: asyncio.Task) -> bool:
+    """Task raised something else than SnapshotUnchanged"""
+    exc = task.exception()
+    return exc is not None and not isinstance(exc, SnapshotUnchanged)
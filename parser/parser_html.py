@@ -1,11 +1,22 @@
+import codecs
+import hashlib
 import json
 import os
 from selectolax.parser import HTMLParser
 from config.settings import config
 from core.logger import get_logger
+from parser.snapshot import CoinQuote
 
 logger = get_logger("parser_html")
 
+ICON_URL = "https://s2.coinmarketcap.com/static/img/coins/64x64/{id}.png"
+
+
+class NextDataError(Exception):
+    """Raised when __NEXT_DATA__ is missing or its schema is unexpected."""
+
+    pass
+
 
 def get_price_in_value(elem, value=None):
     """Returns data from elem tr in following pattern:
@@ -55,44 +66,255 @@ def find_elem_by_ticker(json_data_all, ticker):
             return elem
 
 
+def index_listing(json_data_all):
+    """Builds lookup indexes over cryptoCurrencyList in one pass.
+    Returns (by_symbol, by_id):
+    by_symbol maps ticker to list of records sharing it (in listing order),
+    by_id maps coin id to its record"""
+    by_symbol = {}
+    by_id = {}
+    for elem in json_data_all:
+        by_symbol.setdefault(elem["symbol"], []).append(elem)
+        by_id[elem["id"]] = elem
+    return by_symbol, by_id
+
+
+def coin_id_from_icon(src):
+    """Returns coin id from logo url like .../64x64/1027.png or None"""
+    if not src:
+        return None
+    stem = src.rsplit("/", 1)[-1].split(".", 1)[0]
+    return int(stem) if stem.isdigit() else None
+
+
+def find_elem_in_index(by_symbol, ticker, name=None):
+    """Returns record for ticker from index_listing result.
+    Colliding tickers are resolved by name, otherwise the first
+    (highest ranked) record wins"""
+    candidates = by_symbol.get(ticker)
+    if not candidates:
+        return None
+    if name is not None and len(candidates) > 1:
+        for elem in candidates:
+            if elem["name"] == name:
+                return elem
+    return candidates[0]
+
+
+def get_listing_from_next_data(next_data):
+    """Returns cryptoCurrencyList from decoded __NEXT_DATA__"""
+    return next_data["props"]["dehydratedState"]["queries"][2]["state"]["data"]["data"][
+        "listing"
+    ]["cryptoCurrencyList"]
+
+
+def next_data_bounds(html):
+    """Returns (start, end) of __NEXT_DATA__ json in raw html (str or bytes)
+    found by scanning without building DOM, or None if script wasn't found"""
+    if isinstance(html, str):
+        marker, tag_end, script_end = 'id="__NEXT_DATA__"', ">", "</script>"
+    else:
+        marker, tag_end, script_end = b'id="__NEXT_DATA__"', b">", b"</script>"
+
+    start = html.find(marker)
+    if start == -1:
+        return None
+    start = html.find(tag_end, start) + 1
+    end = html.find(script_end, start)
+    if start == 0 or end == -1:
+        return None
+
+    return start, end
+
+
+def extract_next_data(html):
+    """Decodes __NEXT_DATA__ script from raw html (str, bytes or bytearray).
+    Returns None if script wasn't found.
+    Binary buffers are decoded through a memoryview, so the blob isn't
+    copied once more as bytes before json sees it"""
+    bounds = next_data_bounds(html)
+    if bounds is None:
+        return None
+    start, end = bounds
+    if isinstance(html, str):
+        return json.loads(html[start:end])
+    return json.loads(codecs.decode(memoryview(html)[start:end], "utf-8"))
+
+
+def content_hash(html) -> str:
+    """Hash of __NEXT_DATA__ payload (or of the whole page if it's missing).
+    Markup around the blob can change (nonces, ads) while data stays the same"""
+    if isinstance(html, str):
+        html = html.encode()
+    bounds = next_data_bounds(html)
+    payload = memoryview(html)
+    if bounds is not None:
+        payload = payload[bounds[0] : bounds[1]]
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def load_icons(icons_path=config.ICONS):
+    """Returns icons saved by force_update_icons or empty dict"""
+    if not os.path.exists(icons_path):
+        return {}
+    with open(icons_path) as f:
+        return json.load(f)
+
+
+def get_values_from_next_data(
+    html, parse_icons_from_file=False, icons_path=config.ICONS
+):
+    """Builds same {ticker: CoinQuote} as get_values_from_html_to_dict only from __NEXT_DATA__.
+    Unranked entries (e.g. index DTFs) aren't shown in table, so they are skipped.
+    Raises NextDataError if blob is missing or its schema changed"""
+    try:
+        next_data = extract_next_data(html)
+        if next_data is None:
+            raise NextDataError("__NEXT_DATA__ script not found")
+        json_data = get_listing_from_next_data(next_data)
+        ranked = [elem for elem in json_data if elem.get("cmcRank") is not None]
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as _ex:
+        raise NextDataError(f"Unexpected __NEXT_DATA__ schema: {_ex!r}") from _ex
+
+    if not ranked:
+        raise NextDataError("No ranked coins in __NEXT_DATA__")
+
+    icons = load_icons(icons_path) if parse_icons_from_file else {}
+
+    logger.info(f"Found {len(ranked)} coins in __NEXT_DATA__...")
+
+    out = {}
+    try:
+        for i, elem in enumerate(ranked):
+            ticker = elem["symbol"]
+            if ticker in out:
+                logger.warning(f"Duplicate ticker {ticker} ({elem['name']}) skipped")
+                continue
+
+            data = get_price_in_value(elem)
+            out[ticker] = CoinQuote(
+                ticker=ticker,
+                price=data["price"],
+                name=elem["name"],
+                icon=icons.get(ticker) or ICON_URL.format(id=elem["id"]),
+                id=i,
+                change_1hr=data["percentChange1h"] / 100,
+                change_24hr=data["percentChange24h"] / 100,
+                volume_24hr=data["volume24h"],
+            )
+    except (KeyError, IndexError, TypeError) as _ex:
+        raise NextDataError(f"Unexpected __NEXT_DATA__ schema: {_ex!r}") from _ex
+
+    return out
+
+
+def read_html(filepath=config.HTML_PATH, html=None):
+    """Returns html passed in memory (str, bytes or bytearray) or reads it from filepath"""
+    if html is not None:
+        return html
+    with open(filepath) as f:
+        return f.read()
+
+
+def build_tree(html) -> HTMLParser:
+    """Builds DOM, selectolax doesn't accept bytearray from streaming reads"""
+    if isinstance(html, (bytearray, memoryview)):
+        html = bytes(html)
+    return HTMLParser(html)
+
+
 def get_values_from_html_to_dict(
     filepath=config.HTML_PATH,
     parse_icons_from_file=False,
     icons_path=config.ICONS,
     skipping_json_expanded_data=False,
+    html=None,
+    json_only=False,
 ):
-    with open(filepath) as f:
-        html = f.read()
+    """Parses listing page to {ticker: CoinQuote}.
+    With json_only everything is taken from __NEXT_DATA__ without building DOM,
+    table rows alone are parsed only if the blob is missing or its schema changed"""
+    html = read_html(filepath, html)
 
-    tree = HTMLParser(html)
+    if json_only and not skipping_json_expanded_data:
+        try:
+            return get_values_from_next_data(
+                html, parse_icons_from_file=parse_icons_from_file, icons_path=icons_path
+            )
+        except NextDataError as _ex:
+            logger.warning(f"JSON only parsing failed, parsing table: {_ex}")
+            skipping_json_expanded_data = True
+
+    quotes, _ = extract_quotes_and_icons(
+        html=html,
+        parse_icons_from_file=parse_icons_from_file,
+        icons_path=icons_path,
+        skipping_json_expanded_data=skipping_json_expanded_data,
+    )
+    return quotes
+
+
+def get_name_and_ticker(tr):
+    """Returns (name, ticker) from table row with span or p layout"""
+    try:
+        name = f"{tr.css('td')[2].css("span")[1].text()}"
+        ticker = f"{tr.css('td')[2].css("span")[2].text()}"
+    except IndexError:
+        name = f"{tr.css('td')[2].css("p")[0].text()}"
+        ticker = f"{tr.css('td')[2].css("p")[1].text()}"
+    return name, ticker
+
+
+def extract_quotes_and_icons(
+    filepath=config.HTML_PATH,
+    parse_icons_from_file=False,
+    icons_path=config.ICONS,
+    skipping_json_expanded_data=False,
+    html=None,
+):
+    """Single pass over table rows. Returns (quotes, page_icons):
+    quotes is the same dict as get_values_from_html_to_dict returns,
+    page_icons maps ticker to img.coin-logo src like parse_icons"""
+    html = read_html(filepath, html)
+
+    tree = build_tree(html)
     trs = tree.css("tr")[2::]
 
+    json_data = False
     if not skipping_json_expanded_data:
-        json_data = json.loads(tree.css_first("script#__NEXT_DATA__").text())["props"][
-            "dehydratedState"
-        ]["queries"][2]["state"]["data"]["data"]["listing"]["cryptoCurrencyList"]
-    else:
-        json_data = False
+        script = tree.css_first("script#__NEXT_DATA__")
+        if script is None:
+            logger.warning("__NEXT_DATA__ not found, parsing table only")
+        else:
+            json_data = get_listing_from_next_data(json.loads(script.text()))
+            by_symbol, by_id = index_listing(json_data)
 
     out = {}
+    page_icons = {}
 
     logger.info(f"Found {len(trs)} tr's...")
 
-    if parse_icons_from_file and os.path.exists(icons_path):
-        with open(icons_path) as f:
-            icons = json.load(f)
+    icons = load_icons(icons_path) if parse_icons_from_file else {}
 
     counter_lost = 0
 
     for i, tr in enumerate(trs):
-        try:
-            name = f"{tr.css('td')[2].css("span")[1].text()}"
-            ticker = f"{tr.css('td')[2].css("span")[2].text()}"
-        except IndexError:
-            name = f"{tr.css('td')[2].css("p")[0].text()}"
-            ticker = f"{tr.css('td')[2].css("p")[1].text()}"
+        name, ticker = get_name_and_ticker(tr)
+        if ticker in out:
+            logger.warning(f"Duplicate ticker {ticker} ({name}) skipped")
+            continue
+
+        logo = tr.css_first("img.coin-logo")
+        if logo is not None:
+            page_icons[ticker] = logo.attributes.get("src")
+
         if json_data:
-            data = get_price_in_value(find_elem_by_ticker(json_data, ticker))
+            # loaded logo carries coin id, it's exact even for renamed or
+            # colliding tickers; lazy rows are looked up by symbol
+            record = by_id.get(coin_id_from_icon(page_icons.get(ticker)))
+            if record is None:
+                record = find_elem_in_index(by_symbol, ticker, name)
+            data = get_price_in_value(record)
             price = data["price"]
             change_1hr = data["percentChange1h"] / 100
             change_24hr = data["percentChange24h"] / 100
@@ -113,44 +335,34 @@ def get_values_from_html_to_dict(
                 change_1hr = 0
 
         if parse_icons_from_file:
-            try:
-                icon = icons[ticker]
-            except:
-                icon = ""
-
+            icon = icons.get(ticker, "")
         else:
-            try:
-                icon = tr.css("img.coin-logo")[0].attributes.get("src")
-            except:
-                icon = ""
+            icon = page_icons.get(ticker) or ""
 
         if not icon and json_data:
-            data_full = find_elem_by_ticker(json_data, ticker)
-            id = data_full["id"]
-            icon = f"https://s2.coinmarketcap.com/static/img/coins/64x64/{id}.png"
-
-        out[ticker] = {
-            "ticker": ticker,
-            "price": price,
-            "name": name,
-            "icon": icon,
-            "id": i,
-            "change_1hr": change_1hr,
-            "change_24hr": change_24hr,
-            "volume_24hr": volume_24hr,
-        }
+            icon = ICON_URL.format(id=record["id"])
+
+        out[ticker] = CoinQuote(
+            ticker=ticker,
+            price=price,
+            name=name,
+            icon=icon,
+            id=i,
+            change_1hr=change_1hr,
+            change_24hr=change_24hr,
+            volume_24hr=volume_24hr,
+        )
 
     if counter_lost > 0:
         logger.info(f"change_1hr was lost {counter_lost}")
 
-    return out
+    return out, page_icons
 
 
-def parse_icons(filepath=config.HTML_PATH):
-    with open(filepath) as f:
-        html = f.read()
+def parse_icons(filepath=config.HTML_PATH, html=None):
+    html = read_html(filepath, html)
 
-    tree = HTMLParser(html)
+    tree = build_tree(html)
     trs = tree.css("tr")[2::]
 
     out = {}
@@ -158,10 +370,7 @@ def parse_icons(filepath=config.HTML_PATH):
     logger.info(f"Found {len(trs)} tr's...")
 
     for tr in trs:
-        try:
-            ticker = f"{tr.css('td')[2].css("span")[2].text()}"
-        except IndexError:
-            ticker = f"{tr.css('td')[2].css("p")[1].text()}"
+        _, ticker = get_name_and_ticker(tr)
         try:
             icon = tr.css("img.coin-logo")[0].attributes.get("src")
             out[ticker] = icon
@@ -171,10 +380,16 @@ def parse_icons(filepath=config.HTML_PATH):
     return out
 
 
+def _to_json(obj):
+    if isinstance(obj, CoinQuote):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 def save_values_to_json(data, filepath=config.JSON_PATH):
     logger.info("opening json file...")
     with open(filepath, "w") as f:
-        json.dump(data, f)
+        json.dump(data, f, default=_to_json)
     logger.info("closing json file...")
 
 
@@ -183,6 +398,11 @@ def lost_icons_count(filepath=config.JSON_PATH):
     with open(filepath) as f:
         data = json.load(f)
     logger.info("closing json file...")
+    return lost_icons_in(data)
+
+
+def lost_icons_in(data):
+    """Counts rows with empty icon in parsed snapshot (dicts or CoinQuotes)"""
     count = 0
     for item in data.values():
         if not item["icon"]:
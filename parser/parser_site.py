@@ -4,49 +4,238 @@ import aiohttp
 from config.settings import config
 from playwright.async_api import async_playwright
 from core.logger import get_logger
+from core.transport import limited_request
 
 logger = get_logger("parser_site")
 
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:
+    HAS_BROTLI = False
+
+LISTING_URL = "https://coinmarketcap.com/coins/"
+# br is offered only when Brotli (or brotlicffi) is installed for aiohttp
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": ACCEPT_ENCODING}
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class SnapshotUnchanged(Exception):
+    """Raised when fetched listing didn't change since previous cycle."""
+
+    pass
+
+
+class HttpValidators:
+    """Remembers ETag / Last-Modified of every fetched url
+    to send them back as If-None-Match / If-Modified-Since"""
+
+    def __init__(self):
+        self._by_url = {}
+
+    def headers_for(self, url) -> dict:
+        etag, last_modified = self._by_url.get(url, (None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def update(self, url, headers) -> None:
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified:
+            self._by_url[url] = (etag, last_modified)
+        else:
+            self._by_url.pop(url, None)
+
+    def clear(self) -> None:
+        self._by_url.clear()
+
+
+def listing_page_url(page: int = 1, base_url=LISTING_URL) -> str:
+    """Returns url of listing page number `page` (starting from 1)"""
+    return base_url if page == 1 else f"{base_url}?page={page}"
+
+
+async def read_body(resp, chunk_size=READ_CHUNK_SIZE) -> bytearray:
+    """Streams decompressed response body into one growing buffer.
+    resp.read() keeps a list of chunks and joins them, so two full copies
+    exist at the end; here only the buffer and one chunk are alive"""
+    body = bytearray()
+    async for chunk in resp.content.iter_chunked(chunk_size):
+        body += chunk
+    return body
+
+
+async def fetch_listing_page(
+    session=None, url=LISTING_URL, validators=None, limiter=None
+) -> bytearray:
+    """Returns raw (decompressed) body of listing page without touching disk.
+    gzip/brotli is negotiated and body is read in chunks (see read_body).
+    With validators (HttpValidators) request is conditional and
+    SnapshotUnchanged is raised if server answers 304 Not Modified.
+    With limiter (core.rate_limit) every hop takes a token of its host.
+    Error statuses raise aiohttp.ClientResponseError"""
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await fetch_listing_page(session, url, validators, limiter)
+
+    headers = dict(HEADERS)
+    if validators is not None:
+        headers.update(validators.headers_for(url))
+
+    async with limited_request(
+        session, "GET", url, limiter=limiter, headers=headers
+    ) as resp:
+        logger.info(f"Status:{resp.status}")
+        if resp.status == 304:
+            raise SnapshotUnchanged(f"{url} not modified")
+        resp.raise_for_status()
+        html = await read_body(resp)
+        if validators is not None and resp.status == 200:
+            validators.update(url, resp.headers)
+        return html
+
+
+async def validate_icons(session, icons: dict, concurrency=8, limiter=None) -> set:
+    """Sends HEAD for every icon url, at most `concurrency` at once,
+    within limiter (core.rate_limit) budget if it's given.
+    Returns tickers whose icon isn't available"""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def check(ticker, url):
+        async with slots:
+            try:
+                async with limited_request(
+                    session, "HEAD", url, limiter=limiter, headers=HEADERS
+                ) as resp:
+                    return ticker, resp.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError) as _ex:
+                logger.debug(f"HEAD {url} failed by {_ex!r}")
+                return ticker, False
+
+    results = await asyncio.gather(*(check(t, url) for t, url in icons.items()))
+    invalid = {ticker for ticker, ok in results if not ok}
+    logger.info(f"Validated {len(icons)} icons, {len(invalid)} unavailable")
+    return invalid
+
+
+async def save_html(html, filepath=config.HTML_PATH):
+    """Writes html (str or binary buffer) to filepath"""
+    mode = "w" if isinstance(html, str) else "wb"
+    async with aiofiles.open(filepath, mode) as f:
+        await f.write(html)
+    logger.info("Ending writing html_file")
 
-async def get_html_for_top_100(filepath=config.HTML_PATH):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            "https://coinmarketcap.com/coins/",
-            headers={"User-Agent": "Mozilla/5.0"},
-        ) as resp:
-            logger.info(f"Status:{resp.status}")
-            html = await resp.text()
-            async with aiofiles.open(filepath, "w") as f:
-                await f.write(html)
-            logger.info("Ending writing html_file")
-
-
-async def get_html_by_playwright(filepath=config.HTML_PATH):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-
-        resp = await page.goto(
-            "https://coinmarketcap.com/coins/", wait_until="domcontentloaded"
-        )
-
-        scroll_height = await page.evaluate("document.body.scrollHeight")
-        step = scroll_height / 8
 
-        for i in range(1, 9):
-            target_scroll = step * i
-            await page.evaluate(f"window.scrollTo(0, {target_scroll})")
-            await asyncio.sleep(0.5)
+async def get_html_for_top_100(filepath=config.HTML_PATH):
+    html = await fetch_listing_page()
+    await save_html(html, filepath)
+    return html
 
-        html = await page.content()
 
+async def fetch_rendered_page(pool, url=LISTING_URL) -> str:
+    """Returns listing html from a page of pool (core.browser.BrowserPool)
+    as soon as DOM is ready, icons aren't waited for"""
+    async with pool.page() as page:
+        resp = await page.goto(url, wait_until="domcontentloaded")
         logger.info(f"Status:{resp.status}")
-
-        await browser.close()
-
-    async with aiofiles.open(filepath, "w") as f:
-        await f.write(html)
-        logger.info("Ending writing html_file")
+        return await page.content()
+
+
+# scrolls one screen down and returns [rows, rows with loaded logo, at bottom]
+SCROLL_AND_COUNT_ICONS = """() => {
+    window.scrollBy(0, window.innerHeight);
+    const rows = document.querySelectorAll("table tbody tr").length;
+    const loaded = document.querySelectorAll(
+        "table tbody tr img.coin-logo[src^='http']"
+    ).length;
+    const bottom =
+        window.innerHeight + window.scrollY >= document.body.scrollHeight - 2;
+    return [rows, loaded, bottom];
+}"""
+
+
+async def wait_for_icons(page, deadline=10.0, poll_interval=0.1, stable_polls=5):
+    """Scrolls listing until every row has a loaded logo, the count stops
+    growing for stable_polls polls at the bottom of the page, or deadline
+    (seconds) is over. Returns {"rows", "loaded", "missing", "elapsed", "reason"}"""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    best, stalled = -1, 0
+
+    while True:
+        rows, loaded, bottom = await page.evaluate(SCROLL_AND_COUNT_ICONS)
+        if rows and loaded >= rows:
+            reason = "complete"
+            break
+        if loaded > best:
+            best, stalled = loaded, 0
+        elif bottom:
+            stalled += 1
+        if stalled >= stable_polls:
+            reason = "stalled"
+            break
+        if loop.time() - start >= deadline:
+            reason = "deadline"
+            break
+        await asyncio.sleep(poll_interval)
+
+    result = {
+        "rows": rows,
+        "loaded": loaded,
+        "missing": max(rows - loaded, 0),
+        "elapsed": round(loop.time() - start, 3),
+        "reason": reason,
+    }
+    if result["missing"]:
+        logger.warning(f"{result['missing']} of {rows} icons still missing ({reason})")
+    return result
+
+
+async def render_listing(page, url=LISTING_URL, readiness=None, **wait_kwargs) -> str:
+    """Opens listing in playwright page, scrolls it until icons are loaded
+    (see wait_for_icons) and returns rendered html.
+    If readiness dict is given it's filled with wait_for_icons result"""
+    resp = await page.goto(url, wait_until="domcontentloaded")
+
+    result = await wait_for_icons(page, **wait_kwargs)
+    if readiness is not None:
+        readiness.update(result)
+
+    html = await page.content()
+
+    logger.info(f"Status:{resp.status}")
+    return html
+
+
+async def get_html_by_playwright(
+    filepath=config.HTML_PATH, pool=None, readiness=None, url=LISTING_URL, **wait_kwargs
+):
+    """Returns rendered listing html, saves it to filepath if it's not None.
+    With pool (core.browser.BrowserPool) a page of the warm browser is used,
+    otherwise chromium is launched just for this call.
+    readiness and wait_kwargs are passed to render_listing"""
+    if pool is not None:
+        async with pool.page() as page:
+            html = await render_listing(
+                page, url=url, readiness=readiness, **wait_kwargs
+            )
+    else:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch()
+            page = await browser.new_page()
+            html = await render_listing(
+                page, url=url, readiness=readiness, **wait_kwargs
+            )
+            await browser.close()
+
+    if filepath is not None:
+        await save_html(html, filepath)
+
+    return html
 
 
 async def test():
@@ -0,0 +1,294 @@
+import asyncio
+from dataclasses import replace
+
+import aiohttp
+
+from parser.parser_html import content_hash, get_values_from_html_to_dict
+from parser.parser_site import (
+    LISTING_URL,
+    HttpValidators,
+    SnapshotUnchanged,
+    fetch_listing_page,
+    listing_page_url,
+    save_html,
+)
+from core.logger import get_logger
+
+logger = get_logger("pipeline")
+
+# keeps strong references so pending sink tasks aren't garbage collected
+_background_tasks = set()
+
+
+class ContentHashCache:
+    """Remembers content hash and parse result of every listing page,
+    so unchanged pages are neither parsed nor persisted again.
+    HTTP validators live here too: a 304 answer is only usable while
+    the parse result of the page is still cached"""
+
+    def __init__(self):
+        self._pages = {}
+        self.validators = HttpValidators()
+
+    def lookup(self, page, digest):
+        """Returns cached parse result if page content is the same or None"""
+        entry = self._pages.get(page)
+        if entry is not None and entry[0] == digest:
+            return entry[1]
+        return None
+
+    def last(self, page):
+        """Returns last parse result of page or None"""
+        entry = self._pages.get(page)
+        return entry[1] if entry is not None else None
+
+    def store(self, page, digest, parsed):
+        self._pages[page] = (digest, parsed)
+
+    def clear(self):
+        self._pages.clear()
+        self.validators.clear()
+
+
+def _on_sink_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Saving html failed by {task.exception()}")
+
+
+def persist_html_in_background(html, filepath) -> asyncio.Task:
+    """Side sink: schedules writing raw html to disk without awaiting it"""
+    task = asyncio.create_task(save_html(html, filepath))
+    _background_tasks.add(task)
+    task.add_done_callback(_on_sink_done)
+    return task
+
+
+async def fetch_and_parse(
+    session=None,
+    html_path=None,
+    executor=None,
+    cache=None,
+    base_url=LISTING_URL,
+    fetcher=None,
+    **parse_kwargs,
+) -> dict:
+    """Fetches listing page and parses response body in memory.
+    If html_path is set raw html is also persisted there in background.
+    If executor (core.executor.ParseExecutor) is set parsing runs in its pool.
+    If cache (ContentHashCache) is set request is conditional and if server
+    answers 304 or page content didn't change SnapshotUnchanged is raised
+    instead of parsing.
+    fetcher (e.g. FetchStrategy.fetch) replaces fetch_listing_page.
+    parse_kwargs are passed to get_values_from_html_to_dict"""
+    html = await _fetch_page(session, 1, cache, base_url, fetcher)
+    data, changed = await _parse_page(1, html, cache, html_path, executor, parse_kwargs)
+    if not changed:
+        raise SnapshotUnchanged("Listing page didn't change")
+    return data
+
+
+async def _fetch_page(session, page, cache, base_url=LISTING_URL, fetcher=None):
+    """Returns html of page or None if server answered 304
+    and cached parse result can be reused"""
+    fetch = fetcher or fetch_listing_page
+    url = listing_page_url(page, base_url)
+    if cache is None:
+        return await fetch(session, url=url)
+    try:
+        return await fetch(session, url=url, validators=cache.validators)
+    except SnapshotUnchanged:
+        if cache.last(page) is not None:
+            return None
+        logger.warning(f"Got 304 for page {page} without cached result, refetching")
+        return await fetch(session, url=url)
+
+
+async def _parse_page(page, html, cache, html_path, executor, parse_kwargs):
+    """Returns (parsed page, changed). html None means 304 Not Modified"""
+    if html is None:
+        return cache.last(page), False
+
+    digest = None
+    if cache is not None:
+        digest = content_hash(html)
+        cached = cache.lookup(page, digest)
+        if cached is not None:
+            return cached, False
+
+    if html_path is not None:
+        persist_html_in_background(html, html_path)
+    data = await _parse(html, executor, **parse_kwargs)
+
+    if cache is not None:
+        cache.store(page, digest, data)
+    return data, True
+
+
+async def _parse(html, executor=None, **parse_kwargs) -> dict:
+    if executor is not None:
+        return await executor.run(
+            get_values_from_html_to_dict, html=html, **parse_kwargs
+        )
+    return get_values_from_html_to_dict(html=html, **parse_kwargs)
+
+
+def merge_pages(pages: dict) -> dict:
+    """Merges {page_number: parsed page} into one snapshot keyed by ticker.
+    Pages are merged in order and "id" is rewritten to global rank, a ticker
+    met on several pages (coins move between pages while fetching) keeps the
+    first place"""
+    out = {}
+    for page in sorted(pages):
+        for ticker, row in pages[page].items():
+            if ticker in out:
+                continue
+            out[ticker] = replace(row, id=len(out))
+    return out
+
+
+async def fetch_and_parse_pages(
+    pages,
+    session=None,
+    concurrency=4,
+    html_path=None,
+    executor=None,
+    cache=None,
+    base_url=LISTING_URL,
+    fetcher=None,
+    **parse_kwargs,
+) -> dict:
+    """Fetches listing pages 1..pages concurrently over one session,
+    at most `concurrency` requests at once. Every page is parsed as soon as it
+    arrives, results are merged by merge_pages.
+    html_path (if set) receives raw html of the first page only.
+    With cache unchanged (or 304 Not Modified) pages reuse previous parse
+    result and if no page changed SnapshotUnchanged is raised"""
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await fetch_and_parse_pages(
+                pages,
+                session=session,
+                concurrency=concurrency,
+                html_path=html_path,
+                executor=executor,
+                cache=cache,
+                base_url=base_url,
+                fetcher=fetcher,
+                **parse_kwargs,
+            )
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(page):
+        async with slots:
+            html = await _fetch_page(session, page, cache, base_url, fetcher)
+        data, changed = await _parse_page(
+            page,
+            html,
+            cache,
+            html_path if page == 1 else None,
+            executor,
+            parse_kwargs,
+        )
+        return page, data, changed
+
+    parsed = {}
+    changed_pages = 0
+    tasks = [asyncio.create_task(fetch_page(p)) for p in range(1, pages + 1)]
+    try:
+        for done in asyncio.as_completed(tasks):
+            page, data, changed = await done
+            logger.info(f"Page {page} parsed, {len(data)} coins, changed: {changed}")
+            parsed[page] = data
+            changed_pages += changed
+    finally:
+        # a failed page aborts the cycle, the rest mustn't outlive it and
+        # write into the cache or html sink during the next one
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if not changed_pages:
+        raise SnapshotUnchanged("Listing pages didn't change")
+    return merge_pages(parsed)
+
+
+async def _all_or_none(coros) -> list:
+    """Awaits coros concurrently, the first failure cancels the rest"""
+    tasks = [asyncio.create_task(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_pages(
+    pages,
+    session,
+    concurrency=4,
+    cache=None,
+    base_url=LISTING_URL,
+    fetcher=None,
+) -> dict:
+    """Fetch stage: downloads listing pages 1..pages concurrently, at most
+    `concurrency` requests at once, without parsing them.
+    Returns {page: html or None if server answered 304}, parse_pages turns
+    it into a snapshot. A failed page cancels the rest"""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(page):
+        async with slots:
+            return await _fetch_page(session, page, cache, base_url, fetcher)
+
+    htmls = await _all_or_none(fetch_page(p) for p in range(1, pages + 1))
+    return dict(enumerate(htmls, start=1))
+
+
+async def parse_pages(
+    htmls,
+    html_path=None,
+    executor=None,
+    cache=None,
+    **parse_kwargs,
+) -> dict:
+    """Parse stage: parses pages fetched by fetch_pages (concurrently when
+    executor has several workers) and merges them by merge_pages.
+    Pages answered by 304 reuse cached parse result, if no page changed
+    SnapshotUnchanged is raised. If parsing fails the validators are
+    dropped, otherwise next fetch would get 304 for a page that has no
+    parse result. html_path receives raw html of the first page only"""
+
+    async def parse_page(page, html):
+        if html is None and cache.last(page) is None:
+            raise ValueError(f"Page {page} wasn't modified but has no parse result")
+        return await _parse_page(
+            page,
+            html,
+            cache,
+            html_path if page == 1 else None,
+            executor,
+            parse_kwargs,
+        )
+
+    try:
+        results = await _all_or_none(
+            parse_page(page, html) for page, html in htmls.items()
+        )
+    except Exception:
+        if cache is not None:
+            cache.validators.clear()
+        raise
+
+    parsed = {}
+    for page, (data, changed) in zip(htmls, results):
+        logger.info(f"Page {page} parsed, {len(data)} coins, changed: {changed}")
+        parsed[page] = data
+    if not any(changed for _, changed in results):
+        raise SnapshotUnchanged("Listing pages didn't change")
+    if len(parsed) == 1:
+        # one page is already ranked, same result as fetch_and_parse
+        return next(iter(parsed.values()))
+    return merge_pages(parsed)
@@ -0,0 +1,188 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+NUMERIC_COLUMNS = ("price", "change_1hr", "change_24hr", "volume_24hr")
+STRING_COLUMNS = ("ticker", "name", "icon")
+
+
+@dataclass(frozen=True, slots=True)
+class CoinQuote:
+    """Immutable parsed row of listing page.
+    Supports read access by key (quote["price"]) like the dicts parser used
+    to return, to_dict() is the adapter for json and Excel writers"""
+
+    ticker: str
+    price: float
+    name: str
+    icon: str
+    id: int
+    change_1hr: float
+    change_24hr: float | None
+    volume_24hr: float | None
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self) -> dict:
+        return {
+            "ticker": self.ticker,
+            "price": self.price,
+            "name": self.name,
+            "icon": self.icon,
+            "id": self.id,
+            "change_1hr": self.change_1hr,
+            "change_24hr": self.change_24hr,
+            "volume_24hr": self.volume_24hr,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CoinQuote":
+        return cls(
+            ticker=data["ticker"],
+            price=data["price"],
+            name=data["name"],
+            icon=data["icon"],
+            id=data["id"],
+            change_1hr=data["change_1hr"],
+            change_24hr=data.get("change_24hr"),
+            volume_24hr=data.get("volume_24hr"),
+        )
+
+
+def quotes_to_dicts(data: dict) -> dict:
+    """{ticker: CoinQuote} -> {ticker: dict}, rows that are dicts already are kept"""
+    return {
+        ticker: row.to_dict() if isinstance(row, CoinQuote) else row
+        for ticker, row in data.items()
+    }
+
+
+def quotes_from_dicts(data: dict) -> dict:
+    """{ticker: dict} (e.g. loaded from json) -> {ticker: CoinQuote}"""
+    return {ticker: CoinQuote.from_dict(row) for ticker, row in data.items()}
+
+
+def _encode(strings) -> np.ndarray:
+    """utf-8 encoded fixed width bytes column, much smaller than list of str"""
+    return np.array([(s or "").encode() for s in strings], dtype=np.bytes_)
+
+
+def _to_float(value) -> float:
+    return np.nan if value is None else value
+
+
+class ColumnarSnapshot:
+    """Column oriented market snapshot.
+
+    Numeric fields are contiguous float64 arrays (missing values are NaN),
+    strings are stored utf-8 encoded in numpy bytes arrays, `index` maps
+    ticker to row. Built from {ticker: CoinQuote or dict} snapshot:
+
+        snapshot = ColumnarSnapshot.from_dict(data)
+        snapshot.top(10, by="volume_24hr").to_dict()
+    """
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self.index = {
+            ticker.decode(): row for row, ticker in enumerate(columns["ticker"])
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColumnarSnapshot":
+        rows = list(data.values())
+        columns = {key: _encode(row.get(key) for row in rows) for key in STRING_COLUMNS}
+        for key in NUMERIC_COLUMNS:
+            columns[key] = np.fromiter(
+                (_to_float(row.get(key)) for row in rows),
+                dtype=np.float64,
+                count=len(rows),
+            )
+        columns["id"] = np.fromiter(
+            (row.get("id", i) for i, row in enumerate(rows)),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        return cls(columns)
+
+    def to_dict(self) -> dict:
+        """Returns snapshot as {ticker: dict} (CoinQuote.to_dict format),
+        NaN becomes None"""
+        strings = {
+            key: [value.decode() for value in self.columns[key].tolist()]
+            for key in STRING_COLUMNS
+        }
+        numbers = {
+            key: [
+                None if value != value else value
+                for value in self.columns[key].tolist()
+            ]
+            for key in NUMERIC_COLUMNS
+        }
+        ids = self.columns["id"].tolist()
+
+        out = {}
+        for row, ticker in enumerate(strings["ticker"]):
+            out[ticker] = {
+                "ticker": ticker,
+                "price": numbers["price"][row],
+                "name": strings["name"][row],
+                "icon": strings["icon"][row],
+                "id": ids[row],
+                "change_1hr": numbers["change_1hr"][row],
+                "change_24hr": numbers["change_24hr"][row],
+                "volume_24hr": numbers["volume_24hr"][row],
+            }
+        return out
+
+    def __len__(self) -> int:
+        return len(self.columns["ticker"])
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self.index
+
+    def get(self, ticker, column):
+        """Returns single value of column for ticker"""
+        value = self.columns[column][self.index[ticker]]
+        return value.decode() if column in STRING_COLUMNS else value.item()
+
+    def take(self, rows) -> "ColumnarSnapshot":
+        """Returns new snapshot with rows (indices or boolean mask) in given order"""
+        return ColumnarSnapshot(
+            {key: column[rows] for key, column in self.columns.items()}
+        )
+
+    def filter(self, mask) -> "ColumnarSnapshot":
+        """Keeps rows where boolean mask is True, e.g.
+        snapshot.filter(snapshot.columns["change_24hr"] > 0)"""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def sort_by(self, column, descending=False) -> "ColumnarSnapshot":
+        """Stable sort by numeric column, NaN rows go last"""
+        values = self.columns[column]
+        order = np.argsort(-values if descending else values, kind="stable")
+        return self.take(order)
+
+    def top(self, n, by="volume_24hr") -> "ColumnarSnapshot":
+        return self.sort_by(by, descending=True).take(slice(0, n))
+
+    def aggregate(self, column) -> dict:
+        """min/max/mean/sum of numeric column ignoring missing values"""
+        values = self.columns[column]
+        count = int(np.count_nonzero(~np.isnan(values)))
+        if count == 0:
+            return {"count": 0, "min": None, "max": None, "mean": None, "sum": 0.0}
+        return {
+            "count": count,
+            "min": float(np.nanmin(values)),
+            "max": float(np.nanmax(values)),
+            "mean": float(np.nanmean(values)),
+            "sum": float(np.nansum(values)),
+        }
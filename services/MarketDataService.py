@@ -1,23 +1,47 @@
 import asyncio
-from datetime import datetime, timedelta
+from dataclasses import replace
+from datetime import datetime
+import json
 import os
 import time
 from types import NoneType
 from typing import Optional
 
 import aiohttp
-import playwright
-from playwright.async_api import async_playwright
 from redis.asyncio import Redis
 from config.settings import Config, SettingsManager
+from core.browser import BrowserPool, TrafficMeter
 from core.excel_client import ExcelClient
+from core.executor import ParseExecutor
+from core.icon_cache import IconCache
+from core.loop_monitor import LoopLagMonitor
+from core.rate_limit import limiter_from_config
+from core.resilience import CircuitOpen, ResiliencePolicy
+from core.scheduler import FixedRateScheduler
+from core.sinks import SnapshotSink
+from core.transport import HttpTransport, limited_request
 from parser.parser_html import (
-    get_values_from_html_to_dict,
+    NextDataError,
+    extract_quotes_and_icons,
+    get_values_from_next_data,
     lost_icons_count,
-    parse_icons,
+    lost_icons_in,
     save_values_to_json,
 )
-from parser.parser_site import get_html_by_playwright, get_html_for_top_100
+from parser.fetch_strategy import FetchStrategy
+from parser.parser_site import (
+    fetch_listing_page,
+    get_html_by_playwright,
+    save_html,
+    validate_icons,
+)
+from parser.pipeline import (
+    ContentHashCache,
+    SnapshotUnchanged,
+    fetch_pages,
+    parse_pages,
+)
+from parser.snapshot import ColumnarSnapshot, quotes_from_dicts, quotes_to_dicts
 from core.logger import get_logger
 
 logger = get_logger("MarketDataService")
@@ -37,9 +61,53 @@ class MarketDataService:
         )
         self._task: Optional[asyncio.Task] = None
         self.ICONS_UPDATE_LOCK_KEY = "icons:update_lock"
+        self.SNAPSHOT_META_KEY = "snapshot:meta"
         self._is_running = False
-        self._session: Optional[aiohttp.ClientSession] = None
+        # one budget per upstream host for listing, icons and browser
+        self.rate_limiter = limiter_from_config(self.config, redis=self.redis)
+        self.transport = HttpTransport.from_config(self.config)
+        self.browser = BrowserPool.from_config(
+            self.config, rate_limiter=self.rate_limiter
+        )
+        self.fetch_strategy = FetchStrategy.from_config(
+            self.config, pool=self.browser, rate_limiter=self.rate_limiter
+        )
+        self.resilience = ResiliencePolicy.from_config(
+            self.config, passthrough=(SnapshotUnchanged,)
+        )
+        # pages are retried one by one, breaker guards whole cycle
+        self._fetcher = self.resilience.wrap(self.fetch_strategy.fetch, guarded=False)
         self._stop_event = asyncio.Event()
+        self.scheduler = FixedRateScheduler.from_config(self.config)
+        self.sinks = {
+            "json": SnapshotSink(
+                "json", self._save_json, maxsize=self.config.SINK_QUEUE_SIZE
+            )
+        }
+        # scheduled cycles: ticks fetch, this parses and publishes meanwhile
+        self.parse_stage = SnapshotSink(
+            "parse",
+            self._parse_and_publish,
+            maxsize=self.config.STAGE_QUEUE_SIZE,
+            backpressure=True,
+        )
+        self._snapshot: Optional[dict] = None
+        self._columnar: Optional[tuple[dict, ColumnarSnapshot]] = None
+        self.executor = ParseExecutor(
+            kind=self.config.PARSE_EXECUTOR,
+            max_workers=self.config.PARSE_WORKERS,
+            max_pending=self.config.PARSE_QUEUE_SIZE,
+        )
+        self.loop_lag: Optional[dict] = None
+        self._content_cache = ContentHashCache()
+        self.last_cycle: Optional[str] = None
+        self.cycles = {"updated": 0, "no-change": 0, "circuit-open": 0, "failed": 0}
+        self.snapshot_meta: Optional[dict] = None
+        self.icons_render: Optional[dict] = None
+        self.icon_cache = IconCache.from_config(self.config)
+        self._icon_prefetch: Optional[asyncio.Task] = None
+        # icons were refreshed, cache is filled from the next merged snapshot
+        self._icon_prefetch_pending = False
 
         try:
             self.excel_client = ExcelClient(filepath=self.config.get("FILEPATH_EXCEL"))
@@ -49,18 +117,26 @@ class MarketDataService:
             self.can_write_in_excel = False
 
     def _get_data(self) -> dict:
-        """Getting data from json file"""
+        """Getting last parsed snapshot from memory or from json file"""
+        if self._snapshot is not None:
+            return self._snapshot
         if os.path.exists(self.config.JSON_PATH):
             with open(self.config.JSON_PATH, "r") as f:
-                return get_values_from_html_to_dict(parse_icons_from_file=True)
+                return quotes_from_dicts(json.load(f))
         else:
             logger.warning(f"Json file {self.config.JSON_PATH} does not exist!")
             return {}
 
+    def get_columnar_data(self) -> ColumnarSnapshot:
+        """Returns last snapshot as ColumnarSnapshot for vectorized queries.
+        Conversion is cached until snapshot changes"""
+        data = self._get_data()
+        if self._columnar is None or self._columnar[0] is not data:
+            self._columnar = (data, ColumnarSnapshot.from_dict(data))
+        return self._columnar[1]
+
     async def _get_session(self) -> aiohttp.ClientSession:
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
-        return self._session
+        return await self.transport.get_session()
 
     async def _should_update_icons_by_time(self) -> bool:
         """Returns if need update icons by time"""
@@ -71,35 +147,73 @@ class MarketDataService:
         return False
 
     def _should_update_by_lost_icons(self, json_path=None) -> bool:
-        """Returns if need update icons by too many lost"""
-        if json_path is None:
-            json_path = self.config.ICONS
-        if os.path.exists(json_path):
-            if lost_icons_count(json_path) >= self.settings.get("MINIMUM_LOST_ICONS"):
-                logger.info("_should_update_by_lost_icons returns True...")
-                return True
+        """Returns if need update icons by too many lost.
+        Uses count from snapshot metadata, json file is scanned only before
+        first snapshot is known"""
+        if self.snapshot_meta is not None:
+            lost = self.snapshot_meta["lost_icons"]
         else:
+            if json_path is None:
+                json_path = self.config.ICONS
+            if not os.path.exists(json_path):
+                return True
+            lost = lost_icons_count(json_path)
+
+        if lost >= self.settings.get("MINIMUM_LOST_ICONS"):
+            logger.info("_should_update_by_lost_icons returns True...")
             return True
 
         return False
 
+    async def _update_snapshot_meta(self, data: dict) -> None:
+        """Keeps snapshot metadata in memory and in redis"""
+        self.snapshot_meta = {
+            "coins": len(data),
+            "lost_icons": lost_icons_in(data),
+            "updated_at": datetime.now().isoformat(),
+        }
+        try:
+            await self.redis.hset(
+                self.SNAPSHOT_META_KEY,
+                mapping={k: str(v) for k, v in self.snapshot_meta.items()},
+            )
+        except Exception as _ex:
+            logger.warning(f"Saving snapshot meta to redis failed by {_ex}")
+
+    async def _load_snapshot_meta(self) -> None:
+        """Restores snapshot metadata saved by previous run from redis"""
+        try:
+            raw = await self.redis.hgetall(self.SNAPSHOT_META_KEY)
+        except Exception as _ex:
+            logger.warning(f"Loading snapshot meta from redis failed by {_ex}")
+            return
+        if raw:
+            self.snapshot_meta = {
+                "coins": int(raw["coins"]),
+                "lost_icons": int(raw["lost_icons"]),
+                "updated_at": raw["updated_at"],
+            }
+
     async def test_connection(self) -> bool:
         """Returns true if connection is works and false if not"""
         session = await self._get_session()
-        async with session.get("https://coinmarketcap.com/coins/") as response:
+        async with limited_request(
+            session, "GET", self.config.LISTING_URL, limiter=self.rate_limiter
+        ) as response:
             return response.status == 200
 
-    async def _playwright_request(self):
+    async def _playwright_request(self, filtered=True, traffic=None):
+        """Returns status of listing navigation in pooled browser.
+        If traffic dict is given it's filled with requests and transferred bytes"""
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with self.browser.page(filtered=filtered) as page:
+                meter = TrafficMeter(page) if traffic is not None else None
                 response = await page.goto(
-                    "https://coinmarketcap.com/coins/", wait_until="domcontentloaded"
+                    self.config.LISTING_URL, wait_until="domcontentloaded"
                 )
-                status = response.status
-                await browser.close()
-                return status
+                if meter is not None:
+                    traffic.update(await meter.collect())
+                return response.status
         except Exception as _ex:
             logger.error(f"_playwright_request failed by {_ex}")
             return 500
@@ -107,7 +221,9 @@ class MarketDataService:
     async def _aiohttp_request(self):
         try:
             session = await self._get_session()
-            async with session.get("https://coinmarketcap.com/coins/") as response:
+            async with limited_request(
+                session, "GET", self.config.LISTING_URL, limiter=self.rate_limiter
+            ) as response:
                 return response.status
         except Exception as _ex:
             logger.error(f"_aiohttp_request failed by {_ex}")
@@ -119,23 +235,45 @@ class MarketDataService:
         {
         "playwright":
             { "status": *status_code*,
-              "duration": *duration in seconds* },
+              "duration": *duration in seconds*,
+              "requests", "failed_requests", "transferred_bytes" },
+        "playwright_unfiltered": same as "playwright" without route filter,
         "aiohttp":
           { "status": *status_code*,
           "duration": *duration in seconds* }
         }"""
+        traffic = {}
         start = time.time()
-        status_playwright = await self._playwright_request()
+        status_playwright = await self._playwright_request(traffic=traffic)
         time_playwright = time.time() - start
 
+        traffic_unfiltered = {}
+        start = time.time()
+        status_unfiltered = await self._playwright_request(
+            filtered=False, traffic=traffic_unfiltered
+        )
+        time_unfiltered = time.time() - start
+
         start = time.time()
         status_aiohttp = await self._aiohttp_request()
         time_aiohttp = time.time() - start
 
+        # measured latencies feed hedge delay of the fetch strategy
+        if status_playwright == 200:
+            self.fetch_strategy.latency["playwright"].add(time_playwright)
+        if status_aiohttp == 200:
+            self.fetch_strategy.latency["aiohttp"].add(time_aiohttp)
+
         out = {
             "playwright": {
                 "status": status_playwright,
                 "duration": time_playwright,
+                **traffic,
+            },
+            "playwright_unfiltered": {
+                "status": status_unfiltered,
+                "duration": time_unfiltered,
+                **traffic_unfiltered,
             },
             "aiohttp": {
                 "status": status_aiohttp,
@@ -147,23 +285,60 @@ class MarketDataService:
 
         return out
 
+    def _html_sink_path(self) -> Optional[str]:
+        """Returns path for raw html side sink or None if persisting is disabled"""
+        return self.config.HTML_PATH if self.config.PERSIST_HTML else None
+
     async def force_update_icons(self, html_path=None, json_path=None):
-        """Forcing updating icons. Downloading page with playwright and save icons to json_path"""
+        """Forcing updating icons and save them to json_path.
+        With ICONS_SOURCE=next_data icon urls are built from coin ids without
+        browser, playwright is used only for tickers left unresolved (failed
+        HEAD validation) or if __NEXT_DATA__ can't be used.
+        Raw html is written to html_path only if it's given or PERSIST_HTML is enabled.
+        Returns quotes extracted in the same pass (or None if page wasn't downloaded)
+        """
         if html_path is None:
-            html_path = self.config.HTML_PATH
+            html_path = self._html_sink_path()
 
         if json_path is None:
             json_path = self.config.ICONS
 
-        logger.info("Downloading page with playwright....")
-        try:
-            await get_html_by_playwright(filepath=html_path)
-        except Exception as _ex:
-            logger.error("Error while opening url with playwright")
+        if self.resilience.breaker.state != "closed":
+            # upstream is probed by the listing fetch at reduced rate only
+            logger.warning("Upstream circuit isn't closed, skipping icons update")
+            return
+
+        quotes, icons_json, unresolved = None, None, set()
+        if self.config.ICONS_SOURCE == "next_data":
+            quotes, icons_json, unresolved = await self._icons_from_next_data(html_path)
+
+        upstream_ok = self.resilience.breaker.state == "closed"
+        if (quotes is None or unresolved) and upstream_ok:
+            rendered = await self._icons_from_playwright(html_path)
+            if rendered is None:
+                if quotes is None:
+                    return
+            elif quotes is None:
+                quotes, icons_json = rendered
+            else:
+                page_icons = rendered[1]
+                for ticker in unresolved:
+                    if page_icons.get(ticker):
+                        icons_json[ticker] = page_icons[ticker]
+                        quotes[ticker] = replace(
+                            quotes[ticker], icon=page_icons[ticker]
+                        )
+                logger.info(
+                    f"Playwright resolved {len(unresolved & page_icons.keys())} "
+                    f"of {len(unresolved)} icons"
+                )
+        if quotes is None:
+            # __NEXT_DATA__ fetch opened the circuit, no browser fallback
             return
 
-        logger.info("Parsing and saving icons...")
-        icons_json = parse_icons(filepath=html_path)
+        # next listing must be parsed again with new icons
+        self._content_cache.clear()
+
         if self.settings.get("ICONS_BY_TIME_UPDATE"):
             logger.info("Writing update time in redis...")
             await self.redis.set(
@@ -173,34 +348,243 @@ class MarketDataService:
                 nx=True,
             )
 
-        save_values_to_json(icons_json, json_path)
+        await self.executor.run(save_values_to_json, icons_json, json_path)
+        if self.config.LISTING_PAGES == 1:
+            self._prefetch_icons_in_background(icons_json)
+        else:
+            # icons_json covers page 1 only, coins of pages 2..N are
+            # prefetched with it once they are merged into the snapshot
+            self._icon_prefetch_pending = True
         logger.info("Updating icons was completed successfully")
+        return quotes
+
+    def _prefetch_icons_in_background(self, icons: dict) -> bool:
+        """Refreshes icon cache without delaying the cycle,
+        skipped (returns False) while previous prefetch is still running"""
+        if self._icon_prefetch is not None and not self._icon_prefetch.done():
+            logger.info("Icon prefetch is still running, skipping")
+            return False
+
+        async def prefetch():
+            try:
+                session = await self._get_session()
+                await self.icon_cache.prefetch(
+                    session, icons, limiter=self.rate_limiter
+                )
+            except Exception as _ex:
+                logger.error(f"Icon prefetch failed by {_ex}")
+
+        self._icon_prefetch = asyncio.create_task(prefetch())
+        return True
+
+    async def _icons_from_next_data(self, html_path=None):
+        """Returns (quotes, icons, unresolved tickers) built from coin ids
+        in __NEXT_DATA__ or (None, None, empty set) if it can't be used"""
+        logger.info("Building icons from __NEXT_DATA__...")
+        try:
+            session = await self._get_session()
+            html = await self.resilience.call(
+                fetch_listing_page,
+                session,
+                url=self.config.LISTING_URL,
+                limiter=self.rate_limiter,
+            )
+            if html_path is not None:
+                await save_html(html, html_path)
+            quotes = await self.executor.run(get_values_from_next_data, html)
+        except (NextDataError, aiohttp.ClientError, asyncio.TimeoutError) as _ex:
+            logger.warning(f"Icons from __NEXT_DATA__ failed, using playwright: {_ex}")
+            return None, None, set()
+
+        icons = {ticker: quote.icon for ticker, quote in quotes.items()}
+        unresolved = set()
+        if self.config.ICONS_VALIDATE:
+            unresolved = await validate_icons(
+                session,
+                icons,
+                concurrency=self.config.ICONS_VALIDATE_CONCURRENCY,
+                limiter=self.rate_limiter,
+            )
+            for ticker in unresolved:
+                icons.pop(ticker)
+                # counted as lost until playwright finds a logo for it
+                quotes[ticker] = replace(quotes[ticker], icon="")
+        return quotes, icons, unresolved
+
+    async def _icons_from_playwright(self, html_path=None):
+        """Returns (quotes, page icons) of page rendered in pooled browser
+        or None if page wasn't downloaded"""
+        logger.info("Downloading page with playwright....")
+        try:
+            readiness = {}
+            html = await get_html_by_playwright(
+                filepath=html_path,
+                pool=self.browser,
+                readiness=readiness,
+                url=self.config.LISTING_URL,
+                deadline=self.config.ICONS_RENDER_DEADLINE,
+            )
+            self.icons_render = readiness
+        except Exception as _ex:
+            logger.error("Error while opening url with playwright")
+            return None
+
+        logger.info("Parsing icons...")
+        return await self.executor.run(extract_quotes_and_icons, html=html)
+
+    async def _fetch_listing(self) -> dict:
+        """Downloads LISTING_PAGES pages without parsing them (fetch stage of
+        scheduled cycles). Only this is guarded by the breaker: markup that
+        can't be parsed isn't an upstream failure"""
+        async with self.resilience.guard():
+            return await fetch_pages(
+                self.config.LISTING_PAGES,
+                session=await self._get_session(),
+                concurrency=self.config.FETCH_CONCURRENCY,
+                cache=self._content_cache,
+                base_url=self.config.LISTING_URL,
+                fetcher=self._fetcher,
+            )
+
+    async def _parse_listing(self, htmls: dict) -> dict:
+        """Parses pages downloaded by _fetch_listing into one snapshot"""
+        return await parse_pages(
+            htmls,
+            html_path=self._html_sink_path(),
+            executor=self.executor,
+            cache=self._content_cache,
+            parse_icons_from_file=True,
+            json_only=self.config.PARSE_JSON_ONLY,
+        )
+
+    async def _fetch_snapshot(self) -> dict:
+        """Fetches and parses LISTING_PAGES listing pages into one snapshot"""
+        return await self._parse_listing(await self._fetch_listing())
 
     async def force_parse(self, json_path=None):
-        """Forcing parse new data"""
+        """Forcing parse new data.
+        Event loop lag measured during the cycle is kept in self.loop_lag"""
+        async with LoopLagMonitor() as lag:
+            await self._parse_cycle(json_path)
+        self.loop_lag = lag.as_dict()
+
+    async def _parse_cycle(self, json_path=None):
         if json_path is None:
             json_path = self.config.JSON_PATH
 
+        if self.snapshot_meta is None:
+            await self._load_snapshot_meta()
+
         logger.info("Check if needed update icons...")
         should_update_by_time = await self._should_update_icons_by_time()
 
+        # while scheduler runs this is the fetch stage, parse stage
+        # parses the previous listing meanwhile
+        staged = self.parse_stage.running
+        data, htmls = None, None
         if should_update_by_time or self._should_update_by_lost_icons(
             json_path=json_path
         ):
+            if staged:
+                # listing parsed with old icons mustn't land in cache later
+                await self.parse_stage.drain()
             try:
-                await self.force_update_icons()
+                quotes = await self.force_update_icons()
             except Exception as _ex:
                 logger.error(f"force update icons failed: {_ex}")
+            else:
+                # icons come from LISTING_URL (page 1) only, its quotes are
+                # the whole snapshot only when one page is listed
+                if self.config.LISTING_PAGES == 1:
+                    data = quotes
 
         try:
-            await get_html_for_top_100()
-            save_values_to_json(
-                get_values_from_html_to_dict(parse_icons_from_file=True),
-                filepath=json_path,
-            )
+            if data is not None:
+                logger.info("Using quotes extracted while updating icons...")
+            elif staged:
+                htmls = await self._fetch_listing()
+            else:
+                data = await self._fetch_snapshot()
+        except SnapshotUnchanged:
+            logger.info("Listing didn't change, skipping parse and persist")
+            self._record_cycle("no-change")
+            return
+        except CircuitOpen as _ex:
+            logger.warning(f"{_ex}, serving last good snapshot")
+            self._record_cycle("circuit-open")
+            return
         except Exception as _ex:
             logger.error(f"force parse failed: {_ex}")
+            self._record_cycle("failed")
+            return
+
+        if staged:
+            # waits only while STAGE_QUEUE_SIZE listings are already queued
+            await self.parse_stage.submit(htmls, json_path, data)
             return
+        await self._accept(data, json_path)
+
+    async def _parse_and_publish(self, htmls, json_path, data=None) -> None:
+        """Parse stage handler: parses listing fetched by a tick and
+        publishes it, data (quotes from icons update) is published as is"""
+        try:
+            if data is None:
+                data = await self._parse_listing(htmls)
+        except SnapshotUnchanged:
+            logger.info("Listing didn't change, skipping parse and persist")
+            self._record_cycle("no-change")
+            return
+        except Exception as _ex:
+            logger.error(f"parse stage failed: {_ex}")
+            self._record_cycle("failed")
+            return
+        await self._accept(data, json_path)
+
+    async def _accept(self, data: dict, json_path: str) -> None:
+        """Makes data the current snapshot and publishes it"""
+        self._snapshot = data
+        await self._update_snapshot_meta(data)
+        self._record_cycle("updated")
+        if self._icon_prefetch_pending:
+            icons = {ticker: row["icon"] for ticker, row in data.items() if row["icon"]}
+            self._icon_prefetch_pending = not self._prefetch_icons_in_background(icons)
+        await self._publish(data, json_path)
+
+    async def _publish(self, data: dict, json_path: str) -> None:
+        """Hands new snapshot to sinks. While scheduler runs every sink works
+        in its own task and this only fills their mailboxes"""
+        await self.sinks["json"].submit(data, json_path)
+        excel = self.sinks.get("excel")
+        if excel is not None:
+            await excel.submit(data)
+
+    async def _save_json(self, data: dict, json_path: str) -> None:
+        await self.executor.run(save_values_to_json, data, filepath=json_path)
+
+    def _write_excel(self, data: dict) -> None:
+        """Runs in excel sink's worker thread: load_workbook, cell writes
+        and save block for seconds on large workbooks"""
+        logger.info("Writing values to excel...")
+        if self.settings.get("FILEPATH_EXCEL") != self.excel_client.filepath:
+            logger.info("Excel filepath changed, reinitializing excel client...")
+            self.excel_client.close()
+            self.excel_client = ExcelClient(
+                filepath=self.settings.get("FILEPATH_EXCEL")
+            )
+        self.excel_client.open()
+        rows = quotes_to_dicts(data)
+        columns_by_keys = self.excel_client._get_letter_for_keys(
+            self.excel_client._get_keys_from_dict(rows)
+        )
+        self.excel_client.write_with_columns_by_key(
+            data=rows, columns_by_keys=columns_by_keys
+        )
+        self.excel_client.close()
+        logger.info("Values were written to excel successfully!")
+
+    def _record_cycle(self, result: str) -> None:
+        self.last_cycle = result
+        self.cycles[result] += 1
 
     async def start_parsing(
         self, seconds_parsing: float | NoneType = None, writing_in_excel: bool = False
@@ -229,69 +613,58 @@ class MarketDataService:
     async def _run_periodically(
         self, seconds_parsing: float, writing_in_excel: bool = False
     ) -> None:
-        """Runs the parsing task periodically"""
-        while not self._stop_event.is_set():
-            start_time = datetime.now()
+        """Runs the parsing task every seconds_parsing on self.scheduler ticks.
+        The tick only fetches, parsing runs in the parse stage and sinks
+        (json, excel) in their own tasks, so fetch of the next listing
+        overlaps parsing of the previous one and a slow sink doesn't stretch
+        the period. The parse stage queue is bounded (STAGE_QUEUE_SIZE) and
+        never drops: when parsing is slower than fetching ticks wait for it"""
+        if writing_in_excel and self.can_write_in_excel:
+            self.sinks["excel"] = SnapshotSink(
+                "excel",
+                self._write_excel,
+                maxsize=self.config.SINK_QUEUE_SIZE,
+                blocking=True,
+            )
+        elif writing_in_excel:
+            logger.warning(
+                "Cannot write in excel because excel client was not initialized successfully"
+            )
+        self.parse_stage.start()
+        for sink in self.sinks.values():
+            sink.start()
 
-            self.next_run_at = datetime.now() + timedelta(seconds=seconds_parsing)
+        self.scheduler.start(seconds_parsing)
+        try:
+            while not self._stop_event.is_set():
+                self.scheduler.run_started()
 
-            try:
-                await self.force_parse()
-            except Exception as e:
-                logger.error("Error during parsing: %s", e)
-                await asyncio.sleep(seconds_parsing)
-
-            elapsed_time = (datetime.now() - start_time).total_seconds()
-            sleep_time = max(0, seconds_parsing - elapsed_time)
-            logger.info("Sleeping for %s seconds before next parsing...", sleep_time)
-            if writing_in_excel and self.can_write_in_excel:
-                logger.info("Writing values to excel...")
                 try:
-                    if (
-                        self.settings.get("FILEPATH_EXCEL")
-                        != self.excel_client.filepath
-                    ):
-                        logger.info(
-                            "Excel filepath changed, reinitializing excel client..."
-                        )
-                        self.excel_client.close()
-                        self.excel_client = ExcelClient(
-                            filepath=self.settings.get("FILEPATH_EXCEL")
-                        )
-                    self.excel_client.open()
-                    data = self._get_data()
-                    columns_by_keys = self.excel_client._get_letter_for_keys(
-                        self.excel_client._get_keys_from_dict(data)
-                    )
-                    self.excel_client.write_with_columns_by_key(
-                        data=data, columns_by_keys=columns_by_keys
-                    )
-                    self.excel_client.close()
-                    logger.info("Values were written to excel successfully!")
+                    await self.force_parse()
                 except Exception as e:
-                    logger.error("Error while writing to excel file: %s", e)
+                    logger.error("Error during parsing: %s", e)
 
-            if writing_in_excel and not self.can_write_in_excel:
-                logger.warning(
-                    "Cannot write in excel because excel client was not initialized successfully"
+                sleep_time = self.scheduler.next_delay()
+                logger.info(
+                    "Sleeping for %s seconds before next parsing...", sleep_time
                 )
-
-            try:
-                await asyncio.wait_for(self._stop_event.wait(), timeout=sleep_time)
-            except asyncio.TimeoutError:
-                pass
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=sleep_time)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # fetched listings are parsed and published before stopping
+            await self.parse_stage.close(drain=True)
+            excel = self.sinks.pop("excel", None)
+            if excel is not None:
+                await excel.close()
+            # json is cheap, last snapshot is written before stopping
+            await self.sinks["json"].close(drain=True)
 
     @property
     def time_until_next_parse(self) -> float:
-        """
-        Every time called calculating difference between
-        planed time and now
-        """
-        if not hasattr(self, "next_run_at"):
-            return 0.0
-
-        remaining = (self.next_run_at - datetime.now()).total_seconds()
-        return max(0.0, remaining)
+        """Seconds until next scheduled parse (monotonic clock)"""
+        return self.scheduler.time_until_next()
 
     async def stop_parsing(self) -> None:
         """Stops parsing by scheduler"""
@@ -321,13 +694,38 @@ class MarketDataService:
             "running": running,
             "next_parse": next_parse,
             "status": "OK",
+            "snapshot": self.snapshot_meta,
+            "last_cycle": self.last_cycle,
+            "cycles": self.cycles,
+            "loop_lag": self.loop_lag,
+            "scheduler": self.scheduler.stats,
+            "parse_stage": self.parse_stage.stats,
+            "sinks": {name: sink.stats for name, sink in self.sinks.items()},
+            "transport": self.transport.stats,
+            "fetch_strategy": self.fetch_strategy.stats,
+            "breaker": self.resilience.stats,
+            "rate_limit": self.rate_limiter.stats if self.rate_limiter else None,
+            "browser": self.browser.stats,
+            "icons_render": self.icons_render,
+            "icon_cache": self.icon_cache.stats,
+            "parse_executor": {
+                "kind": self.executor.kind,
+                "pending": self.executor.pending,
+            },
         }
 
     async def close(self) -> None:
         """Closes all sessions and connections"""
         logger.info("MarketData service is closing...")
         await self.redis.aclose()
-        await self._session.close() if self._session else None
+        await self.parse_stage.close()
+        for sink in self.sinks.values():
+            await sink.close()
+        if self._icon_prefetch is not None and not self._icon_prefetch.done():
+            self._icon_prefetch.cancel()
+        await self.transport.close()
+        await self.browser.close()
+        await self.executor.close()
         logger.info("MarketData service closed successfully!")
 
 
@@ -1,6 +1,9 @@
+import os
+
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
-from app.main import app
+from app.main import app, parser_service
+from core.icon_cache import IconCache
 
 
 def test_read_status():
@@ -54,3 +57,27 @@ def test_change_setting_value_key_error():
         assert "Key does not exist" in str(response.json())
 
         mock_instance.set.assert_called_once_with("WRONG_KEY", "123")
+
+
+def test_get_icon_from_cache(tmp_path, monkeypatch):
+    cache = IconCache(str(tmp_path))
+    os.makedirs(cache.blobs_dir)
+    with open(os.path.join(cache.blobs_dir, "abc.png"), "wb") as f:
+        f.write(b"\x89PNG")
+    cache._index = {
+        "BTC": {"hash": "abc", "url": "u", "content_type": "image/png", "fetched_at": 0}
+    }
+    monkeypatch.setattr(parser_service, "icon_cache", cache)
+    client = TestClient(app)
+
+    response = client.get("/icons/BTC")
+    blob = client.get("/icons/blob/abc")
+
+    assert response.status_code == 200
+    assert response.content == b"\x89PNG"
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert blob.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert client.get("/icons/ETH").status_code == 404
+    assert client.get("/icons/blob/nope").status_code == 404
@@ -0,0 +1,203 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.browser import BrowserPool, RouteFilter
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.page = FakePage()
+        self.routes = []
+
+    async def route(self, pattern, handler):
+        self.routes.append(pattern)
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+        self.page.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = BrowserPool(size=2, max_page_uses=3, route_filter=RouteFilter())
+    browsers = []
+
+    async def launch():
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    monkeypatch.setattr(pool, "_launch", launch)
+    pool.browsers = browsers
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_reuses_warm_page(pool):
+    # Act
+    pages = []
+    for _ in range(2):
+        async with pool.page() as page:
+            pages.append(page)
+
+    # Assert
+    assert pages[0] is pages[1]
+    assert pool.launches == 1
+    assert pool.stats["page_uses"] == 2
+    assert pool.stats["idle_pages"] == 1
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_recycles_worn_out_page(pool):
+    # Act
+    pages = []
+    for _ in range(4):
+        async with pool.page() as page:
+            pages.append(page)
+
+    # Assert
+    assert pages[0] is pages[2]
+    assert pages[3] is not pages[0]
+    assert pages[0].closed
+    assert pool.pages_recycled == 1
+    assert pool.launches == 1
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_drops_page_after_error(pool):
+    # Act
+    with pytest.raises(RuntimeError):
+        async with pool.page() as page:
+            failed = page
+            raise RuntimeError("navigation failed")
+    async with pool.page() as page:
+        retried = page
+
+    # Assert
+    assert failed.closed
+    assert retried is not failed
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_restarts_crashed_browser(pool):
+    # Arrange
+    async with pool.page() as page:
+        first = page
+    pool.browsers[0].connected = False
+
+    # Act
+    async with pool.page() as page:
+        second = page
+
+    # Assert
+    assert second is not first
+    assert pool.launches == 2
+    assert pool.restarts == 1
+    assert pool.running
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_close(pool):
+    # Arrange
+    async with pool.page():
+        pass
+
+    # Act
+    await pool.close()
+
+    # Assert
+    assert not pool.running
+    assert pool.browsers[0].contexts[0].closed
+    assert pool.stats["idle_pages"] == 0
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = SimpleNamespace(resource_type=resource_type, url=url)
+        self.result = None
+
+    async def continue_(self):
+        self.result = "continue"
+
+    async def abort(self):
+        self.result = "abort"
+
+
+@pytest.mark.parametrize(
+    "resource_type, url, allowed",
+    [
+        ("document", "https://coinmarketcap.com/coins/", True),
+        ("script", "https://s2.coinmarketcap.com/static/app.js", True),
+        ("image", "https://s2.coinmarketcap.com/static/img/coins/64x64/1.png", False),
+        ("font", "https://coinmarketcap.com/font.woff2", False),
+        ("script", "https://www.googletagmanager.com/gtag/js", False),
+        ("script", "https://evilcoinmarketcap.com/app.js", False),
+    ],
+)
+def test_route_filter_allows(resource_type, url, allowed):
+    route_filter = RouteFilter(("document", "script"), ("coinmarketcap.com",))
+
+    assert route_filter.allows(resource_type, url) is allowed
+
+
+@pytest.mark.asyncio
+async def test_route_filter_handle_counts():
+    # Arrange
+    route_filter = RouteFilter(("document",), ())
+    routes = [
+        FakeRoute("document", "https://coinmarketcap.com/coins/"),
+        FakeRoute("media", "https://cdn.example.com/ad.mp4"),
+    ]
+
+    # Act
+    for route in routes:
+        await route_filter.handle(route)
+
+    # Assert
+    assert [route.result for route in routes] == ["continue", "abort"]
+    assert route_filter.stats == {"allowed": 1, "blocked": 1}
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_unfiltered_page_is_one_off(pool):
+    # Act
+    async with pool.page() as page:
+        filtered = page
+    async with pool.page(filtered=False) as page:
+        unfiltered = page
+
+    # Assert
+    filtered_context, unfiltered_context = pool.browsers[0].contexts
+    assert filtered_context.routes == ["**/*"]
+    assert unfiltered_context.routes == []
+    assert unfiltered.closed
+    assert not filtered.closed
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from core.executor import ParseExecutor
+from core.loop_monitor import LoopLagMonitor
+from parser.parser_html import get_values_from_html_to_dict
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+
+def test_unknown_executor_kind():
+    with pytest.raises(ValueError, match="Unknown executor kind: fibers"):
+        ParseExecutor(kind="fibers")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["thread", "process", "inline"])
+async def test_executor_runs_parser(kind):
+    # Arrange
+    executor = ParseExecutor(kind=kind)
+    html = (FIXTURES / "next_data_values.html").read_bytes()
+
+    # Act
+    result = await executor.run(get_values_from_html_to_dict, html=html)
+    await executor.close()
+
+    # Assert
+    assert list(result) == ["BTC", "ETH", "UNI"]
+
+
+@pytest.mark.asyncio
+async def test_executor_limits_pending_jobs():
+    # Arrange
+    executor = ParseExecutor(kind="thread", max_workers=4, max_pending=2)
+    seen = []
+
+    async def job():
+        seen.append(executor.pending)
+        await executor.run(time.sleep, 0.05)
+
+    # Act
+    await asyncio.gather(*(job() for _ in range(5)))
+    await executor.close()
+
+    # Assert
+    assert max(seen) <= 2
+    assert executor.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_closed_executor_rejects_jobs():
+    executor = ParseExecutor()
+    await executor.close()
+
+    with pytest.raises(RuntimeError, match="Executor is closed"):
+        await executor.run(time.sleep, 0)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_detects_blocking_call():
+    async with LoopLagMonitor(interval=0.005) as lag:
+        time.sleep(0.1)
+
+    assert lag.max_lag >= 0.09
+    assert lag.as_dict()["samples"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_with_executor():
+    executor = ParseExecutor(kind="thread")
+
+    async with LoopLagMonitor(interval=0.005) as lag:
+        await executor.run(time.sleep, 0.1)
+    await executor.close()
+
+    assert lag.max_lag < 0.05
+    assert lag.samples > 1
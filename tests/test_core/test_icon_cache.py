@@ -0,0 +1,110 @@
+import os
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.icon_cache import IconCache
+
+LOGOS = {"1": b"\x89PNG bitcoin", "1027": b"\x89PNG ether", "same": b"\x89PNG ether"}
+
+
+@pytest_asyncio.fixture
+async def logo_server():
+    """Local stand-in for the icon CDN"""
+    requests = []
+
+    async def logo(request):
+        requests.append(request.match_info["id"])
+        body = LOGOS.get(request.match_info["id"])
+        if body is None:
+            return web.Response(status=404)
+        return web.Response(body=body, content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/64x64/{id}.png", logo)
+    server = TestServer(app)
+    await server.start_server()
+    server.requests = requests
+    server.icon = lambda id: str(server.make_url(f"/64x64/{id}.png"))
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_icon_cache_downloads_only_stale_icons(tmp_path, logo_server):
+    # Arrange
+    cache = IconCache(str(tmp_path), max_age=3600, concurrency=2)
+    icons = {
+        "BTC": logo_server.icon("1"),
+        "ETH": logo_server.icon("1027"),
+        "DEAD": logo_server.icon("404"),
+    }
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        first = await cache.prefetch(session, icons)
+        second = await cache.prefetch(session, {"BTC": icons["BTC"]})
+
+    # Assert
+    assert first == {"checked": 3, "downloaded": 2, "unchanged": 0, "failed": 1}
+    assert second == {"checked": 1, "downloaded": 0, "unchanged": 0, "failed": 0}
+    assert sorted(logo_server.requests) == ["1", "1027", "404"]
+    path, content_type, _ = cache.lookup("BTC")
+    assert content_type == "image/png"
+    with open(path, "rb") as f:
+        assert f.read() == LOGOS["1"]
+    assert cache.lookup("DEAD") is None
+
+
+@pytest.mark.asyncio
+async def test_icon_cache_is_content_addressed(tmp_path, logo_server):
+    # Arrange
+    cache = IconCache(str(tmp_path))
+    icons = {"ETH": logo_server.icon("1027"), "WETH": logo_server.icon("same")}
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        await cache.prefetch(session, icons)
+
+    # Assert
+    assert cache.lookup("ETH") == cache.lookup("WETH")
+    assert len(os.listdir(cache.blobs_dir)) == 1
+    assert cache.lookup_hash(cache.index["ETH"]["hash"])[1] == "image/png"
+
+
+@pytest.mark.asyncio
+async def test_icon_cache_refreshes_expired_and_moved_icons(tmp_path, logo_server):
+    # Arrange
+    cache = IconCache(str(tmp_path), max_age=3600)
+    icons = {"BTC": logo_server.icon("1"), "ETH": logo_server.icon("1027")}
+    async with aiohttp.ClientSession() as session:
+        await cache.prefetch(session, icons)
+    cache.index["BTC"]["fetched_at"] -= 7200
+
+    # Act
+    stale = cache.stale({"BTC": icons["BTC"], "ETH": logo_server.icon("same")})
+    async with aiohttp.ClientSession() as session:
+        run = await cache.prefetch(session, {**icons, "ETH": logo_server.icon("same")})
+
+    # Assert
+    assert set(stale) == {"BTC", "ETH"}
+    # both answered with bytes already known
+    assert run["unchanged"] == 2
+    assert cache.index["ETH"]["url"].endswith("/same.png")
+
+
+@pytest.mark.asyncio
+async def test_icon_cache_index_survives_restart(tmp_path, logo_server):
+    # Arrange
+    async with aiohttp.ClientSession() as session:
+        await IconCache(str(tmp_path)).prefetch(session, {"BTC": logo_server.icon("1")})
+
+    # Act
+    cache = IconCache(str(tmp_path))
+
+    # Assert
+    assert cache.stale({"BTC": logo_server.icon("1")}) == {}
+    assert cache.lookup("BTC") is not None
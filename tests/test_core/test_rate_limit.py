@@ -0,0 +1,165 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from core.browser import BrowserPool
+from core.rate_limit import RedisTokenBucketLimiter, TokenBucketLimiter, host_of
+
+
+class Clock:
+    """Fake monotonic clock moved forward by fake sleep"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_host_of():
+    assert (
+        host_of("https://S2.CoinMarketCap.com/static/1.png") == "s2.coinmarketcap.com"
+    )
+    assert host_of("coinmarketcap.com") == "coinmarketcap.com"
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_paces():
+    # Arrange
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+
+    # Act
+    waits = [
+        await limiter.acquire("https://coinmarketcap.com/coins/") for _ in range(5)
+    ]
+
+    # Assert
+    assert waits == [0, 0, 0, 0.5, 0.5]
+    assert clock.now == 1.0
+    assert limiter.stats["acquired"] == 5
+
+
+@pytest.mark.asyncio
+async def test_bucket_is_per_host():
+    # Arrange
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+
+    # Act
+    await limiter.acquire("https://coinmarketcap.com/coins/")
+    icon_wait = await limiter.acquire("https://s2.coinmarketcap.com/1.png")
+
+    # Assert
+    assert icon_wait == 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_queues_concurrent_waiters():
+    # Arrange
+    limiter = TokenBucketLimiter(rate=100, burst=1)
+
+    # Act
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(*(limiter.acquire("coinmarketcap.com") for _ in range(4)))
+    elapsed = asyncio.get_running_loop().time() - start
+
+    # Assert
+    assert 0.025 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_redis_limiter_waits_for_shared_budget():
+    # Arrange
+    clock = Clock()
+    script = AsyncMock(side_effect=["0.25", "0"])
+    redis = Mock(register_script=Mock(return_value=script))
+    limiter = RedisTokenBucketLimiter(redis, rate=4, burst=1, sleep=clock.sleep)
+
+    # Act
+    waited = await limiter.acquire("https://coinmarketcap.com/coins/")
+
+    # Assert
+    assert waited == 0.25
+    assert script.await_args.kwargs == {
+        "keys": ["ratelimit:coinmarketcap.com"],
+        "args": [4, 1],
+    }
+
+
+@pytest.mark.asyncio
+async def test_redis_limiter_falls_back_to_local_bucket():
+    # Arrange
+    clock = Clock()
+    script = AsyncMock(side_effect=ConnectionError("redis down"))
+    redis = Mock(register_script=Mock(return_value=script))
+    limiter = RedisTokenBucketLimiter(
+        redis, rate=1, burst=1, clock=clock, sleep=clock.sleep
+    )
+
+    # Act
+    waits = [await limiter.acquire("coinmarketcap.com") for _ in range(2)]
+
+    # Assert
+    assert waits == [0, 1]
+    # redis isn't asked again during cooldown
+    assert script.await_count == 1
+    assert limiter.stats["fallbacks"] == 1
+    assert limiter.stats["redis_down"] is True
+    assert limiter.stats["backend"] == "redis"
+
+
+@pytest.mark.asyncio
+async def test_redis_limiter_retries_redis_after_cooldown():
+    # Arrange
+    clock = Clock()
+    down = ConnectionError("redis down")
+    script = AsyncMock(side_effect=[down, down, "0"])
+    redis = Mock(register_script=Mock(return_value=script))
+    limiter = RedisTokenBucketLimiter(
+        redis, rate=1, burst=10, cooldown=5, clock=clock, sleep=clock.sleep
+    )
+
+    # Act
+    for now in (0, 1, 6, 12):
+        clock.now = now
+        await limiter.acquire("coinmarketcap.com")
+
+    # Assert
+    # t=1 is inside cooldown, t=6 fails again, t=12 is served by redis
+    assert script.await_count == 3
+    assert limiter.stats["outages"] == 1
+    assert limiter.stats["fallbacks"] == 2
+    assert limiter.stats["redis_down"] is False
+
+
+@pytest.mark.asyncio
+async def test_browser_navigations_take_tokens():
+    # Arrange
+    limiter = Mock(acquire=AsyncMock())
+    pool = BrowserPool(rate_limiter=limiter)
+
+    def route(resource_type, url):
+        return SimpleNamespace(
+            request=SimpleNamespace(resource_type=resource_type, url=url),
+            continue_=AsyncMock(),
+        )
+
+    document = route("document", "https://coinmarketcap.com/coins/")
+    script = route("script", "https://coinmarketcap.com/app.js")
+
+    # Act
+    await pool._route(document, None)
+    await pool._route(script, None)
+
+    # Assert
+    limiter.acquire.assert_awaited_once_with("https://coinmarketcap.com/coins/")
+    document.continue_.assert_awaited_once()
+    script.continue_.assert_awaited_once()
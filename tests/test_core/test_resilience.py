@@ -0,0 +1,170 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import aiohttp
+import pytest
+
+from core.resilience import CircuitBreaker, CircuitOpen, ResiliencePolicy, classify
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _status_error(status, headers=None):
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers)
+
+
+class Unchanged(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    "exc, kind",
+    [
+        (asyncio.TimeoutError(), "timeout"),
+        (_status_error(429), "rate_limited"),
+        (_status_error(502), "server"),
+        (_status_error(404), "client"),
+        (aiohttp.ClientConnectionError(), "connection"),
+        (ValueError(), "other"),
+    ],
+)
+def test_classify(exc, kind):
+    assert classify(exc) == kind
+
+
+def _policy(**kwargs):
+    sleep = AsyncMock()
+    policy = ResiliencePolicy(sleep=sleep, **kwargs)
+    return policy, sleep
+
+
+@pytest.mark.asyncio
+async def test_retries_retryable_errors_with_backoff():
+    # Arrange
+    policy, sleep = _policy(attempts=3, base_delay=1, max_delay=10)
+    func = AsyncMock(side_effect=[asyncio.TimeoutError(), _status_error(503), "ok"])
+
+    # Act
+    result = await policy.call(func)
+
+    # Assert
+    assert result == "ok"
+    assert func.await_count == 3
+    delays = [call.args[0] for call in sleep.await_args_list]
+    assert 0 <= delays[0] <= 1 and 0 <= delays[1] <= 2
+    assert policy.stats["errors"] == {"timeout": 1, "server": 1}
+    assert policy.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    # Arrange
+    policy, sleep = _policy(attempts=3)
+    func = AsyncMock(side_effect=_status_error(404))
+
+    # Act / Assert
+    with pytest.raises(aiohttp.ClientResponseError):
+        await policy.call(func)
+    assert func.await_count == 1
+    sleep.assert_not_awaited()
+
+
+def test_backoff_respects_retry_after():
+    policy, _ = _policy(base_delay=0.1, max_delay=10)
+
+    delay = policy.backoff(1, _status_error(429, headers={"Retry-After": "5"}))
+
+    assert delay == 5
+
+
+@pytest.mark.asyncio
+async def test_passthrough_exception_is_not_a_failure():
+    # Arrange
+    policy, _ = _policy(attempts=3, passthrough=(Unchanged,))
+    func = AsyncMock(side_effect=Unchanged())
+
+    # Act / Assert
+    with pytest.raises(Unchanged):
+        await policy.call(func)
+    assert func.await_count == 1
+    assert policy.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_probes_after_reset_timeout():
+    # Arrange
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    policy, _ = _policy(attempts=1, breaker=breaker)
+    failing = AsyncMock(side_effect=_status_error(500))
+
+    # Act
+    for _ in range(2):
+        with pytest.raises(aiohttp.ClientResponseError):
+            await policy.call(failing)
+    with pytest.raises(CircuitOpen):
+        await policy.call(failing)
+    opened = breaker.stats
+
+    clock.now = 30
+    with pytest.raises(aiohttp.ClientResponseError):
+        await policy.call(failing)
+    reopened = breaker.stats
+
+    clock.now = 60
+    result = await policy.call(AsyncMock(return_value="ok"))
+
+    # Assert
+    assert failing.await_count == 3
+    assert opened["state"] == "open" and opened["retry_in"] == 30
+    assert reopened["state"] == "open" and reopened["trips"] == 1
+    assert result == "ok"
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_guarded_cycle_is_one_half_open_probe():
+    """Several retried fetches in one guarded block make one probe"""
+    # Arrange
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    policy, _ = _policy(attempts=2, breaker=breaker)
+    fetch = policy.wrap(AsyncMock(return_value="page"), guarded=False)
+    with pytest.raises(aiohttp.ClientResponseError):
+        await policy.call(AsyncMock(side_effect=_status_error(503)))
+    clock.now = 30
+
+    # Act
+    async with policy.guard():
+        pages = await asyncio.gather(*(fetch() for _ in range(3)))
+
+    # Assert
+    assert pages == ["page"] * 3
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_reopens_breaker():
+    # Arrange
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    policy, _ = _policy(attempts=1, breaker=breaker)
+    breaker.record_failure()
+    clock.now = 30
+
+    # Act
+    task = asyncio.create_task(policy.call(asyncio.sleep, 10))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # Assert
+    assert breaker.state == "open"
+    assert breaker.trips == 1
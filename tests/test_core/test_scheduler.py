@@ -0,0 +1,100 @@
+import pytest
+
+from core.scheduler import FixedRateScheduler
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def run(scheduler, clock, seconds):
+    """One scheduler tick: run lasting `seconds`, returns planned delay"""
+    scheduler.run_started()
+    clock.now += seconds
+    delay = scheduler.next_delay()
+    clock.now += delay
+    return delay
+
+
+def test_ticks_stay_on_grid_regardless_of_run_time():
+    # Arrange
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(clock=clock)
+    scheduler.start(10)
+
+    # Act
+    delays = [run(scheduler, clock, seconds) for seconds in (1, 4, 2.5)]
+
+    # Assert
+    assert delays == [9, 6, 7.5]
+    assert clock.now == 1030
+    assert scheduler.actual_period == 10
+
+
+def test_skip_drops_missed_ticks():
+    # Arrange
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(overrun="skip", clock=clock)
+    scheduler.start(10)
+
+    # Act
+    delay = run(scheduler, clock, 25)
+
+    # Assert
+    assert delay == 5
+    assert clock.now == 1030
+    assert scheduler.stats["missed"] == 2
+
+
+def test_catch_up_runs_missed_ticks_late():
+    # Arrange
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(overrun="catch_up", clock=clock)
+    scheduler.start(10)
+
+    # Act
+    delays = [run(scheduler, clock, seconds) for seconds in (25, 1, 1, 1)]
+
+    # Assert
+    assert delays == [0, 0, 3, 9]
+    assert scheduler.stats["missed"] == 0
+    assert scheduler.stats["late"] == 2
+
+
+def test_coalesce_restarts_grid_from_merged_run():
+    # Arrange
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(overrun="coalesce", clock=clock)
+    scheduler.start(10)
+
+    # Act
+    delays = [run(scheduler, clock, seconds) for seconds in (25, 1)]
+
+    # Assert
+    assert delays == [0, 9]
+    assert clock.now == 1035
+    assert scheduler.stats["missed"] == 1
+    assert scheduler.stats["late"] == 1
+
+
+def test_jitter_doesnt_accumulate():
+    # Arrange
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(jitter=2, clock=clock)
+    scheduler.start(10)
+
+    # Act
+    for _ in range(50):
+        run(scheduler, clock, 0)
+
+    # Assert
+    assert 1500 <= clock.now <= 1502
+
+
+def test_unknown_overrun_policy():
+    with pytest.raises(ValueError):
+        FixedRateScheduler(overrun="drop")
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.sinks import LatestMailbox, SnapshotSink
+
+
+@pytest.mark.asyncio
+async def test_mailbox_drops_oldest_when_full():
+    # Arrange
+    mailbox = LatestMailbox(maxsize=2)
+
+    # Act
+    for item in range(5):
+        mailbox.put(item)
+
+    # Assert
+    assert len(mailbox) == 2
+    assert mailbox.dropped == 3
+    assert [await mailbox.get(), await mailbox.get()] == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_sink_handles_inline_until_started():
+    # Arrange
+    handled = []
+
+    async def handler(value):
+        handled.append(value)
+
+    sink = SnapshotSink("test", handler)
+
+    # Act
+    await sink.submit(1)
+
+    # Assert
+    assert handled == [1]
+    assert sink.stats["processed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_running_sink_keeps_only_latest_snapshot():
+    # Arrange
+    handled = []
+    release = asyncio.Event()
+
+    async def handler(value):
+        handled.append(value)
+        await release.wait()
+
+    sink = SnapshotSink("test", handler, maxsize=1)
+    sink.start()
+
+    # Act
+    await sink.submit(0)
+    await asyncio.sleep(0)  # worker picks up 0 and blocks
+    for value in range(1, 5):
+        await sink.submit(value)
+    release.set()
+    await sink.drain()
+    await sink.close()
+
+    # Assert
+    assert handled == [0, 4]
+    assert sink.stats["dropped"] == 3
+    assert sink.stats["running"] is False
+
+
+@pytest.mark.asyncio
+async def test_backpressure_sink_waits_instead_of_dropping():
+    # Arrange
+    handled = []
+    release = asyncio.Event()
+
+    async def handler(value):
+        handled.append(value)
+        await release.wait()
+
+    sink = SnapshotSink("parse", handler, maxsize=1, backpressure=True)
+    sink.start()
+    await sink.submit(0)
+    await asyncio.sleep(0)  # worker picks up 0 and blocks
+    await sink.submit(1)  # fills the queue
+
+    # Act
+    third = asyncio.create_task(sink.submit(2))
+    await asyncio.sleep(0.01)
+    waited = not third.done()
+    release.set()
+    await third
+    await sink.close(drain=True)
+
+    # Assert
+    assert waited
+    assert handled == [0, 1, 2]
+    assert sink.stats["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sink_survives_handler_errors():
+    # Arrange
+    async def handler(value):
+        if value == "bad":
+            raise ValueError(value)
+
+    sink = SnapshotSink("test", handler)
+    sink.start()
+
+    # Act
+    await sink.submit("bad")
+    await sink.drain()
+    await sink.submit("good")
+    await sink.close(drain=True)
+
+    # Assert
+    assert sink.stats["errors"] == 1
+    assert sink.stats["processed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_blocking_sink_runs_off_the_event_loop():
+    # Arrange
+    threads = []
+    release = threading.Event()
+
+    def handler(value):
+        threads.append(threading.current_thread().name)
+        release.wait(timeout=5)
+
+    sink = SnapshotSink("excel", handler, blocking=True)
+    sink.start()
+
+    # Act
+    await sink.submit(1)
+    await asyncio.sleep(0.05)  # loop stays free while handler blocks
+    busy = sink.stats
+    release.set()
+    await sink.close(drain=True)
+
+    # Assert
+    assert threads == ["sink_excel_0"]
+    assert busy["lag_s"] >= 0.05
+    assert sink.stats["lag_s"] == 0
+    assert sink.stats["last_lag_ms"] >= 50
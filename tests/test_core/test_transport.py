@@ -0,0 +1,146 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.transport import HttpTransport, limited_request
+
+
+@pytest_asyncio.fixture
+async def local_server():
+    async def handler(request):
+        await asyncio.sleep(float(request.query.get("delay", 0)))
+        return web.Response(text="<html>ok</html>")
+
+    async def moved(request):
+        hops = int(request.match_info["hops"])
+        target = "/coins/" if hops == 1 else f"/moved/{hops - 1}"
+        raise web.HTTPFound(target)
+
+    app = web.Application()
+    app.router.add_get("/coins/", handler)
+    app.router.add_get("/moved/{hops}", moved)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_transport_reuses_connections(local_server):
+    # Arrange
+    transport = HttpTransport(limit=10, limit_per_host=2)
+    url = str(local_server.make_url("/coins/"))
+
+    # Act
+    for _ in range(3):
+        session = await transport.get_session()
+        async with session.get(url) as resp:
+            await resp.read()
+    stats = transport.stats
+    await transport.close()
+
+    # Assert
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 2
+    assert stats["reuse_ratio"] == round(2 / 3, 3)
+
+
+@pytest.mark.asyncio
+async def test_transport_session_settings():
+    # Arrange
+    transport = HttpTransport(
+        limit=20, limit_per_host=5, dns_cache_ttl=60, total_timeout=15
+    )
+
+    # Act
+    session = await transport.get_session()
+    same_session = await transport.get_session()
+    connector = session.connector
+    await transport.close()
+    new_session = await transport.get_session()
+    await transport.close()
+
+    # Assert
+    assert session is same_session
+    assert session.closed
+    assert new_session is not session
+    assert isinstance(session, aiohttp.ClientSession)
+    assert connector.limit == 20
+    assert connector.limit_per_host == 5
+    assert session.timeout.total == 15
+
+
+@pytest.mark.asyncio
+async def test_requests_wait_for_rate_limiter(local_server):
+    # Arrange
+    limiter = Mock(acquire=AsyncMock())
+    transport = HttpTransport()
+    url = str(local_server.make_url("/coins/"))
+
+    # Act
+    session = await transport.get_session()
+    for _ in range(2):
+        async with limited_request(session, "GET", url, limiter=limiter) as resp:
+            await resp.read()
+    await transport.close()
+
+    # Assert
+    assert limiter.acquire.await_count == 2
+    limiter.acquire.assert_awaited_with(local_server.host)
+
+
+@pytest.mark.asyncio
+async def test_every_redirect_hop_takes_a_token(local_server):
+    # Arrange
+    limiter = Mock(acquire=AsyncMock())
+    url = str(local_server.make_url("/moved/2"))
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        async with limited_request(session, "GET", url, limiter=limiter) as resp:
+            body = await resp.text()
+        with pytest.raises(aiohttp.TooManyRedirects):
+            async with limited_request(
+                session, "GET", url, limiter=limiter, max_redirects=1
+            ):
+                pass
+
+    # Assert
+    assert body == "<html>ok</html>"
+    assert str(resp.url).endswith("/coins/")
+    # 3 hops, then 2 before giving up
+    assert limiter.acquire.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_wait_doesnt_count_against_timeout(local_server):
+    # Arrange
+    async def slow_token(host):
+        await asyncio.sleep(0.4)
+
+    limiter = Mock(acquire=AsyncMock(side_effect=slow_token))
+    transport = HttpTransport(total_timeout=0.3)
+    url = str(local_server.make_url("/coins/"))
+    session = await transport.get_session()
+
+    # Act
+    async with limited_request(
+        session, "GET", url, limiter=limiter, params={"delay": "0.1"}
+    ) as resp:
+        body = await resp.text()
+    # timeout still applies to the request itself
+    with pytest.raises(asyncio.TimeoutError):
+        async with limited_request(
+            session, "GET", url, limiter=limiter, params={"delay": "0.5"}
+        ) as resp:
+            await resp.read()
+    await transport.close()
+
+    # Assert
+    assert body == "<html>ok</html>"
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from parser.fetch_strategy import FetchStrategy, LatencyTracker
+from parser.parser_site import SnapshotUnchanged
+
+
+@pytest.fixture
+def fetchers(monkeypatch):
+    """Scripted aiohttp / playwright fetchers: (delay, result or exception)"""
+    script = {"aiohttp": (0, b"aiohttp"), "playwright": (0, "playwright")}
+    calls = {"aiohttp": 0, "playwright": 0, "cancelled": []}
+
+    async def run(name):
+        calls[name] += 1
+        delay, result = script[name]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            calls["cancelled"].append(name)
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def fake_listing(session=None, url=None, validators=None, limiter=None):
+        return await run("aiohttp")
+
+    async def fake_rendered(pool, url=None):
+        return await run("playwright")
+
+    monkeypatch.setattr("parser.fetch_strategy.fetch_listing_page", fake_listing)
+    monkeypatch.setattr("parser.fetch_strategy.fetch_rendered_page", fake_rendered)
+    return script, calls
+
+
+@pytest.mark.asyncio
+async def test_hedged_fires_playwright_when_aiohttp_is_slow(fetchers):
+    # Arrange
+    script, calls = fetchers
+    script["aiohttp"] = (1, b"aiohttp")
+    strategy = FetchStrategy("hedged", pool=object(), hedge_delay=0.02)
+
+    # Act
+    html = await strategy.fetch(url="u")
+
+    # Assert
+    assert html == "playwright"
+    assert strategy.hedges == 1
+    assert calls["cancelled"] == ["aiohttp"]
+    assert strategy.stats["wins"] == {"aiohttp": 0, "playwright": 1}
+
+
+@pytest.mark.asyncio
+async def test_hedged_doesnt_hedge_fast_aiohttp(fetchers):
+    # Arrange
+    _, calls = fetchers
+    strategy = FetchStrategy("hedged", pool=object(), hedge_delay=0.5)
+
+    # Act
+    html = await strategy.fetch(url="u")
+
+    # Assert
+    assert html == b"aiohttp"
+    assert calls["playwright"] == 0
+    assert strategy.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_fires_playwright_when_aiohttp_fails(fetchers):
+    # Arrange
+    script, calls = fetchers
+    script["aiohttp"] = (0, ConnectionError("reset"))
+    strategy = FetchStrategy("hedged", pool=object(), hedge_delay=0.5)
+
+    # Act
+    html = await strategy.fetch(url="u")
+
+    # Assert
+    assert html == "playwright"
+    assert strategy.hedges == 1
+
+
+@pytest.mark.asyncio
+async def test_race_not_modified_wins_and_cancels_playwright(fetchers):
+    # Arrange
+    script, calls = fetchers
+    script["aiohttp"] = (0.01, SnapshotUnchanged("304"))
+    script["playwright"] = (1, "playwright")
+    strategy = FetchStrategy("race", pool=object())
+
+    # Act / Assert
+    with pytest.raises(SnapshotUnchanged):
+        await strategy.fetch(url="u")
+    assert calls["cancelled"] == ["playwright"]
+    assert strategy.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_race_raises_when_both_fail(fetchers):
+    # Arrange
+    script, _ = fetchers
+    script["aiohttp"] = (0, ConnectionError("reset"))
+    script["playwright"] = (0.01, TimeoutError("slow"))
+    strategy = FetchStrategy("race", pool=object())
+
+    # Act / Assert
+    with pytest.raises(TimeoutError):
+        await strategy.fetch(url="u")
+
+
+def test_hedge_delay_follows_observed_p95():
+    strategy = FetchStrategy("hedged", pool=object(), hedge_delay=2.0, min_samples=5)
+    assert strategy.current_hedge_delay() == 2.0
+
+    for ms in range(1, 21):
+        strategy.latency["aiohttp"].add(ms / 1000)
+
+    assert strategy.current_hedge_delay() == 0.019
+    assert strategy.stats["latency"]["aiohttp"]["p50_ms"] == 10.0
+
+
+def test_latency_tracker_window():
+    tracker = LatencyTracker(window=3)
+    for seconds in (5, 1, 2, 3):
+        tracker.add(seconds)
+
+    assert len(tracker) == 3
+    assert tracker.percentile(1) == 3
+
+
+def test_strategy_validates_mode():
+    with pytest.raises(ValueError):
+        FetchStrategy("fastest")
+    with pytest.raises(ValueError):
+        FetchStrategy("race")
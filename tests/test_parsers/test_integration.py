@@ -1,9 +1,15 @@
 import json
+from dataclasses import replace
+from unittest.mock import AsyncMock
+
 import aiohttp
 import pytest
 
+from benchmarks.standin import StandInUpstream
+from config.settings import Config
 from parser.parser_html import get_values_from_html_to_dict, save_values_to_json
 from parser.parser_site import get_html_for_top_100
+from services.MarketDataService import MarketDataService
 
 
 @pytest.mark.network
@@ -33,3 +39,80 @@ async def test_full_parsing_pipeline(tmp_path):
 
     for ticker in data.keys():
         assert data[ticker]["icon"].startswith("http")
+
+
+def stand_in_service(upstream, tmp_path, **overrides) -> MarketDataService:
+    config = replace(
+        Config.load(),
+        LISTING_URL=upstream.url,
+        JSON_PATH=str(tmp_path / "json.json"),
+        RATE_LIMIT_BACKEND="off",
+        FETCH_STRATEGY="aiohttp",
+        FETCH_BACKOFF_BASE=0.001,
+        **overrides,
+    )
+    service = MarketDataService(config=config)
+    service._should_update_icons_by_time = AsyncMock(return_value=False)
+    service._should_update_by_lost_icons = lambda json_path=None: False
+    return service
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_force_parse_against_stand_in_upstream(tmp_path):
+    # Arrange
+    async with StandInUpstream(rows=150, variants=1) as upstream:
+        service = stand_in_service(upstream, tmp_path)
+
+        # Act
+        await service.force_parse()
+        await service.force_parse()
+        await service.close()
+
+    # Assert
+    with open(tmp_path / "json.json") as f:
+        data = json.load(f)
+    assert len(data) == 150
+    assert service.cycles["updated"] == 1
+    # second cycle is answered by 304 Not Modified
+    assert service.cycles["no-change"] == 1
+    assert upstream.stats["statuses"] == {200: 1, 304: 1}
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_force_parse_retries_stand_in_errors(tmp_path):
+    # Arrange
+    async with StandInUpstream(rows=20, error_rate=1.0) as upstream:
+        service = stand_in_service(upstream, tmp_path, FETCH_RETRIES=2)
+
+        # Act
+        await service.force_parse()
+        await service.close()
+
+    # Assert
+    assert service.last_cycle == "failed"
+    assert upstream.stats["statuses"] == {503: 2}
+    assert service.resilience.stats["errors"] == {"server": 2}
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_force_parse_merges_stand_in_pages(tmp_path):
+    # Arrange
+    async with StandInUpstream(rows=20, variants=2) as upstream:
+        service = stand_in_service(upstream, tmp_path, LISTING_PAGES=2)
+
+        # Act
+        await service.force_parse()
+        await service.force_parse()
+        await service.close()
+
+    # Assert
+    with open(tmp_path / "json.json") as f:
+        data = json.load(f)
+    # page 2 continues page 1 instead of repeating it
+    assert sorted(data) == sorted(f"C{i}" for i in range(40))
+    # each page rotates its own versions, so both cycles change
+    assert service.cycles["updated"] == 2
+    assert upstream.stats["statuses"] == {200: 4}
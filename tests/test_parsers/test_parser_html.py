@@ -6,13 +6,22 @@ from unittest.mock import Mock, mock_open
 import pytest
 
 from parser.parser_html import (
+    ICON_URL,
+    NextDataError,
+    coin_id_from_icon,
+    extract_next_data,
+    extract_quotes_and_icons,
     find_elem_by_ticker,
+    find_elem_in_index,
+    index_listing,
     get_price_in_value,
     get_values_from_html_to_dict,
+    get_values_from_next_data,
     save_values_to_json,
     parse_icons,
     lost_icons_count,
 )
+from benchmarks.page_factory import _row, build_listing, build_next_data
 from tests.test_parsers.conftest import some_coin_data
 
 
@@ -76,6 +85,29 @@ def test_save_values_to_json(tmp_path):
     assert d == test_dict
 
 
+def test_save_coin_quotes_to_json(tmp_path):
+    file_path = tmp_path / "json.json"
+    html_path = Path(__file__).parent.parent / "fixtures" / "next_data_values.html"
+    quotes = get_values_from_html_to_dict(filepath=html_path)
+
+    save_values_to_json(data=quotes, filepath=file_path)
+
+    with open(file_path) as f:
+        d = json.load(f)
+
+    assert d["BTC"] == quotes["BTC"].to_dict()
+    assert list(d["ETH"]) == [
+        "ticker",
+        "price",
+        "name",
+        "icon",
+        "id",
+        "change_1hr",
+        "change_24hr",
+        "volume_24hr",
+    ]
+
+
 def test_parse_icons():
     html_path = Path(__file__).parent.parent / "fixtures" / "combination_values.html"
 
@@ -87,6 +119,36 @@ def test_parse_icons():
     assert result["TSLA"] == "https://example.com/"
 
 
+def test_extract_quotes_and_icons_single_pass():
+    html_path = Path(__file__).parent.parent / "fixtures" / "combination_values.html"
+
+    quotes, icons = extract_quotes_and_icons(
+        filepath=html_path, skipping_json_expanded_data=True
+    )
+
+    assert quotes == get_values_from_html_to_dict(
+        filepath=html_path, skipping_json_expanded_data=True
+    )
+    assert icons == parse_icons(filepath=html_path)
+
+
+def test_extract_quotes_and_icons_without_next_data(monkeypatch):
+    # Arrange
+    html_path = Path(__file__).parent.parent / "fixtures" / "span_values.html"
+    mock_logger = Mock()
+    monkeypatch.setattr("parser.parser_html.logger", mock_logger)
+
+    # Act
+    quotes, icons = extract_quotes_and_icons(filepath=html_path)
+
+    # Assert
+    mock_logger.warning.assert_called_once_with(
+        "__NEXT_DATA__ not found, parsing table only"
+    )
+    assert len(quotes) == 7
+    assert "DOGE" not in icons
+
+
 def test_lost_icons():
     html_path = Path(__file__).parent.parent / "fixtures" / "lost_icons.json"
 
@@ -215,6 +277,117 @@ def test_find_elem_by_id(coins_data):
     assert BTC["name"] == "Bitcoin"
 
 
+def test_index_listing(coins_data):
+    # Arrange
+    data = coins_data
+
+    # Act
+    by_symbol, by_id = index_listing(data)
+
+    # Assert
+    assert by_symbol["BTC"] == [data[1]]
+    assert by_id[38442]["symbol"] == "CMC20"
+    assert find_elem_in_index(by_symbol, "BTC") is data[1]
+    assert find_elem_in_index(by_symbol, "UNKNOWN") is None
+
+
+def test_find_elem_in_index_with_colliding_tickers():
+    # Arrange
+    data = [
+        {"id": 1, "symbol": "UNI", "name": "Uniswap"},
+        {"id": 2, "symbol": "UNI", "name": "Universe"},
+    ]
+    by_symbol, _ = index_listing(data)
+
+    # Act & Assert
+    assert find_elem_in_index(by_symbol, "UNI")["id"] == 1
+    assert find_elem_in_index(by_symbol, "UNI", "Universe")["id"] == 2
+    assert find_elem_in_index(by_symbol, "UNI", "Unknown")["id"] == 1
+
+
+def test_parse_html_with_next_data_duplicate_tickers():
+    html_path = Path(__file__).parent.parent / "fixtures" / "next_data_values.html"
+
+    result = get_values_from_html_to_dict(filepath=html_path)
+
+    assert list(result) == ["BTC", "ETH", "UNI"]
+    assert result["UNI"]["name"] == "Uniswap"
+    assert result["UNI"]["price"] == 5.42
+    assert result["BTC"]["icon"] == "https://example.com/"
+    assert (
+        result["ETH"]["icon"]
+        == "https://s2.coinmarketcap.com/static/img/coins/64x64/1027.png"
+    )
+    assert result["ETH"]["change_24hr"] == 1.5 / 100
+
+
+def test_parse_html_from_bytes_in_memory():
+    html_path = Path(__file__).parent.parent / "fixtures" / "span_values.html"
+
+    result = get_values_from_html_to_dict(
+        html=html_path.read_bytes(), skipping_json_expanded_data=True
+    )
+    icons = parse_icons(html=html_path.read_bytes())
+
+    assert len(result) == 7
+    assert result["BTC"]["price"] == 65432.10
+    assert icons["BTC"] == "https://example.com/"
+
+
+def test_extract_next_data_from_bytes_and_str():
+    html_path = Path(__file__).parent.parent / "fixtures" / "next_data_values.html"
+
+    from_bytes = extract_next_data(html_path.read_bytes())
+    from_str = extract_next_data(html_path.read_text())
+
+    assert from_bytes == from_str
+    assert "props" in from_bytes
+    assert extract_next_data(b"<html><body></body></html>") is None
+
+
+def test_get_values_from_next_data_matches_table_parser():
+    html = (
+        Path(__file__).parent.parent / "fixtures" / "next_data_values.html"
+    ).read_bytes()
+
+    json_only = get_values_from_next_data(html)
+    table = get_values_from_html_to_dict(html=html)
+
+    assert list(json_only) == list(table)
+    for ticker, row in json_only.items():
+        for key in ["name", "price", "change_1hr", "change_24hr", "volume_24hr"]:
+            assert row[key] == table[ticker][key]
+    assert json_only["UNI"]["name"] == "Uniswap"
+    assert json_only["BTC"]["icon"].endswith("/64x64/1.png")
+
+
+def test_get_values_from_next_data_raises_on_changed_schema():
+    html = '<script id="__NEXT_DATA__" type="application/json">{"props": {}}</script>'
+
+    with pytest.raises(NextDataError):
+        get_values_from_next_data(html)
+
+    with pytest.raises(NextDataError, match="not found"):
+        get_values_from_next_data("<html></html>")
+
+
+def test_json_only_falls_back_to_table_parser(monkeypatch):
+    # Arrange
+    html_path = Path(__file__).parent.parent / "fixtures" / "span_values.html"
+    mock_logger = Mock()
+    monkeypatch.setattr("parser.parser_html.logger", mock_logger)
+
+    # Act
+    result = get_values_from_html_to_dict(
+        filepath=html_path, skipping_json_expanded_data=False, json_only=True
+    )
+
+    # Assert
+    mock_logger.warning.assert_called_once()
+    assert len(result) == 7
+    assert result["BTC"]["price"] == 65432.10
+
+
 def test_skipping_json_expanded_data_param_true(monkeypatch):
     # Arrange
     json_mock = Mock()
@@ -271,3 +444,31 @@ def test_skipping_json_expanded_data_param_false(monkeypatch):
 
     # Assert
     assert json_mock.loads.called
+
+
+def test_coin_id_from_icon():
+    assert coin_id_from_icon(ICON_URL.format(id=1027)) == 1027
+    assert coin_id_from_icon("data:image/gif;base64,R0lGOD") is None
+    assert coin_id_from_icon(None) is None
+
+
+def test_loaded_logo_resolves_record_by_coin_id():
+    """Row ticker that isn't a listing symbol is still priced via logo id"""
+    # Arrange
+    listing = build_listing(2)
+    renamed = dict(listing[1], symbol="RENAMED")
+    rows = _row(listing[0], with_icon=False) + _row(renamed, with_icon=True)
+    html = (
+        "<html><body><table><tr><th>#</th></tr><tr><td>header</td></tr>"
+        f"{rows}</table>"
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(build_next_data(listing))}</script></body></html>"
+    )
+
+    # Act
+    quotes, _ = extract_quotes_and_icons(html=html)
+
+    # Assert
+    assert quotes["RENAMED"]["price"] == listing[1]["quotes"][-1]["price"]
+    assert quotes["C0"]["price"] == listing[0]["quotes"][-1]["price"]
+    assert quotes["C0"]["icon"] == ICON_URL.format(id=listing[0]["id"])
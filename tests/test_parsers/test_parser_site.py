@@ -1,6 +1,23 @@
+from pathlib import Path
+
+import aiohttp
 import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from parser.parser_html import extract_next_data, get_values_from_html_to_dict
+from parser.parser_site import (
+    ACCEPT_ENCODING,
+    fetch_listing_page,
+    get_html_by_playwright,
+    get_html_for_top_100,
+    render_listing,
+    validate_icons,
+    wait_for_icons,
+)
 
-from parser.parser_site import get_html_for_top_100, get_html_by_playwright
+FIXTURES = Path(__file__).parent.parent / "fixtures"
 
 
 @pytest.mark.network
@@ -47,3 +64,163 @@ async def test_get_full_html_file(tmp_path):
     assert "bitcoin" in content.lower()  # A keyword expected to be on the page
     assert "btc logo" in content.lower()
     assert "pi logo" in content.lower()
+
+
+@pytest_asyncio.fixture
+async def gzip_server():
+    """Local stand-in for the listing which compresses its answer"""
+    body = (FIXTURES / "next_data_values.html").read_bytes()
+    seen = {}
+
+    async def listing(request):
+        seen["accept_encoding"] = request.headers.get("Accept-Encoding")
+        resp = web.Response(body=body, content_type="text/html")
+        resp.enable_compression(web.ContentCoding.gzip)
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/coins/", listing)
+    server = TestServer(app)
+    await server.start_server()
+    yield str(server.make_url("/coins/")), body, seen
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_listing_page_streams_compressed_body(gzip_server):
+    """Tests that compression is negotiated and body is decoded chunk by chunk"""
+    # Arrange
+    url, body, seen = gzip_server
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        html = await fetch_listing_page(session, url=url)
+
+    # Assert
+    assert seen["accept_encoding"] == ACCEPT_ENCODING
+    assert "gzip" in ACCEPT_ENCODING
+    assert isinstance(html, bytearray)
+    assert html == body
+
+
+@pytest.mark.asyncio
+async def test_streamed_buffer_is_parsed_in_place(gzip_server):
+    """Tests that both parsers accept the streamed buffer as is"""
+    # Arrange
+    url, _, _ = gzip_server
+    async with aiohttp.ClientSession() as session:
+        html = await fetch_listing_page(session, url=url)
+
+    # Act
+    next_data = extract_next_data(html)
+    json_only = get_values_from_html_to_dict(html=html, json_only=True)
+    table = get_values_from_html_to_dict(html=html)
+
+    # Assert
+    assert next_data is not None
+    assert json_only["BTC"]["price"] == table["BTC"]["price"]
+
+
+class FakeListingPage:
+    """Playwright page stand-in, every scroll returns next [rows, loaded, bottom]"""
+
+    def __init__(self, states):
+        self.states = iter(states)
+        self.scrolls = 0
+        self.last = None
+
+    async def evaluate(self, script):
+        self.scrolls += 1
+        self.last = next(self.states, self.last)
+        return self.last
+
+    async def goto(self, url, wait_until=None):
+        return type("Response", (), {"status": 200})()
+
+    async def content(self):
+        return "<html></html>"
+
+
+@pytest.mark.asyncio
+async def test_wait_for_icons_exits_early_when_complete():
+    # Arrange
+    page = FakeListingPage([[100, 20, False], [100, 60, False], [100, 100, False]])
+
+    # Act
+    result = await wait_for_icons(page, poll_interval=0)
+
+    # Assert
+    assert page.scrolls == 3
+    assert result["reason"] == "complete"
+    assert result["missing"] == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_for_icons_stops_when_count_stalls():
+    # Arrange
+    page = FakeListingPage([[100, 20, False], [100, 95, True]])
+
+    # Act
+    result = await wait_for_icons(page, poll_interval=0, stable_polls=3)
+
+    # Assert
+    assert page.scrolls == 5
+    assert result["reason"] == "stalled"
+    assert result["loaded"] == 95
+    assert result["missing"] == 5
+
+
+@pytest.mark.asyncio
+async def test_wait_for_icons_gives_up_at_deadline():
+    # Arrange
+    page = FakeListingPage([[100, 10, False]])
+
+    # Act
+    result = await wait_for_icons(page, deadline=0.05, poll_interval=0.01)
+
+    # Assert
+    assert result["reason"] == "deadline"
+    assert result["missing"] == 90
+    assert result["elapsed"] < 1
+
+
+@pytest.mark.asyncio
+async def test_render_listing_reports_readiness():
+    # Arrange
+    page = FakeListingPage([[3, 3, True]])
+    readiness = {}
+
+    # Act
+    html = await render_listing(page, readiness=readiness)
+
+    # Assert
+    assert html == "<html></html>"
+    assert readiness["reason"] == "complete"
+
+
+@pytest.mark.asyncio
+async def test_validate_icons_reports_unavailable():
+    """Tests that icons are checked with HEAD against local stand-in server"""
+
+    # Arrange
+    async def logo(request):
+        if request.match_info["id"] == "404":
+            return web.Response(status=404)
+        return web.Response(body=b"png", content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/64x64/{id}.png", logo)
+    server = TestServer(app)
+    await server.start_server()
+    icons = {
+        ticker: str(server.make_url(f"/64x64/{id}.png"))
+        for ticker, id in [("BTC", 1), ("ETH", 1027), ("DEAD", 404)]
+    }
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        invalid = await validate_icons(session, icons, concurrency=2)
+    await server.close()
+
+    # Assert
+    assert invalid == {"DEAD"}
@@ -0,0 +1,344 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from parser import pipeline
+from parser.snapshot import CoinQuote
+from parser.pipeline import (
+    ContentHashCache,
+    SnapshotUnchanged,
+    fetch_and_parse,
+    fetch_and_parse_pages,
+    fetch_pages,
+    merge_pages,
+    parse_pages,
+)
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+
+@pytest.fixture
+def next_data_html():
+    return (FIXTURES / "next_data_values.html").read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_without_html_sink(monkeypatch, next_data_html):
+    """Tests that body is parsed in memory and nothing is written to disk"""
+    # Arrange
+    monkeypatch.setattr(
+        "parser.pipeline.fetch_listing_page", AsyncMock(return_value=next_data_html)
+    )
+    save_mock = AsyncMock()
+    monkeypatch.setattr("parser.pipeline.save_html", save_mock)
+
+    # Act
+    result = await fetch_and_parse()
+
+    # Assert
+    assert list(result) == ["BTC", "ETH", "UNI"]
+    save_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_persists_html_in_background(
+    monkeypatch, tmp_path, next_data_html
+):
+    """Tests that raw html is saved by side sink"""
+    # Arrange
+    html_path = tmp_path / "site.html"
+    monkeypatch.setattr(
+        "parser.pipeline.fetch_listing_page", AsyncMock(return_value=next_data_html)
+    )
+
+    # Act
+    result = await fetch_and_parse(html_path=html_path)
+    await asyncio.gather(*pipeline._background_tasks)
+
+    # Assert
+    assert result["BTC"]["name"] == "Bitcoin"
+    assert html_path.read_bytes() == next_data_html
+
+
+@pytest.mark.asyncio
+async def test_failed_html_sink_doesnt_break_parsing(
+    monkeypatch, tmp_path, next_data_html
+):
+    """Tests that errors in side sink are only logged"""
+    # Arrange
+    html_path = tmp_path / "missing_dir" / "site.html"
+    monkeypatch.setattr(
+        "parser.pipeline.fetch_listing_page", AsyncMock(return_value=next_data_html)
+    )
+
+    # Act
+    result = await fetch_and_parse(html_path=html_path)
+    await asyncio.gather(*pipeline._background_tasks, return_exceptions=True)
+
+    # Assert
+    assert "BTC" in result
+    assert not pipeline._background_tasks
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_pages_merges_by_global_rank(monkeypatch):
+    """Tests that pages arriving out of order are merged in page order"""
+    # Arrange
+    pages = {
+        "https://coinmarketcap.com/coins/": (
+            FIXTURES / "span_values.html"
+        ).read_bytes(),
+        "https://coinmarketcap.com/coins/?page=2": (
+            FIXTURES / "p_values.html"
+        ).read_bytes(),
+    }
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_fetch(session, url):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        # first page arrives last
+        await asyncio.sleep(0.02 if url.endswith("/coins/") else 0)
+        in_flight["now"] -= 1
+        return pages.get(url, b"<html></html>")
+
+    monkeypatch.setattr("parser.pipeline.fetch_listing_page", fake_fetch)
+
+    # Act
+    result = await fetch_and_parse_pages(
+        3, concurrency=2, skipping_json_expanded_data=True
+    )
+
+    # Assert
+    assert in_flight["max"] == 2
+    assert len(result) == 12
+    assert list(result)[:2] == ["BTC", "ETH"]
+    assert result["BTC"]["price"] == 65432.10
+    assert result["DOGE"]["id"] == 6
+    assert result["XRP"]["id"] == 7
+    assert [row["id"] for row in result.values()] == list(range(12))
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_pages_cancels_pages_after_failure(monkeypatch):
+    """Tests that a failed page doesn't leave other pages running"""
+    # Arrange
+    cancelled = []
+
+    async def fake_fetch(session, url):
+        if url.endswith("?page=2"):
+            raise ConnectionError("reset")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return b"<html></html>"
+
+    monkeypatch.setattr("parser.pipeline.fetch_listing_page", fake_fetch)
+
+    # Act
+    with pytest.raises(ConnectionError):
+        await fetch_and_parse_pages(3, concurrency=3)
+
+    # Assert
+    assert sorted(cancelled) == [
+        "https://coinmarketcap.com/coins/",
+        "https://coinmarketcap.com/coins/?page=3",
+    ]
+
+
+def _quote(ticker, id):
+    return CoinQuote(ticker, 1.0, ticker.lower(), "", id, 0.0, None, None)
+
+
+def test_merge_pages_keeps_first_place():
+    result = merge_pages(
+        {
+            2: {"ETH": _quote("ETH", 0), "SOL": _quote("SOL", 1)},
+            1: {"BTC": _quote("BTC", 0), "ETH": _quote("ETH", 1)},
+        }
+    )
+
+    assert list(result) == ["BTC", "ETH", "SOL"]
+    assert result["SOL"]["id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_skips_unchanged_page(monkeypatch, next_data_html):
+    """Tests that the same listing isn't parsed twice"""
+    # Arrange
+    cache = ContentHashCache()
+    # markup around __NEXT_DATA__ changed, data didn't
+    bodies = [next_data_html, next_data_html.replace(b"<title>", b"<title>v2 ")]
+    monkeypatch.setattr(
+        "parser.pipeline.fetch_listing_page", AsyncMock(side_effect=bodies)
+    )
+    parse_mock = Mock(wraps=pipeline.get_values_from_html_to_dict)
+    monkeypatch.setattr("parser.pipeline.get_values_from_html_to_dict", parse_mock)
+
+    # Act
+    first = await fetch_and_parse(cache=cache)
+    with pytest.raises(SnapshotUnchanged):
+        await fetch_and_parse(cache=cache)
+
+    # Assert
+    assert "BTC" in first
+    parse_mock.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_pages_reuses_unchanged_pages(monkeypatch):
+    """Tests that only changed pages are parsed again"""
+    # Arrange
+    cache = ContentHashCache()
+    span = (FIXTURES / "span_values.html").read_bytes()
+    p = (FIXTURES / "p_values.html").read_bytes()
+    responses = {
+        "https://coinmarketcap.com/coins/": iter([span, span, span]),
+        "https://coinmarketcap.com/coins/?page=2": iter([p, p, span]),
+    }
+
+    async def fake_fetch(session, url, validators=None):
+        return next(responses[url])
+
+    monkeypatch.setattr("parser.pipeline.fetch_listing_page", fake_fetch)
+    parse_mock = Mock(wraps=pipeline.get_values_from_html_to_dict)
+    monkeypatch.setattr("parser.pipeline.get_values_from_html_to_dict", parse_mock)
+    kwargs = {"concurrency": 1, "cache": cache, "skipping_json_expanded_data": True}
+
+    # Act
+    first = await fetch_and_parse_pages(2, **kwargs)
+    with pytest.raises(SnapshotUnchanged):
+        await fetch_and_parse_pages(2, **kwargs)
+    third = await fetch_and_parse_pages(2, **kwargs)
+
+    # Assert
+    assert len(first) == 12
+    assert list(third) == list(first)[:7]
+    # 2 pages first time, nothing second time, only changed page 2 third time
+    assert parse_mock.call_count == 3
+
+
+@pytest_asyncio.fixture
+async def conditional_server(next_data_html):
+    """Local stand-in for the listing which honours If-None-Match"""
+    state = {"etag": '"v1"', "body": next_data_html, "requests": []}
+
+    async def listing(request):
+        state["requests"].append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == state["etag"]:
+            return web.Response(status=304)
+        return web.Response(
+            body=state["body"],
+            headers={"ETag": state["etag"], "Content-Type": "text/html"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/coins/", listing)
+    server = TestServer(app)
+    await server.start_server()
+    state["url"] = str(server.make_url("/coins/"))
+    yield state
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_not_modified(monkeypatch, conditional_server):
+    """Tests that 304 answer skips parsing and a new ETag is parsed again"""
+    # Arrange
+    cache = ContentHashCache()
+    parse_mock = Mock(wraps=pipeline.get_values_from_html_to_dict)
+    monkeypatch.setattr("parser.pipeline.get_values_from_html_to_dict", parse_mock)
+    kwargs = {"cache": cache, "base_url": conditional_server["url"]}
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        first = await fetch_and_parse(session, **kwargs)
+        with pytest.raises(SnapshotUnchanged):
+            await fetch_and_parse(session, **kwargs)
+        conditional_server["etag"] = '"v2"'
+        conditional_server["body"] = conditional_server["body"].replace(
+            b"70184.15", b"70000.5"
+        )
+        third = await fetch_and_parse(session, **kwargs)
+
+    # Assert
+    assert conditional_server["requests"] == [None, '"v1"', '"v1"']
+    assert parse_mock.call_count == 2
+    assert "BTC" in first
+    assert third["BTC"]["price"] != first["BTC"]["price"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_refetches_after_cache_clear(conditional_server):
+    """Tests that cleared cache forgets validators and downloads full page"""
+    # Arrange
+    cache = ContentHashCache()
+    kwargs = {"cache": cache, "base_url": conditional_server["url"]}
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        await fetch_and_parse(session, **kwargs)
+        cache.clear()
+        result = await fetch_and_parse(session, **kwargs)
+
+    # Assert
+    assert conditional_server["requests"] == [None, None]
+    assert "BTC" in result
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_stages(monkeypatch, conditional_server):
+    """Tests that fetch stage only downloads and parse stage reuses
+    cached result of pages answered by 304"""
+    # Arrange
+    cache = ContentHashCache()
+    parse_mock = Mock(wraps=pipeline.get_values_from_html_to_dict)
+    monkeypatch.setattr("parser.pipeline.get_values_from_html_to_dict", parse_mock)
+    kwargs = {"cache": cache, "base_url": conditional_server["url"]}
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        first = await fetch_pages(1, session, **kwargs)
+        fetched_only = parse_mock.call_count
+        data = await parse_pages(first, cache=cache)
+        second = await fetch_pages(1, session, **kwargs)
+        with pytest.raises(SnapshotUnchanged):
+            await parse_pages(second, cache=cache)
+
+    # Assert
+    assert fetched_only == 0
+    assert "BTC" in data
+    assert second == {1: None}
+    assert parse_mock.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_parse_stage_drops_validators(monkeypatch, conditional_server):
+    """Tests that a listing whose parse failed is downloaded in full again,
+    not answered by 304 without a parse result"""
+    # Arrange
+    cache = ContentHashCache()
+    kwargs = {"cache": cache, "base_url": conditional_server["url"]}
+    monkeypatch.setattr(
+        "parser.pipeline.get_values_from_html_to_dict",
+        Mock(side_effect=ValueError("broken markup")),
+    )
+
+    # Act
+    async with aiohttp.ClientSession() as session:
+        htmls = await fetch_pages(1, session, **kwargs)
+        with pytest.raises(ValueError):
+            await parse_pages(htmls, cache=cache)
+        again = await fetch_pages(1, session, **kwargs)
+
+    # Assert
+    assert conditional_server["requests"] == [None, None]
+    assert again[1] is not None
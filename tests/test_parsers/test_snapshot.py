@@ -0,0 +1,95 @@
+from dataclasses import FrozenInstanceError
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from parser.parser_html import get_values_from_html_to_dict
+from parser.snapshot import (
+    CoinQuote,
+    ColumnarSnapshot,
+    quotes_from_dicts,
+    quotes_to_dicts,
+)
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+
+@pytest.fixture
+def snapshot_dict():
+    return get_values_from_html_to_dict(filepath=FIXTURES / "next_data_values.html")
+
+
+@pytest.fixture
+def table_only_dict():
+    return get_values_from_html_to_dict(
+        filepath=FIXTURES / "span_values.html", skipping_json_expanded_data=True
+    )
+
+
+def test_round_trip_to_dict(snapshot_dict, table_only_dict):
+    columnar = ColumnarSnapshot.from_dict(snapshot_dict)
+    # missing change_24hr/volume_24hr are stored as NaN and restored as None
+    columnar_table_only = ColumnarSnapshot.from_dict(table_only_dict)
+
+    assert columnar.to_dict() == quotes_to_dicts(snapshot_dict)
+    assert columnar_table_only.to_dict() == quotes_to_dicts(table_only_dict)
+    assert quotes_from_dicts(columnar.to_dict()) == snapshot_dict
+
+
+def test_coin_quote_is_immutable_record(snapshot_dict):
+    quote = snapshot_dict["BTC"]
+
+    with pytest.raises(FrozenInstanceError):
+        quote.price = 1.0
+    with pytest.raises(KeyError):
+        quote["unknown"]
+    assert not hasattr(quote, "__dict__")
+    assert quote["price"] == quote.price == 70184.15
+    assert quote.get("unknown", "default") == "default"
+    assert CoinQuote.from_dict(quote.to_dict()) == quote
+
+
+def test_columns_are_contiguous_float64(snapshot_dict):
+    snapshot = ColumnarSnapshot.from_dict(snapshot_dict)
+
+    for column in ["price", "change_1hr", "change_24hr", "volume_24hr"]:
+        assert snapshot.columns[column].dtype == np.float64
+        assert snapshot.columns[column].flags["C_CONTIGUOUS"]
+    assert len(snapshot) == 3
+    assert "ETH" in snapshot
+    assert snapshot.index["UNI"] == 2
+    assert snapshot.get("UNI", "name") == "Uniswap"
+    assert snapshot.get("BTC", "price") == 70184.15
+
+
+def test_sort_filter_top(snapshot_dict):
+    snapshot = ColumnarSnapshot.from_dict(snapshot_dict)
+
+    by_price = snapshot.sort_by("price")
+    top_volume = snapshot.top(2, by="volume_24hr")
+    growing = snapshot.filter(snapshot.columns["change_24hr"] > 0)
+
+    assert list(by_price.to_dict()) == ["UNI", "ETH", "BTC"]
+    assert list(top_volume.to_dict()) == ["BTC", "ETH"]
+    assert list(growing.index) == ["ETH"]
+    assert top_volume.index == {"BTC": 0, "ETH": 1}
+
+
+def test_aggregate(snapshot_dict, table_only_dict):
+    stats = ColumnarSnapshot.from_dict(snapshot_dict).aggregate("price")
+    missing = ColumnarSnapshot.from_dict(table_only_dict).aggregate("volume_24hr")
+
+    assert stats["count"] == 3
+    assert stats["max"] == 70184.15
+    assert math.isclose(stats["sum"], 70184.15 + 2051.43 + 5.42)
+    assert missing == {"count": 0, "min": None, "max": None, "mean": None, "sum": 0.0}
+
+
+def test_empty_snapshot():
+    snapshot = ColumnarSnapshot.from_dict({})
+
+    assert len(snapshot) == 0
+    assert snapshot.to_dict() == {}
+    assert snapshot.top(5).to_dict() == {}
@@ -1,11 +1,20 @@
 import asyncio
+import dataclasses
 import json
+import time
+from pathlib import Path
+
 import pytest
 from unittest.mock import ANY, AsyncMock, MagicMock, Mock, patch
-from datetime import datetime, timedelta
-from freezegun import freeze_time
+from core.scheduler import FixedRateScheduler
+from core.sinks import SnapshotSink
+from parser.parser_html import lost_icons_in
+from parser.pipeline import SnapshotUnchanged
 from services.MarketDataService import MarketDataService
 import aiohttp
+from yarl import URL
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
 
 
 @pytest.mark.network
@@ -116,6 +125,234 @@ def test_should_update_by_lost_doesnt_fail(monkeypatch):
     assert result is True
 
 
+@pytest.mark.asyncio
+async def test_lost_icons_are_counted_once_per_snapshot(monkeypatch, tmp_path):
+    """Tests that icon refresh decision uses metadata instead of json file"""
+
+    # Arrange
+    service = MarketDataService()
+    service.settings = Mock()
+    service.settings.get.return_value = 2
+    service.redis = AsyncMock()
+    service.redis.hgetall.return_value = {}
+    data = {
+        "BTC": {"ticker": "BTC", "icon": ""},
+        "ETH": {"ticker": "ETH", "icon": ""},
+        "SOL": {"ticker": "SOL", "icon": "https://example.com/"},
+    }
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    monkeypatch.setattr(service, "force_update_icons", AsyncMock(return_value=None))
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_pages",
+        AsyncMock(return_value={1: "<html>"}),
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.parse_pages", AsyncMock(return_value=data)
+    )
+    lost_icons_count_mock = Mock(return_value=0)
+    monkeypatch.setattr(
+        "services.MarketDataService.lost_icons_count", lost_icons_count_mock
+    )
+
+    # Act
+    await service.force_parse(tmp_path / "json.json")
+    result = service._should_update_by_lost_icons("dummy_path")
+    await service.close()
+
+    # Assert
+    assert result is True
+    assert service.snapshot_meta["lost_icons"] == 2
+    lost_icons_count_mock.assert_not_called()
+    service.redis.hset.assert_awaited_once_with(
+        "snapshot:meta",
+        mapping={"coins": "3", "lost_icons": "2", "updated_at": ANY},
+    )
+
+
+@pytest.mark.asyncio
+async def test_snapshot_meta_is_restored_from_redis():
+    """Tests that metadata saved by previous run is loaded from redis"""
+
+    # Arrange
+    service = MarketDataService()
+    service.redis = AsyncMock()
+    service.redis.hgetall.return_value = {
+        "coins": "100",
+        "lost_icons": "7",
+        "updated_at": "2026-04-20T10:00:00",
+    }
+
+    # Act
+    await service._load_snapshot_meta()
+
+    # Assert
+    assert service.snapshot_meta == {
+        "coins": 100,
+        "lost_icons": 7,
+        "updated_at": "2026-04-20T10:00:00",
+    }
+
+
+@pytest.mark.asyncio
+async def test_fetchers_use_shared_session(monkeypatch):
+    """Tests that listing is fetched over the service connection pool"""
+
+    # Arrange
+    service = MarketDataService()
+    fetch_mock = AsyncMock(return_value={1: "<html>"})
+    monkeypatch.setattr("services.MarketDataService.fetch_pages", fetch_mock)
+    monkeypatch.setattr(
+        "services.MarketDataService.parse_pages", AsyncMock(return_value={})
+    )
+
+    # Act
+    await service._fetch_snapshot()
+    await service._fetch_snapshot()
+    session = await service._get_session()
+    await service.close()
+
+    # Assert
+    assert fetch_mock.call_args_list[0].kwargs["session"] is session
+    assert fetch_mock.call_args_list[1].kwargs["session"] is session
+    assert fetch_mock.call_args.kwargs["fetcher"] is service._fetcher
+    assert service.get_status()["transport"]["requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_force_update_icons_without_browser(monkeypatch, tmp_path):
+    """Tests that icons are built from coin ids and playwright isn't used"""
+
+    # Arrange
+    service = MarketDataService()
+    service.settings = Mock(get=Mock(return_value=False))
+    html = (FIXTURES / "next_data_values.html").read_bytes()
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_listing_page", AsyncMock(return_value=html)
+    )
+    playwright_mock = AsyncMock()
+    monkeypatch.setattr(
+        "services.MarketDataService.get_html_by_playwright", playwright_mock
+    )
+    icons_path = tmp_path / "icons.json"
+    prefetch_mock = AsyncMock()
+    monkeypatch.setattr(service.icon_cache, "prefetch", prefetch_mock)
+
+    # Act
+    quotes = await service.force_update_icons(json_path=icons_path)
+    await service._icon_prefetch
+
+    # Assert
+    playwright_mock.assert_not_called()
+    prefetch_mock.assert_awaited_once_with(
+        ANY, json.loads(icons_path.read_text()), limiter=service.rate_limiter
+    )
+    icons = json.loads(icons_path.read_text())
+    assert icons["BTC"] == quotes["BTC"].icon
+    assert icons["BTC"].endswith("/64x64/1.png")
+    assert set(icons) == set(quotes)
+
+
+@pytest.mark.asyncio
+async def test_force_update_icons_skipped_while_circuit_is_open(monkeypatch):
+    """Tests that icons update doesn't hit upstream while breaker is open"""
+
+    # Arrange
+    service = MarketDataService()
+    fetch_mock = AsyncMock()
+    monkeypatch.setattr("services.MarketDataService.fetch_listing_page", fetch_mock)
+    playwright_mock = AsyncMock()
+    monkeypatch.setattr(
+        "services.MarketDataService.get_html_by_playwright", playwright_mock
+    )
+    for _ in range(service.config.BREAKER_FAILURES):
+        service.resilience.breaker.record_failure()
+
+    # Act
+    quotes = await service.force_update_icons()
+
+    # Assert
+    assert quotes is None
+    fetch_mock.assert_not_called()
+    playwright_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_force_update_icons_falls_back_to_browser_for_unresolved(
+    monkeypatch, tmp_path
+):
+    """Tests that only icons failed HEAD validation are taken from rendered page"""
+
+    # Arrange
+    service = MarketDataService()
+    service.config = dataclasses.replace(service.config, ICONS_VALIDATE=True)
+    service.settings = Mock(get=Mock(return_value=False))
+    html = (FIXTURES / "next_data_values.html").read_bytes()
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_listing_page", AsyncMock(return_value=html)
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.validate_icons",
+        AsyncMock(return_value={"BTC", "ETH"}),
+    )
+    playwright_mock = AsyncMock(return_value=html.decode())
+    monkeypatch.setattr(
+        "services.MarketDataService.get_html_by_playwright", playwright_mock
+    )
+    icons_path = tmp_path / "icons.json"
+    monkeypatch.setattr(service.icon_cache, "prefetch", AsyncMock())
+
+    # Act
+    quotes = await service.force_update_icons(json_path=icons_path)
+    await service.close()
+
+    # Assert
+    playwright_mock.assert_awaited_once()
+    icons = json.loads(icons_path.read_text())
+    # BTC logo is on the rendered page, ETH has none
+    assert icons["BTC"] == "https://example.com/"
+    assert quotes["BTC"].icon == "https://example.com/"
+    assert "ETH" not in icons
+    assert quotes["ETH"].icon == ""
+    assert icons["UNI"].endswith(".png")
+
+
+@pytest.mark.asyncio
+async def test_unresolved_icons_are_lost_if_playwright_fails(monkeypatch, tmp_path):
+    """Tests that icons failed HEAD validation don't stay in quotes when
+    the rendered page can't be downloaded"""
+
+    # Arrange
+    service = MarketDataService()
+    service.config = dataclasses.replace(service.config, ICONS_VALIDATE=True)
+    service.settings = Mock(get=Mock(return_value=False))
+    html = (FIXTURES / "next_data_values.html").read_bytes()
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_listing_page", AsyncMock(return_value=html)
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.validate_icons",
+        AsyncMock(return_value={"BTC"}),
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.get_html_by_playwright",
+        AsyncMock(side_effect=Exception("browser crashed")),
+    )
+    icons_path = tmp_path / "icons.json"
+    monkeypatch.setattr(service.icon_cache, "prefetch", AsyncMock())
+
+    # Act
+    quotes = await service.force_update_icons(json_path=icons_path)
+    await service.close()
+
+    # Assert
+    icons = json.loads(icons_path.read_text())
+    assert "BTC" not in icons
+    assert quotes["BTC"].icon == ""
+    assert lost_icons_in(quotes) == 1
+
+
 @pytest.mark.asyncio
 async def test_test_connection():
     service = MarketDataService()
@@ -139,8 +376,9 @@ async def test_test_connection():
 async def test_estimate_parse_time(monkeypatch):
     service = MarketDataService()
 
-    async def playwright_mock():
-        await asyncio.sleep(7.5)
+    async def playwright_mock(filtered=True, traffic=None):
+        traffic.update({"transferred_bytes": 1000 if filtered else 5000})
+        await asyncio.sleep(7.5 if filtered else 1.0)
         return 200
 
     async def aiohttp_mock():
@@ -157,6 +395,9 @@ async def test_estimate_parse_time(monkeypatch):
 
     assert 7.3 <= result["playwright"]["duration"] <= 7.7
     assert 1.3 <= result["aiohttp"]["duration"] <= 1.7
+    assert 0.8 <= result["playwright_unfiltered"]["duration"] <= 1.2
+    assert result["playwright"]["transferred_bytes"] == 1000
+    assert result["playwright_unfiltered"]["transferred_bytes"] == 5000
 
 
 @pytest.mark.asyncio
@@ -204,12 +445,12 @@ async def test_force_parse_with_update_icons_fails(monkeypatch):
     monkeypatch.setattr(service, "force_update_icons", fail)
 
     monkeypatch.setattr(
-        "services.MarketDataService.get_html_for_top_100",
-        AsyncMock(),
+        "services.MarketDataService.fetch_pages",
+        AsyncMock(return_value={1: "<html>"}),
     )
     monkeypatch.setattr(
-        "services.MarketDataService.get_values_from_html_to_dict",
-        lambda *a, **k: {},
+        "services.MarketDataService.parse_pages",
+        AsyncMock(return_value={}),
     )
     monkeypatch.setattr(
         "services.MarketDataService.save_values_to_json",
@@ -224,24 +465,285 @@ async def test_force_parse_with_update_icons_fails(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_playwright_request_if_failed(monkeypatch):
-    """Tests that if async_playwright doesnt work logger will called"""
+async def test_force_parse_reuses_quotes_from_icons_update(monkeypatch, tmp_path):
+    """Tests that force_parse doesn't fetch page again after icons update"""
 
     # Arrange
     service = MarketDataService()
-    mock_logger = Mock()
+    quotes = {"BTC": {"ticker": "BTC", "icon": "https://example.com/"}}
 
-    monkeypatch.setattr("services.MarketDataService.logger", mock_logger)
+    monkeypatch.setattr(service, "_should_update_by_lost_icons", lambda json_path: True)
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    monkeypatch.setattr(service, "force_update_icons", AsyncMock(return_value=quotes))
+    fetch_mock = AsyncMock()
+    monkeypatch.setattr("services.MarketDataService.fetch_pages", fetch_mock)
 
-    class FailPlaywright:
-        async def __aenter__(self):
-            raise Exception("network boom")
+    # Act
+    await service.force_parse(tmp_path / "json.json")
 
-        async def __aexit__(self, exc_type, exc, tb):
-            pass
+    # Assert
+    fetch_mock.assert_not_called()
+    assert service._get_data() == quotes
+
+
+@pytest.mark.asyncio
+async def test_force_parse_fetches_all_pages_after_icons_update(monkeypatch, tmp_path):
+    """Tests that page 1 quotes of icons update don't replace multi-page snapshot"""
+
+    # Arrange
+    service = MarketDataService()
+    service.config = dataclasses.replace(service.config, LISTING_PAGES=2)
+    page_1 = {"BTC": {"ticker": "BTC", "icon": "https://example.com/"}}
+    pages = {**page_1, "DOGE": {"ticker": "DOGE", "icon": "https://example.com/"}}
 
+    monkeypatch.setattr(service, "_should_update_by_lost_icons", lambda json_path: True)
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    monkeypatch.setattr(service, "force_update_icons", AsyncMock(return_value=page_1))
+    fetch_mock = AsyncMock(return_value={1: "<html>", 2: "<html>"})
+    monkeypatch.setattr("services.MarketDataService.fetch_pages", fetch_mock)
     monkeypatch.setattr(
-        "services.MarketDataService.async_playwright", lambda: FailPlaywright()
+        "services.MarketDataService.parse_pages", AsyncMock(return_value=pages)
+    )
+
+    # Act
+    await service.force_parse(tmp_path / "json.json")
+
+    # Assert
+    fetch_mock.assert_awaited_once()
+    assert service._get_data() == pages
+
+
+@pytest.mark.asyncio
+async def test_icon_cache_covers_every_listing_page(monkeypatch, tmp_path):
+    """Tests that icons refreshed from page 1 are prefetched together with
+    icons of the other pages, taken from the merged snapshot"""
+
+    # Arrange
+    service = MarketDataService()
+    service.config = dataclasses.replace(
+        service.config, LISTING_PAGES=2, ICONS=str(tmp_path / "icons.json")
+    )
+    service.settings = Mock(get=Mock(return_value=False))
+    monkeypatch.setattr(service, "_should_update_by_lost_icons", lambda json_path: True)
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    html = (FIXTURES / "next_data_values.html").read_bytes()
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_listing_page", AsyncMock(return_value=html)
+    )
+    pages = {
+        "BTC": {"ticker": "BTC", "icon": "https://example.com/1.png"},
+        "DOGE": {"ticker": "DOGE", "icon": "https://example.com/74.png"},
+        "NEW": {"ticker": "NEW", "icon": ""},
+    }
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_pages",
+        AsyncMock(return_value={1: "<html>", 2: "<html>"}),
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.parse_pages", AsyncMock(return_value=pages)
+    )
+    prefetch_mock = AsyncMock()
+    monkeypatch.setattr(service.icon_cache, "prefetch", prefetch_mock)
+
+    # Act
+    await service.force_parse(tmp_path / "json.json")
+    await service._icon_prefetch
+    await service.close()
+
+    # Assert
+    prefetch_mock.assert_awaited_once_with(
+        ANY,
+        {"BTC": "https://example.com/1.png", "DOGE": "https://example.com/74.png"},
+        limiter=service.rate_limiter,
+    )
+    assert service._icon_prefetch_pending is False
+
+
+@pytest.mark.asyncio
+async def test_force_parse_reports_loop_lag(monkeypatch, tmp_path):
+    """Tests that loop lag measured during force_parse is in status"""
+
+    # Arrange
+    service = MarketDataService()
+    monkeypatch.setattr(
+        service, "_should_update_by_lost_icons", lambda json_path: False
+    )
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_pages",
+        AsyncMock(return_value={1: "<html>"}),
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.parse_pages", AsyncMock(return_value={})
+    )
+
+    # Act
+    await service.force_parse(tmp_path / "json.json")
+    status = service.get_status()
+    await service.close()
+
+    # Assert
+    assert set(status["loop_lag"]) == {"max_ms", "mean_ms", "samples"}
+    assert status["parse_executor"] == {"kind": "thread", "pending": 0}
+
+
+def test_get_columnar_data_is_cached_per_snapshot():
+    """Tests that snapshot is converted to columns only once"""
+
+    # Arrange
+    service = MarketDataService()
+    service._snapshot = {"BTC": {"ticker": "BTC", "price": 1.0, "id": 0}}
+
+    # Act
+    first = service.get_columnar_data()
+    second = service.get_columnar_data()
+    service._snapshot = {"ETH": {"ticker": "ETH", "price": 2.0, "id": 0}}
+    third = service.get_columnar_data()
+
+    # Assert
+    assert first is second
+    assert third.get("ETH", "price") == 2.0
+
+
+@pytest.mark.asyncio
+async def test_force_parse_records_no_change_cycle(monkeypatch, tmp_path):
+    """Tests that unchanged listing isn't persisted and is shown in status"""
+
+    # Arrange
+    service = MarketDataService()
+    monkeypatch.setattr(
+        service, "_should_update_by_lost_icons", lambda json_path: False
+    )
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.fetch_pages",
+        AsyncMock(return_value={1: "<html>"}),
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.parse_pages",
+        AsyncMock(side_effect=[{}, SnapshotUnchanged()]),
+    )
+    save_mock = Mock()
+    monkeypatch.setattr("services.MarketDataService.save_values_to_json", save_mock)
+
+    # Act
+    await service.force_parse(tmp_path / "json.json")
+    await service.force_parse(tmp_path / "json.json")
+    status = service.get_status()
+    await service.close()
+
+    # Assert
+    save_mock.assert_called_once()
+    assert status["last_cycle"] == "no-change"
+    assert status["cycles"] == {
+        "updated": 1,
+        "no-change": 1,
+        "circuit-open": 0,
+        "failed": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_serves_last_good_snapshot(monkeypatch, tmp_path):
+    """Tests that failing upstream is retried, then breaker opens and
+    last good snapshot is kept without calling upstream"""
+
+    # Arrange
+    service = MarketDataService()
+    monkeypatch.setattr(
+        service, "_should_update_by_lost_icons", lambda json_path: False
+    )
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    monkeypatch.setattr(service.resilience, "_sleep", AsyncMock())
+    html = (FIXTURES / "next_data_values.html").read_bytes()
+    url = URL("https://coinmarketcap.com/coins/")
+    upstream_down = aiohttp.ClientResponseError(
+        aiohttp.RequestInfo(url, "GET", {}, url), (), status=503
+    )
+    calls = []
+
+    async def fake_fetch(session=None, url=None, validators=None, limiter=None):
+        calls.append(url)
+        if len(calls) > 1:
+            raise upstream_down
+        return html
+
+    monkeypatch.setattr("parser.fetch_strategy.fetch_listing_page", fake_fetch)
+    json_path = tmp_path / "json.json"
+
+    # Act
+    await service.force_parse(json_path)
+    snapshot = service._get_data()
+    for _ in range(service.config.BREAKER_FAILURES):
+        await service.force_parse(json_path)
+    fetches_before_open = len(calls)
+    await service.force_parse(json_path)
+    status = service.get_status()
+    await service.close()
+
+    # Assert
+    assert fetches_before_open == 1 + 3 * service.config.FETCH_RETRIES
+    assert len(calls) == fetches_before_open
+    assert service._get_data() is snapshot
+    assert status["last_cycle"] == "circuit-open"
+    assert status["breaker"]["state"] == "open"
+    assert status["breaker"]["errors"] == {"server": 3 * service.config.FETCH_RETRIES}
+
+
+@pytest.mark.asyncio
+async def test_parse_failures_dont_open_breaker(monkeypatch, tmp_path):
+    """Tests that markup which can't be parsed fails the cycle but isn't
+    counted as upstream failure"""
+
+    # Arrange
+    service = MarketDataService()
+    monkeypatch.setattr(
+        service, "_should_update_by_lost_icons", lambda json_path: False
+    )
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+
+    async def fake_fetch(session=None, url=None, validators=None, limiter=None):
+        # answered 200, but without __NEXT_DATA__ and with changed table
+        return b"<html><body><table>" + b"<tr><td>new</td></tr>" * 3 + b"</table>"
+
+    monkeypatch.setattr("parser.fetch_strategy.fetch_listing_page", fake_fetch)
+
+    # Act
+    for _ in range(service.config.BREAKER_FAILURES + 1):
+        await service.force_parse(tmp_path / "json.json")
+    status = service.get_status()
+    await service.close()
+
+    # Assert
+    assert status["cycles"]["failed"] == service.config.BREAKER_FAILURES + 1
+    assert status["breaker"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_playwright_request_if_failed(monkeypatch):
+    """Tests that if browser can't be launched logger will called"""
+
+    # Arrange
+    service = MarketDataService()
+    mock_logger = Mock()
+
+    monkeypatch.setattr("services.MarketDataService.logger", mock_logger)
+    monkeypatch.setattr(
+        service.browser, "_launch", AsyncMock(side_effect=Exception("network boom"))
     )
 
     # Act
@@ -289,7 +791,7 @@ async def test_aiohttp_request_if_failed(monkeypatch):
 
 @pytest.mark.asyncio
 async def test_force_parse_logs_error_if_get_html_fails(monkeypatch):
-    """Tests that force_parse logs an error if get_html_for_top_100 fails"""
+    """Tests that force_parse logs an error if fetching listing page fails"""
 
     # Arrange
     service = MarketDataService()
@@ -312,14 +814,9 @@ async def test_force_parse_logs_error_if_get_html_fails(monkeypatch):
         raise Exception("network boom")
 
     monkeypatch.setattr(
-        "services.MarketDataService.get_html_for_top_100",
+        "services.MarketDataService.fetch_pages",
         fail,
     )
-
-    monkeypatch.setattr(
-        "services.MarketDataService.get_values_from_html_to_dict",
-        lambda *a, **k: {},
-    )
     monkeypatch.setattr(
         "services.MarketDataService.save_values_to_json",
         lambda *a, **k: None,
@@ -432,6 +929,9 @@ async def test_run_run_periodically_will_not_run_if_stop_event():
     service = MarketDataService.__new__(MarketDataService)
     service._stop_event = asyncio.Event()
     service._stop_event.set()
+    service.scheduler = FixedRateScheduler()
+    service.sinks = {"json": SnapshotSink("json", AsyncMock())}
+    service.parse_stage = SnapshotSink("parse", AsyncMock(), backpressure=True)
     service.force_parse = Mock()
 
     # Act
@@ -548,17 +1048,163 @@ def test_get_status():
 async def test_get_status_next_parse():
     # Arrange
     service = MarketDataService()
+    now = [100.0]
+    service.scheduler = FixedRateScheduler(clock=lambda: now[0])
+    service.scheduler.start(60)
+    service.scheduler.run_started()
+    service.scheduler.next_delay()
+
+    # Act
+    status = service.get_status()
+
+    # Assert
+    assert status["next_parse"] == 60.0
+    assert status["scheduler"]["target_period"] == 60
+
+    now[0] += 120
+    assert service.get_status()["next_parse"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_run_periodically_keeps_fixed_rate_after_errors(monkeypatch):
+    """Failed cycles don't add a sleep, excel writing doesn't stretch period"""
+    # Arrange
+    service = MarketDataService()
+    service._stop_event = asyncio.Event()
+    service.can_write_in_excel = False
+    starts = []
+    loop = asyncio.get_running_loop()
+
+    async def failing_parse():
+        starts.append(loop.time())
+        if len(starts) == 4:
+            service._stop_event.set()
+        raise Exception("Parsing failed")
+
+    monkeypatch.setattr(service, "force_parse", failing_parse)
 
-    start_time = datetime(2026, 4, 20, 10, 0, 0)
-    with freeze_time(start_time):
-        service.next_run_at = start_time + timedelta(minutes=1)
+    # Act
+    await service._run_periodically(seconds_parsing=0.05)
 
-        # Act
-        status = service.get_status()
+    # Assert
+    assert len(starts) == 4
+    assert starts[-1] - starts[0] < 0.05 * 3 + 0.1
+    assert service.get_status()["scheduler"]["runs"] == 4
 
-        # Assert
-        assert status["next_parse"] == 60.0
 
-    with freeze_time(start_time + timedelta(minutes=2)):
-        status_after = service.get_status()
-        assert status_after["next_parse"] == 0.0
+@pytest.mark.asyncio
+async def test_slow_excel_sink_doesnt_hold_back_parsing(monkeypatch, tmp_path):
+    """Ticks keep their period while excel is busy, stale snapshots are dropped"""
+    # Arrange
+    service = MarketDataService()
+    service.config = dataclasses.replace(
+        service.config, JSON_PATH=str(tmp_path / "json.json")
+    )
+    service._stop_event = asyncio.Event()
+    service.can_write_in_excel = True
+    monkeypatch.setattr(
+        service, "_should_update_by_lost_icons", lambda json_path: False
+    )
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    snapshots = iter(range(100))
+
+    async def fetch(pages, **kwargs):
+        return {1: "<html>"}
+
+    async def parse(htmls, **kwargs):
+        return {"BTC": {"icon": "https://example.com/", "n": next(snapshots)}}
+
+    monkeypatch.setattr("services.MarketDataService.fetch_pages", fetch)
+    monkeypatch.setattr("services.MarketDataService.parse_pages", parse)
+    saved = []
+    monkeypatch.setattr(
+        "services.MarketDataService.save_values_to_json",
+        lambda data, filepath: saved.append(data["BTC"]["n"]),
+    )
+    written = []
+
+    def slow_excel(data):
+        # blocking like openpyxl save, must not run on the event loop
+        written.append(data["BTC"]["n"])
+        time.sleep(0.2)
+
+    monkeypatch.setattr(service, "_write_excel", slow_excel)
+
+    lags = []
+
+    async def stop_later():
+        while not written:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        lags.append(service.get_status()["sinks"]["excel"]["lag_s"])
+        await asyncio.sleep(0.05)
+        service._stop_event.set()
+
+    # Act
+    stopper = asyncio.create_task(stop_later())
+    await service._run_periodically(seconds_parsing=0.02, writing_in_excel=True)
+    await stopper
+
+    # Assert
+    assert service.cycles["updated"] >= 5
+    # json got the last snapshot, excel skipped everything it was too slow for
+    assert saved[-1] == service._get_data()["BTC"]["n"]
+    assert len(written) <= 2
+    assert "excel" not in service.sinks
+    assert lags[0] > 0.05
+    assert service.scheduler.stats["missed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_next_fetch_overlaps_parse_of_previous_listing(monkeypatch, tmp_path):
+    """Ticks only fetch, parse stage parses the previous listing meanwhile
+    and nothing fetched is dropped"""
+    # Arrange
+    service = MarketDataService()
+    service.config = dataclasses.replace(
+        service.config, JSON_PATH=str(tmp_path / "json.json")
+    )
+    service._stop_event = asyncio.Event()
+    monkeypatch.setattr(
+        service, "_should_update_by_lost_icons", lambda json_path: False
+    )
+    monkeypatch.setattr(
+        service, "_should_update_icons_by_time", AsyncMock(return_value=False)
+    )
+    monkeypatch.setattr(
+        "services.MarketDataService.save_values_to_json", lambda data, filepath: None
+    )
+    fetched, parsed, overlapped = [], [], []
+    parsing = asyncio.Event()
+
+    async def fetch(pages, **kwargs):
+        if parsing.is_set():
+            overlapped.append(len(fetched))
+        await asyncio.sleep(0.03)
+        fetched.append(len(fetched))
+        if len(fetched) == 4:
+            service._stop_event.set()
+        return {1: fetched[-1]}
+
+    async def parse(htmls, **kwargs):
+        parsing.set()
+        await asyncio.sleep(0.03)
+        parsing.clear()
+        parsed.append(htmls[1])
+        return {"BTC": {"icon": "https://example.com/", "n": htmls[1]}}
+
+    monkeypatch.setattr("services.MarketDataService.fetch_pages", fetch)
+    monkeypatch.setattr("services.MarketDataService.parse_pages", parse)
+
+    # Act
+    await service._run_periodically(seconds_parsing=0.01)
+
+    # Assert
+    assert overlapped
+    # stopping parses everything fetched, in order
+    assert parsed == [0, 1, 2, 3]
+    assert service._get_data()["BTC"]["n"] == 3
+    assert service.cycles["updated"] == 4
+    assert service.get_status()["parse_stage"]["dropped"] == 0